@@ -0,0 +1,109 @@
+# altyazicizici.py (v1 - Pillow ile Altyazı Atlası)
+
+# Tüm altyazılar süreç içinde Pillow/FreeType ile bir kez rasterleştirilir ve tek bir RGBA
+# atlasına (sabit boyutlu hücreler) yerleştirilir. Render sırasında her karede yalnızca o an
+# etkin olan hücre harmanlanır; ImageMagick'e altyazı başına süreç açılmaz.
+
+import bisect
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# --- AYARLAR ---
+FONT_ADAYLARI = [
+    Path("LiberationSans-Bold.ttf"),
+    Path("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"),
+    Path("/usr/share/fonts/truetype/liberation2/LiberationSans-Bold.ttf"),
+    Path("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+]
+ONBELLEK_BOYUTU = 4096  # Rasterleştirilmiş altyazı önbelleği (metin başına bir kayıt)
+
+
+@lru_cache(maxsize=None)
+def font_yukle(font_size):
+    """Liberation Sans Bold'u (yoksa ilk bulunan yedeği) verilen boyutta yükler."""
+    for aday in FONT_ADAYLARI:
+        if aday.exists():
+            return ImageFont.truetype(str(aday), font_size)
+    logging.warning("⚠️ Altyazı için TrueType font bulunamadı, varsayılan font kullanılıyor.")
+    return ImageFont.load_default()
+
+def satirlara_bol(metin, font, max_genislik):
+    """Metni, ImageMagick 'caption' gibi kelime kelime kaydırarak satırlara böler."""
+    satirlar = []
+    for paragraf in metin.split("\n"):
+        satir = ""
+        for kelime in paragraf.split():
+            aday = f"{satir} {kelime}" if satir else kelime
+            if satir and font.getlength(aday) > max_genislik:
+                satirlar.append(satir)
+                satir = kelime
+            else:
+                satir = aday
+        satirlar.append(satir)
+    return satirlar
+
+@lru_cache(maxsize=ONBELLEK_BOYUTU)
+def altyazi_rasterle(metin, font_size, genislik):
+    """
+    Tek bir altyazıyı 'genislik' piksel genişliğinde, satırları ortalanmış beyaz metin olarak çizer.
+    Dönüş: (yükseklik, genislik) boyutunda 0-255 alfa maskesi (metin rengi sabit olduğundan RGB tutulmaz).
+    """
+    font = font_yukle(font_size)
+    satirlar = satirlara_bol(metin.upper(), font, genislik)
+    ascent, descent = font.getmetrics()
+    satir_yuksekligi = ascent + descent
+    maske = Image.new("L", (genislik, max(1, satir_yuksekligi * len(satirlar))), 0)
+    cizim = ImageDraw.Draw(maske)
+    for i, satir in enumerate(satirlar):
+        cizim.text((genislik / 2, i * satir_yuksekligi), satir, font=font, fill=255, anchor="ma")
+    maske = np.asarray(maske)
+    maske.setflags(write=False)
+    return maske
+
+
+class AltyaziAtlasi:
+    """
+    Bir videonun tüm altyazılarını tutan atlas. Hücre 0 boştur; aynı metin birden çok kez
+    geçse de bir kez çizilir. Zaman -> hücre eşlemesi başlangıç zamanları üzerinde ikili aramayla yapılır.
+    """
+
+    def __init__(self, altyazilar, genislik, font_size, video_suresi, renk=(255, 255, 255)):
+        self.genislik = genislik
+        gecerli = [a for a in altyazilar if a['baslangic'] < video_suresi and a['metin'].strip()]
+        gecerli.sort(key=lambda a: a['baslangic'])
+
+        hucre_indeksleri = {}
+        maskeler = []
+        for altyazi in gecerli:
+            if altyazi['metin'] not in hucre_indeksleri:
+                hucre_indeksleri[altyazi['metin']] = len(maskeler) + 1
+                maskeler.append(altyazi_rasterle(altyazi['metin'], font_size, genislik))
+
+        self.yukseklik = max((m.shape[0] for m in maskeler), default=1)
+        # Metin her hücrede üste hizalıdır (TextClip caption ile aynı yerleşim).
+        self.alfa = np.zeros((len(maskeler) + 1, self.yukseklik, genislik), dtype=np.uint8)
+        for i, maske in enumerate(maskeler, start=1):
+            self.alfa[i, :maske.shape[0]] = maske
+        self.renk_karesi = np.empty((self.yukseklik, genislik, 3), dtype=np.uint8)
+        self.renk_karesi[:] = renk
+
+        self.baslangiclar = [a['baslangic'] for a in gecerli]
+        self.bitisler = [min(a['bitis'], video_suresi) for a in gecerli]
+        self.hucreler = [hucre_indeksleri[a['metin']] for a in gecerli]
+        logging.info(f"📝 {len(gecerli)} altyazı için {len(maskeler)} benzersiz hücreli atlas oluşturuldu ({self.genislik}x{self.yukseklik}).")
+
+    def hucre(self, t):
+        """t anında gösterilecek atlas hücresinin indeksi (altyazı yoksa 0)."""
+        i = bisect.bisect_right(self.baslangiclar, t) - 1
+        if i >= 0 and t < self.bitisler[i]:
+            return self.hucreler[i]
+        return 0
+
+    def maske(self, t):
+        """t anındaki altyazının alfa maskesi (0-255, uint8)."""
+        return self.alfa[self.hucre(t)]
+
@@ -0,0 +1,292 @@
+# anahtaryoneticisi.py (v1 - Paylaşılan API Anahtarı Servisi)
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from google.cloud import secretmanager
+from google.api_core import exceptions as google_exceptions
+
+import olcumleme
+
+# --- SABİTLER ---
+GEMINI_SECRET_ADI = "gemini-api-anahtarlari"
+ANAHTAR_TTL_SANIYE = int(os.environ.get("ANAHTAR_TTL_SANIYE", "3600"))
+KOTA_BEKLEME_SANIYE = 60       # Kotaya takılan (429 / ResourceExhausted) anahtar bu süre kullanılmaz
+YETKI_BEKLEME_SANIYE = 1800    # Yetkisi reddedilen (401/403 / PermissionDenied) anahtar bu süre kullanılmaz
+GECIKME_AGIRLIGI = 0.2         # Gecikme ortalaması için üstel hareketli ortalama ağırlığı
+
+# Secret Manager'dan okunan anahtarlar süreç boyunca tek yerde tutulur. TTL dolduğunda
+# çağıran beklemez: eski liste döner ve yenileme arka planda yapılır.
+_anahtar_onbellegi: Dict[Tuple[str, str], Tuple[List[str], float]] = {}
+_yenilenenler = set()
+_onbellek_kilidi = threading.Lock()
+
+
+def _secret_oku(project_id: str, secret_id: str) -> List[str]:
+    client = secretmanager.SecretManagerServiceClient()
+    name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
+    request_start = time.perf_counter()
+    response = client.access_secret_version(request={"name": name})
+    olcumleme.api_cagrisi("secret_manager", time.perf_counter() - request_start)
+    payload = response.payload.data.decode("UTF-8")
+    return [line.strip() for line in payload.splitlines() if line.strip()]
+
+def _arka_planda_yenile(project_id: str, secret_id: str):
+    try:
+        api_keys = _secret_oku(project_id, secret_id)
+        if api_keys:
+            with _onbellek_kilidi:
+                _anahtar_onbellegi[(project_id, secret_id)] = (api_keys, time.time())
+            logging.info(f"🔄 '{secret_id}' anahtarları arka planda yenilendi ({len(api_keys)} adet).")
+    except Exception as e:
+        logging.warning(f"⚠️ '{secret_id}' anahtarları arka planda yenilenemedi, önbellekteki liste kullanılmaya devam ediliyor: {e}")
+    finally:
+        with _onbellek_kilidi:
+            _yenilenenler.discard((project_id, secret_id))
+
+def get_api_keys(project_id: str, secret_id: str = GEMINI_SECRET_ADI) -> List[str]:
+    """
+    API anahtarlarını döndürür. Secret Manager yalnızca ilk çağrıda beklenerek okunur;
+    TTL dolduktan sonraki çağrılar önbellekteki listeyi hemen döndürüp yenilemeyi arka planda başlatır.
+    Secret bulunamazsa veya okunamazsa istisna fırlatır.
+    """
+    anahtar = (project_id, secret_id)
+    with _onbellek_kilidi:
+        kayit = _anahtar_onbellegi.get(anahtar)
+        if kayit and time.time() - kayit[1] > ANAHTAR_TTL_SANIYE and anahtar not in _yenilenenler:
+            _yenilenenler.add(anahtar)
+            threading.Thread(target=_arka_planda_yenile, args=anahtar, name="anahtar-yenileme", daemon=True).start()
+    if kayit:
+        return list(kayit[0])
+
+    try:
+        logging.info(f"🔑 '{secret_id}' anahtarları Secret Manager'dan okunuyor...")
+        api_keys = _secret_oku(project_id, secret_id)
+    except google_exceptions.NotFound:
+        logging.critical(f"❌ Secret Manager'da '{secret_id}' secret'ı bulunamadı (Proje: {project_id}).")
+        raise
+    except Exception as e:
+        logging.critical(f"❌ Secret Manager'dan anahtar okunurken kritik hata: {e}")
+        raise
+
+    if not api_keys:
+        logging.error(f"❌ Secret Manager'da '{secret_id}' içinde anahtar bulunamadı.")
+        return []
+    with _onbellek_kilidi:
+        _anahtar_onbellegi[anahtar] = (api_keys, time.time())
+    logging.info(f"✅ {len(api_keys)} adet API anahtarı Secret Manager'dan alındı ve önbelleğe kaydedildi.")
+    return list(api_keys)
+
+
+# --- ANAHTAR SAĞLIK DURUMU ---
+
+@dataclass
+class AnahtarSagligi:
+    basarili: int = 0
+    basarisiz: int = 0
+    ortalama_gecikme: Optional[float] = None
+    son_hata: Optional[str] = None
+    bekleme_bitis: float = 0.0
+
+# Sağlık kaydı (kapsam, anahtar) çifti başına tutulur. Kapsam, çağrının gittiği servis/modeldir ("tts" veya
+# Gemini model adı): bir modelin kotası ya da başarısı diğer modellerin ve TTS'in kaydını etkilemez.
+_saglik: Dict[Tuple[str, str], AnahtarSagligi] = {}
+# Yetki hatası anahtarın kendisiyle ilgilidir (iptal/kısıtlama); bekleme tüm kapsamlara uygulanır.
+# Değer: (bekleme bitişi, hatanın geldiği kapsam).
+_yetki_beklemeleri: Dict[str, Tuple[float, str]] = {}
+_saglik_kilidi = threading.Lock()
+
+
+def key_label(api_key: str) -> str:
+    """Loglarda anahtarın tamamını göstermemek için kısa etiket döndürür."""
+    return f"…{api_key[-4:]}" if api_key else "?"
+
+def _kayit(api_key: str, scope: str) -> AnahtarSagligi:
+    return _saglik.setdefault((scope, api_key), AnahtarSagligi())
+
+def _bekleme_bitis(api_key: str, scope: str) -> float:
+    durum = _saglik.get((scope, api_key))
+    yetki = _yetki_beklemeleri.get(api_key)
+    return max(durum.bekleme_bitis if durum else 0.0, yetki[0] if yetki else 0.0)
+
+def record_success(api_key: str, latency: Optional[float] = None, *, scope: str):
+    """
+    Başarılı bir çağrıyı kaydeder; anahtar bu kapsamda bekleme durumundaysa hemen kullanılabilir olur.
+    Başka kapsamların beklemeleri korunur; yetki beklemesi yalnızca aynı kapsamdan geldiyse kaldırılır.
+    """
+    with _saglik_kilidi:
+        durum = _kayit(api_key, scope)
+        durum.basarili += 1
+        durum.bekleme_bitis = 0.0
+        yetki = _yetki_beklemeleri.get(api_key)
+        if yetki and yetki[1] == scope:
+            del _yetki_beklemeleri[api_key]
+        if latency is not None:
+            if durum.ortalama_gecikme is None:
+                durum.ortalama_gecikme = latency
+            else:
+                durum.ortalama_gecikme += GECIKME_AGIRLIGI * (latency - durum.ortalama_gecikme)
+
+def record_failure(api_key: str, reason: str, cooldown: Optional[float] = None, *, scope: str):
+    """
+    Başarısız bir çağrıyı kaydeder. 'reason': "kota", "yetki" veya "gecici".
+    Kota hatasında anahtar yalnızca bu kapsamda, yetki hatasında tüm kapsamlarda bir süre kullanım dışı bırakılır.
+    """
+    if cooldown is None:
+        cooldown = {"kota": KOTA_BEKLEME_SANIYE, "yetki": YETKI_BEKLEME_SANIYE}.get(reason, 0)
+    with _saglik_kilidi:
+        durum = _kayit(api_key, scope)
+        durum.basarisiz += 1
+        durum.son_hata = reason
+        if cooldown:
+            bitis = time.time() + cooldown
+            if reason == "yetki":
+                onceki = _yetki_beklemeleri.get(api_key)
+                if onceki is None or onceki[0] < bitis:
+                    _yetki_beklemeleri[api_key] = (bitis, scope)
+            else:
+                durum.bekleme_bitis = max(durum.bekleme_bitis, bitis)
+    if cooldown:
+        kapsam = "tüm servislerde" if reason == "yetki" else f"'{scope}' için"
+        logging.warning(f"⏸️ API anahtarı {key_label(api_key)} '{reason}' hatası nedeniyle {kapsam} {cooldown:.0f}s kullanım dışı.")
+
+def record_http_result(api_key: str, status_code: int, latency: Optional[float] = None, *, scope: str):
+    """HTTP yanıt koduna göre başarı veya hata kaydeder. Anahtarla ilgisi olmayan 4xx hataları sayılmaz."""
+    if status_code == 200:
+        record_success(api_key, latency, scope=scope)
+    elif status_code == 429:
+        record_failure(api_key, "kota", scope=scope)
+    elif status_code in (401, 403):
+        record_failure(api_key, "yetki", scope=scope)
+    elif status_code >= 500:
+        record_failure(api_key, "gecici", scope=scope)
+
+def is_available(api_key: str, *, scope: str) -> bool:
+    with _saglik_kilidi:
+        return _bekleme_bitis(api_key, scope) <= time.time()
+
+def healthy_keys(api_keys: List[str], *, scope: str) -> List[str]:
+    """
+    Bu kapsamda bekleme süresinde olmayan anahtarları, ölçülen ortalama gecikmeye göre sıralı döndürür
+    (henüz ölçülmemiş anahtarlar en sonda). Hiçbiri uygun değilse bekleme süresi en erken biteni döner.
+    """
+    simdi = time.time()
+    with _saglik_kilidi:
+        durumlar = [(key, _bekleme_bitis(key, scope), _saglik.get((scope, key)) or AnahtarSagligi()) for key in api_keys]
+    uygun = [(key, d) for key, bitis, d in durumlar if bitis <= simdi]
+    if not uygun:
+        return [min(durumlar, key=lambda kbd: kbd[1])[0]] if durumlar else []
+    uygun.sort(key=lambda kd: (kd[1].ortalama_gecikme is None, kd[1].ortalama_gecikme or 0.0))
+    return [key for key, _ in uygun]
+
+
+# --- ANAHTAR BAŞINA HIZ SINIRLAYICI VE PLANLAYICI ---
+
+# Model başına, anahtar başına dakikalık istek kotaları. GEMINI_DAKIKALIK_KOTA verilirse tüm modeller için kullanılır.
+DAKIKALIK_KOTALAR = {"gemini-2.5-pro": 5, "gemini-1.5-pro": 2}
+VARSAYILAN_DAKIKALIK_KOTA = 10
+PLANLAYICI_MAKS_BEKLEME = 300  # Uygun anahtar için en fazla bu kadar saniye beklenir
+
+
+class TokenKovasi:
+    """Dakikalık kotaya göre dolan klasik token bucket; kapasite bir dakikalık kota kadardır."""
+
+    def __init__(self, dakikalik_kota: int):
+        self.kapasite = float(max(1, dakikalik_kota))
+        self.oran = self.kapasite / 60.0
+        self.jeton = self.kapasite
+        self.son = time.monotonic()
+
+    def _doldur(self, simdi: float):
+        self.jeton = min(self.kapasite, self.jeton + (simdi - self.son) * self.oran)
+        self.son = simdi
+
+    def bekleme(self, simdi: float) -> float:
+        """Bir jeton birikene kadar beklenecek süre (hazırsa 0)."""
+        self._doldur(simdi)
+        return 0.0 if self.jeton >= 1.0 else (1.0 - self.jeton) / self.oran
+
+    def harca(self):
+        self.jeton -= 1.0
+
+
+class AnahtarPlanlayici:
+    """
+    Bir model için istekleri anahtarlara dağıtır: her anahtarın kendi token kovası vardır,
+    jetonu olan anahtarlar arasından en az meşgul (uçuştaki istek sayısı en düşük) olan seçilir.
+    Kota/yetki hatası alan anahtarlar sağlık kaydındaki bekleme süresi bitince kendiliğinden geri döner.
+    """
+
+    def __init__(self, dakikalik_kota: int, scope: str):
+        self.dakikalik_kota = dakikalik_kota
+        self.scope = scope
+        self._kovalar: Dict[str, TokenKovasi] = {}
+        self._ucusta: Dict[str, int] = {}
+        self._kosul = threading.Condition()
+
+    def acquire(self, api_keys: List[str], exclude=(), max_wait: float = PLANLAYICI_MAKS_BEKLEME) -> Optional[str]:
+        """
+        Kullanılacak anahtarı seçer ve jetonunu harcar. Uygun anahtar yoksa jeton birikene veya
+        bekleme süresi bitene kadar bekler; 'max_wait' aşılırsa ya da tüm anahtarlar hariç tutulduysa None döner.
+        """
+        adaylar = [key for key in api_keys if key not in exclude]
+        if not adaylar:
+            return None
+        son_an = time.monotonic() + max_wait
+        with self._kosul:
+            while True:
+                simdi = time.monotonic()
+                uygun = [key for key in adaylar if is_available(key, scope=self.scope)]
+                if uygun:
+                    beklemeler = {key: self._kova(key).bekleme(simdi) for key in uygun}
+                    hazir = [key for key in uygun if beklemeler[key] == 0.0]
+                    if hazir:
+                        secilen = min(hazir, key=lambda k: (self._ucusta.get(k, 0), -self._kovalar[k].jeton, _gecikme(k, self.scope)))
+                        self._kovalar[secilen].harca()
+                        self._ucusta[secilen] = self._ucusta.get(secilen, 0) + 1
+                        return secilen
+                    bekle = min(beklemeler.values())
+                else:
+                    bekle = _en_erken_bekleme_bitisi(adaylar, self.scope) - time.time()
+                kalan = son_an - simdi
+                if kalan <= 0:
+                    logging.error("❌ Süre içinde kullanılabilir Gemini API anahtarı bulunamadı.")
+                    return None
+                self._kosul.wait(max(0.05, min(bekle, kalan)))
+
+    def release(self, api_key: str):
+        """Uçuştaki isteği tamamlandı olarak işaretler ve bekleyenleri uyandırır."""
+        with self._kosul:
+            self._ucusta[api_key] = max(0, self._ucusta.get(api_key, 0) - 1)
+            self._kosul.notify_all()
+
+    def _kova(self, api_key: str) -> TokenKovasi:
+        kova = self._kovalar.get(api_key)
+        if kova is None:
+            kova = self._kovalar[api_key] = TokenKovasi(self.dakikalik_kota)
+        return kova
+
+def _gecikme(api_key: str, scope: str) -> float:
+    with _saglik_kilidi:
+        durum = _saglik.get((scope, api_key))
+        return durum.ortalama_gecikme if durum and durum.ortalama_gecikme is not None else 0.0
+
+def _en_erken_bekleme_bitisi(api_keys: List[str], scope: str) -> float:
+    with _saglik_kilidi:
+        return min((_bekleme_bitis(key, scope) for key in api_keys), default=time.time())
+
+_planlayicilar: Dict[str, AnahtarPlanlayici] = {}
+_planlayici_kilidi = threading.Lock()
+
+def get_scheduler(model_name: str) -> AnahtarPlanlayici:
+    """Model için süreç genelinde paylaşılan planlayıcıyı döndürür."""
+    with _planlayici_kilidi:
+        planlayici = _planlayicilar.get(model_name)
+        if planlayici is None:
+            kota = int(os.environ.get("GEMINI_DAKIKALIK_KOTA") or DAKIKALIK_KOTALAR.get(model_name, VARSAYILAN_DAKIKALIK_KOTA))
+            planlayici = _planlayicilar[model_name] = AnahtarPlanlayici(kota, scope=model_name)
+        return planlayici
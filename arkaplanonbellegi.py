@@ -0,0 +1,179 @@
+# arkaplanonbellegi.py (v1 - Ölçeklenmiş Arka Plan Videosu Önbelleği)
+
+# Arka plan videoları işçinin diskinde, çıktı çözünürlüğüne/fps'ine/piksel biçimine önceden
+# dönüştürülmüş olarak saklanır. Anahtar blob adı + generation'dır; kaynak dosya bucket'ta
+# değişirse yeni generation yeni bir kayıt demektir. Tüm kareler anahtar kare (all-intra) olarak
+# kodlandığından döngü başına dönmek ve rastgele erişim ucuzdur. Disk kullanımı bir üst sınırla
+# tutulur; sınır aşıldığında en uzun süredir kullanılmayan kayıtlar (LRU) silinir.
+
+import os
+import time
+import random
+import hashlib
+import logging
+import threading
+import subprocess
+
+import olcumleme
+import videoyapar
+import ffmpegmotoru
+
+# --- AYARLAR ---
+ONBELLEK_DIZINI = os.environ.get("ARKAPLAN_ONBELLEK_DIZINI", "/var/cache/video_fabrikasi/arkaplan")
+ONBELLEK_MAKS_BAYT = int(float(os.environ.get("ARKAPLAN_ONBELLEK_MAKS_GB", "10")) * 1024 ** 3)
+LISTE_TTL_SANIYE = int(os.environ.get("ARKAPLAN_LISTE_TTL", "600"))
+ARKAPLAN_ONEKI = "arkaplan_videolari/"
+VIDEO_UZANTILARI = (".mp4", ".mov")
+# Önbellek kopyası kalite kaybını en aza indirecek şekilde (CRF 16) ve yalnızca anahtar karelerle kodlanır
+DONUSTURME_ARGUMANLARI = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "16", "-g", "1", "-pix_fmt", "yuv420p", "-an"]
+
+_onbellekler = {}
+_onbellekler_kilidi = threading.Lock()
+
+
+class ArkaplanOnbellegi:
+    """Bir bucket'taki arka plan videoları için disk önbelleği."""
+
+    def __init__(self, storage_client, bucket_name, dizin=ONBELLEK_DIZINI, maks_bayt=ONBELLEK_MAKS_BAYT):
+        self.bucket = storage_client.bucket(bucket_name)
+        self.bucket_name = bucket_name
+        self.dizin = dizin
+        self.maks_bayt = maks_bayt
+        self._liste = []
+        self._liste_zamani = 0.0
+        self._kullanimda = {}
+        self._hazirlaniyor = {}  # Hazırlanmakta olan kayıt yolu -> hazırlık bitince işaretlenen Event
+        self._kilit = threading.Lock()
+        os.makedirs(self.dizin, exist_ok=True)
+
+    # --- BUCKET LİSTESİ ---
+
+    def liste(self):
+        """Arka plan videolarının (ad, generation, boyut) listesi; LISTE_TTL_SANIYE boyunca yeniden listelenmez."""
+        with self._kilit:
+            if self._liste and time.time() - self._liste_zamani < LISTE_TTL_SANIYE:
+                return self._liste
+        blobs = self.bucket.list_blobs(prefix=ARKAPLAN_ONEKI)
+        liste = [(b.name, b.generation, b.size) for b in blobs
+                 if b.name.lower().endswith(VIDEO_UZANTILARI) and b.size]
+        if not liste:
+            raise FileNotFoundError(f"'{self.bucket_name}/{ARKAPLAN_ONEKI}' klasöründe video bulunamadı.")
+        with self._kilit:
+            self._liste, self._liste_zamani = liste, time.time()
+        logging.info(f"📚 Arka plan listesi yenilendi: {len(liste)} video.")
+        return liste
+
+    # --- ÖNBELLEK KAYITLARI ---
+
+    def _kayit_yolu(self, ad, generation):
+        anahtar = f"{self.bucket_name}/{ad}#{generation}@{videoyapar.VIDEO_YUKSEKLIK}p{videoyapar.VIDEO_FPS}"
+        return os.path.join(self.dizin, hashlib.sha1(anahtar.encode("utf-8")).hexdigest()[:20] + ".mp4")
+
+    def _donustur(self, kaynak, hedef):
+        """Kaynağı çıktı yüksekliğine, fps'ine ve yuv420p'ye, tüm kareler anahtar kare olacak şekilde dönüştürür."""
+        komut = [
+            ffmpegmotoru.FFMPEG, "-hide_banner", "-loglevel", "error", "-nostats", "-y", "-i", kaynak,
+            "-vf", f"scale=-2:{videoyapar.VIDEO_YUKSEKLIK},fps={videoyapar.VIDEO_FPS},setsar=1",
+            *DONUSTURME_ARGUMANLARI, "-f", "mp4", hedef,
+        ]
+        subprocess.run(komut, check=True, stdin=subprocess.DEVNULL, capture_output=True)
+
+    def _hazirla(self, ad, generation, hedef):
+        indirilen = hedef + ".kaynak"
+        gecici = hedef + ".part"
+        try:
+            self.bucket.blob(ad, generation=generation).download_to_filename(indirilen)
+            olcumleme.bayt("indirilen", os.path.getsize(indirilen))
+            try:
+                self._donustur(indirilen, gecici)
+                os.replace(gecici, hedef)
+                logging.info(f"🎞️ Arka plan önbelleğe dönüştürülerek eklendi: {ad} ({os.path.getsize(hedef) / 1024 / 1024:.1f} MB)")
+            except (subprocess.CalledProcessError, OSError) as e:
+                # Dönüştürme başarısızsa kaynak olduğu gibi saklanır; render onu yine ölçekler.
+                hata = e.stderr.decode(errors="replace").strip()[-300:] if getattr(e, "stderr", None) else e
+                logging.warning(f"⚠️ '{ad}' dönüştürülemedi, kaynak olduğu gibi önbelleğe alınıyor: {hata}")
+                os.replace(indirilen, hedef)
+        finally:
+            for yol in (indirilen, gecici):
+                if os.path.exists(yol):
+                    os.remove(yol)
+
+    def _temizle(self):
+        """Toplam boyut sınırı aşılırsa kullanımda olmayan en eski kayıtları siler."""
+        kayitlar = []
+        for ad in os.listdir(self.dizin):
+            yol = os.path.join(self.dizin, ad)
+            if ad.endswith(".mp4") and os.path.isfile(yol):
+                durum = os.stat(yol)
+                kayitlar.append((durum.st_mtime, durum.st_size, yol))
+        toplam = sum(boyut for _, boyut, _ in kayitlar)
+        for _, boyut, yol in sorted(kayitlar):
+            if toplam <= self.maks_bayt:
+                break
+            if self._kullanimda.get(yol):
+                continue
+            os.remove(yol)
+            toplam -= boyut
+            logging.info(f"🧹 Arka plan önbelleğinden çıkarıldı: {os.path.basename(yol)}")
+
+    def al(self, ad, generation):
+        """
+        Videonun önbellekteki yolunu döndürür (yoksa indirip dönüştürür) ve kaydı kullanımda olarak işaretler.
+        İş bitince birak() çağrılmalıdır; kullanımdaki kayıtlar temizlikte silinmez.
+        İndirme ve dönüştürme kilit dışında yapılır; aynı kaydı isteyen diğer çağrılar yalnızca o kaydın
+        hazırlığını bekler, liste(), birak() ve başka kayıtlar için al() beklemez.
+        """
+        hedef = self._kayit_yolu(ad, generation)
+        with self._kilit:
+            self._kullanimda[hedef] = self._kullanimda.get(hedef, 0) + 1
+        try:
+            while True:
+                with self._kilit:
+                    if os.path.exists(hedef):
+                        os.utime(hedef)
+                        logging.info(f"♻️ Arka plan önbellekten kullanılıyor: {ad}")
+                        return hedef
+                    hazirlik = self._hazirlaniyor.get(hedef)
+                    hazirlayan = hazirlik is None
+                    if hazirlayan:
+                        hazirlik = self._hazirlaniyor[hedef] = threading.Event()
+                if not hazirlayan:
+                    # Başka bir çağrı hazırlıyor; bitince kayıt yeniden kontrol edilir (başarısız olduysa bu çağrı dener).
+                    hazirlik.wait()
+                    continue
+                try:
+                    self._hazirla(ad, generation, hedef)
+                finally:
+                    with self._kilit:
+                        del self._hazirlaniyor[hedef]
+                    hazirlik.set()
+                with self._kilit:
+                    self._temizle()
+                return hedef
+        except Exception:
+            self.birak(hedef)
+            raise
+
+    def rastgele_al(self):
+        ad, generation, _ = random.choice(self.liste())
+        logging.info(f"📹 Rastgele arka plan videosu seçildi: {ad}")
+        return self.al(ad, generation)
+
+    def _birak(self, yol):
+        kalan = self._kullanimda.get(yol, 0) - 1
+        if kalan > 0:
+            self._kullanimda[yol] = kalan
+        else:
+            self._kullanimda.pop(yol, None)
+
+    def birak(self, yol):
+        with self._kilit:
+            self._birak(yol)
+
+
+def onbellek_al(storage_client, bucket_name):
+    """Bucket başına süreç genelinde tek bir önbellek nesnesi döndürür."""
+    with _onbellekler_kilidi:
+        if bucket_name not in _onbellekler:
+            _onbellekler[bucket_name] = ArkaplanOnbellegi(storage_client, bucket_name)
+        return _onbellekler[bucket_name]
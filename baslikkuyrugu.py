@@ -0,0 +1,279 @@
+# baslikkuyrugu.py (v1 - Kiralama Tabanlı Başlık Kuyruğu)
+
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from typing import Iterable, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+# --- SABİTLER ---
+KUYRUK_ONEKI = "baslik_kuyrugu/"
+KIRADA_ONEKI = "baslik_kuyrugu_kirada/"
+BASARISIZ_ONEKI = "baslik_kuyrugu_basarisiz/"
+ESKI_LISTE_BLOBU = "creator_blueprint_titles.txt"
+KIRA_SURESI_SANIYE = int(os.environ.get("BASLIK_KIRA_SURESI", "1800"))  # 30 dakika
+MAKS_DENEME = 3
+LISTELEME_SAYFASI = 50
+
+# Her başlık kuyruk önekinin altında ayrı bir nesnedir; nesne adı eklenme zamanıyla başladığı
+# için sözlük sırası FIFO sırasıdır. Kiralanan başlık 'baslik_kuyrugu_kirada/' altına taşınır;
+# böylece kuyruk öneki yalnızca boştaki başlıkları içerir ve bir başlık almak, listenin ilk
+# nesnesini kiralamaktan ibarettir (kiradaki başlıklar tek tek atlanmaz). Kira bilgisi nesnenin
+# metadata'sında tutulur ve her değişiklik 'generation' + 'metageneration' ön koşuluyla yapılır
+# (aynı adla yeniden oluşturulan nesnenin metageneration'ı 1'den başladığı için ikisi birlikte);
+# aynı başlığı iki işçi aynı anda alamaz. Kirası dolan (işçisi çökmüş) başlıklar, kira süresinin üçte biri
+# aralıklarla (ve kuyruk boş göründüğünde) taranıp kuyruğa geri döndürülür.
+
+
+class BaslikKirasi:
+    """Bir işçinin kuyruktan aldığı başlık üzerindeki süreli kira."""
+
+    def __init__(self, kuyruk: "BaslikKuyrugu", blob, baslik: str, deneme: int):
+        self.kuyruk = kuyruk
+        self.blob = blob
+        self.baslik = baslik
+        self.deneme = deneme
+        self._kilit = threading.Lock()
+        self._durdur = threading.Event()
+        self._nabiz = threading.Thread(target=self._nabiz_dongusu, name="baslik-kirasi", daemon=True)
+        self._nabiz.start()
+
+    def _nabiz_dongusu(self):
+        """Kira süresinin üçte biri aralıklarla kirayı uzatır."""
+        aralik = max(1, self.kuyruk.kira_suresi // 3)
+        while not self._durdur.wait(aralik):
+            if not self.uzat():
+                return
+
+    def _nabzi_durdur(self):
+        """Nabız iş parçacığını durdurur ve süren bir uzatma varsa bitmesini bekler."""
+        self._durdur.set()
+        if self._nabiz is not threading.current_thread():
+            self._nabiz.join()
+
+    def _kira_bizde_mi(self) -> bool:
+        try:
+            self.blob.reload()
+        except google_exceptions.NotFound:
+            return False
+        metadata = self.blob.metadata or {}
+        return metadata.get("kiraci") == self.kuyruk.isci_adi and metadata.get("deneme") == str(self.deneme)
+
+    def _kosullu_yaz(self, islem):
+        """
+        'islem'i generation/metageneration ön koşuluyla çalıştırır. Ön koşul tutmazsa nesne yeniden okunur;
+        kira hâlâ bu işçideyse (yalnızca metageneration eskimişse) işlem bir kez daha denenir.
+        """
+        try:
+            islem()
+        except google_exceptions.PreconditionFailed:
+            if not self._kira_bizde_mi():
+                raise
+            islem()
+
+    def uzat(self) -> bool:
+        """Kiranın bitiş zamanını ileri alır. Kira başka bir işçiye geçtiyse False döner."""
+        with self._kilit:
+            try:
+                self.blob.metadata = {"kira_bitis": str(time.time() + self.kuyruk.kira_suresi)}
+                self.blob.patch(if_generation_match=self.blob.generation, if_metageneration_match=self.blob.metageneration)
+                return True
+            except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+                logging.error(f"❌ '{self.baslik}' başlığının kirası kaybedildi; başka bir işçi devralmış olabilir.")
+                self._durdur.set()
+                return False
+            except Exception as e:
+                logging.warning(f"⚠️ '{self.baslik}' başlığının kirası uzatılamadı, tekrar denenecek: {e}")
+                return True
+
+    def tamamla(self):
+        """Başarıyla işlenen başlığı kuyruktan kalıcı olarak siler."""
+        self._nabzi_durdur()
+        with self._kilit:
+            try:
+                self._kosullu_yaz(lambda: self.blob.delete(if_generation_match=self.blob.generation, if_metageneration_match=self.blob.metageneration))
+                logging.info(f"🏁 '{self.baslik}' başlığı kuyruktan silindi.")
+            except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+                logging.warning(f"⚠️ '{self.baslik}' başlığı silinemedi; kira bu sırada başka bir işçiye geçmiş.")
+
+    def birak(self):
+        """
+        Başarısız olan başlığın kirasını bırakır ve başlığı yeniden denenmek üzere kuyruğa döndürür.
+        MAKS_DENEME'ye ulaşan başlıklar 'baslik_kuyrugu_basarisiz/' altına taşınır.
+        """
+        self._nabzi_durdur()
+        with self._kilit:
+            try:
+                if self.deneme >= self.kuyruk.maks_deneme:
+                    self._kosullu_yaz(lambda: self.kuyruk._basarisizlara_tasi(self.blob))
+                    logging.error(f"🪦 '{self.baslik}' {self.deneme} denemede üretilemedi, başarısız başlıklara taşındı.")
+                    return
+
+                def kirayi_kaldir():
+                    self.blob.metadata = {"kiraci": None, "kira_bitis": None}
+                    self.blob.patch(if_generation_match=self.blob.generation, if_metageneration_match=self.blob.metageneration)
+                self._kosullu_yaz(kirayi_kaldir)
+                self.kuyruk._kuyruga_dondur(self.blob)
+                logging.info(f"↩️ '{self.baslik}' başlığı tekrar denenmek üzere kuyruğa bırakıldı ({self.deneme}/{self.kuyruk.maks_deneme}).")
+            except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+                logging.warning(f"⚠️ '{self.baslik}' başlığının kirası zaten başka bir işçiye geçmiş.")
+
+
+class BaslikKuyrugu:
+    """GCS üzerinde, her başlığın ayrı bir nesne olduğu kiralama tabanlı iş kuyruğu."""
+
+    def __init__(self, storage_client, bucket_name: str, isci_adi: Optional[str] = None,
+                 kira_suresi: int = KIRA_SURESI_SANIYE, maks_deneme: int = MAKS_DENEME):
+        self.bucket = storage_client.bucket(bucket_name)
+        self.isci_adi = isci_adi or f"{socket.gethostname()}-{os.getpid()}"
+        self.kira_suresi = kira_suresi
+        self.maks_deneme = maks_deneme
+        self._son_kira_taramasi = 0.0
+
+    def ekle(self, basliklar: Iterable[str]) -> int:
+        """Başlıkları verildikleri sırayla kuyruğun sonuna ekler."""
+        zaman_damgasi = time.time_ns() // 1000
+        parti = uuid.uuid4().hex[:8]
+        eklenen = 0
+        for sira, baslik in enumerate(b.strip() for b in basliklar):
+            if not baslik:
+                continue
+            blob = self.bucket.blob(f"{KUYRUK_ONEKI}{zaman_damgasi:020d}-{sira:06d}-{parti}.txt")
+            blob.upload_from_string(baslik, content_type="text/plain; charset=utf-8", if_generation_match=0)
+            eklenen += 1
+        return eklenen
+
+    def eski_listeyi_aktar(self) -> int:
+        """
+        Eski 'creator_blueprint_titles.txt' dosyası yüklendiyse satırlarını kuyruğa aktarır ve dosyayı siler.
+        Her başlık alımında değil, işçi başlarken ve kuyruk boş kaldığında çağrılır.
+        Nesne adları dosyanın generation değerinden türetilir ve yalnızca yoksa oluşturulur;
+        böylece aynı dosyayı aynı anda aktaran iki işçi kopya başlık üretmez.
+        """
+        liste_blobu = self.bucket.get_blob(ESKI_LISTE_BLOBU)
+        if liste_blobu is None:
+            return 0
+        generation = liste_blobu.generation
+        try:
+            satirlar = liste_blobu.download_as_text(encoding="utf-8", if_generation_match=generation).strip().splitlines()
+        except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+            return 0
+
+        aktarilan = 0
+        for sira, baslik in enumerate(s.strip() for s in satirlar):
+            if not baslik:
+                continue
+            blob = self.bucket.blob(f"{KUYRUK_ONEKI}{generation:020d}-{sira:06d}-liste.txt")
+            try:
+                blob.upload_from_string(baslik, content_type="text/plain; charset=utf-8", if_generation_match=0)
+                aktarilan += 1
+            except google_exceptions.PreconditionFailed:
+                pass
+        try:
+            liste_blobu.delete(if_generation_match=generation)
+        except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+            pass
+        if aktarilan:
+            logging.info(f"📥 '{ESKI_LISTE_BLOBU}' dosyasından {aktarilan} başlık kuyruğa aktarıldı.")
+        return aktarilan
+
+    def al(self) -> Optional[BaslikKirasi]:
+        """
+        Kuyruğun başındaki başlığı kiralar; başka bir işçi bizden önce aldıysa sıradakini dener.
+        Kuyruk boşsa None döner.
+        """
+        if time.time() - self._son_kira_taramasi >= max(1, self.kira_suresi // 3):
+            self.suresi_dolan_kiralari_geri_al()
+        for _ in range(2):
+            for blob in self.bucket.list_blobs(prefix=KUYRUK_ONEKI, max_results=LISTELEME_SAYFASI):
+                kira = self._kirala(blob)
+                if kira:
+                    return kira
+            # Kuyruk boş göründüğünde, kirası dolan başlıklar beklemeden geri alınıp bir kez daha bakılır.
+            if not self.suresi_dolan_kiralari_geri_al():
+                break
+        return None
+
+    def _kirala(self, blob) -> Optional[BaslikKirasi]:
+        """
+        Başlığı kira metadata'sıyla işaretler, 'kirada' önekine kopyalar ve kuyruktaki nesneyi siler.
+        İşaretleme ön koşullu olduğundan yarışı tek bir işçi kazanır.
+        """
+        simdi = time.time()
+        metadata = blob.metadata or {}
+        if metadata.get("kiraci") and float(metadata.get("kira_bitis") or 0) > simdi:
+            return None  # Başka bir işçi şu anda bu başlığı taşıyor
+        deneme = int(metadata.get("deneme", 0)) + 1
+        blob.metadata = {"kiraci": self.isci_adi, "kira_bitis": str(simdi + self.kira_suresi), "deneme": str(deneme)}
+        try:
+            blob.patch(if_generation_match=blob.generation, if_metageneration_match=blob.metageneration)
+        except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+            return None  # Başka bir işçi bizden önce aldı
+        try:
+            kiralik = self.bucket.copy_blob(blob, self.bucket, KIRADA_ONEKI + self._goreli_ad(blob), if_generation_match=0)
+        except google_exceptions.PreconditionFailed:
+            # Kiradaki kopya zaten var: önceki bir işçi kopyaladıktan sonra kaynağı silemeden çökmüş.
+            self._sessizce_sil(blob)
+            return None
+        except google_exceptions.NotFound:
+            return None
+        self._sessizce_sil(blob)
+        try:
+            baslik = kiralik.download_as_text(encoding="utf-8").strip()
+        except google_exceptions.NotFound:
+            return None
+        logging.info(f"🔹 '{baslik}' başlığı kiralandı (deneme {deneme}/{self.maks_deneme}).")
+        return BaslikKirasi(self, kiralik, baslik, deneme)
+
+    def suresi_dolan_kiralari_geri_al(self) -> int:
+        """Kirası dolan (veya bırakılıp kuyruğa dönemeden kalan) başlıkları kuyruğa geri döndürür."""
+        self._son_kira_taramasi = simdi = time.time()
+        geri_alinan = 0
+        for blob in self.bucket.list_blobs(prefix=KIRADA_ONEKI):
+            metadata = blob.metadata or {}
+            if metadata.get("kiraci") and float(metadata.get("kira_bitis") or 0) > simdi:
+                continue
+            deneme = int(metadata.get("deneme", 0))
+            try:
+                if deneme >= self.maks_deneme:
+                    self._basarisizlara_tasi(blob)
+                    logging.error(f"🪦 {blob.name} {deneme} denemede tamamlanamadı, başarısız başlıklara taşındı.")
+                    continue
+                if metadata.get("kiraci"):
+                    logging.warning(f"⏰ {blob.name} üzerindeki '{metadata['kiraci']}' kirası dolmuş; başlık yeniden kuyruğa alınıyor.")
+                    # Önce kira ön koşullu olarak kaldırılır; kirayı tam bu sırada uzatan işçi varsa yarışı o kazanır.
+                    blob.metadata = {"kiraci": None, "kira_bitis": None}
+                    blob.patch(if_generation_match=blob.generation, if_metageneration_match=blob.metageneration)
+                self._kuyruga_dondur(blob)
+                geri_alinan += 1
+            except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+                pass
+        return geri_alinan
+
+    @staticmethod
+    def _goreli_ad(blob) -> str:
+        return blob.name.split("/", 1)[1]
+
+    @staticmethod
+    def _sessizce_sil(blob):
+        try:
+            blob.delete(if_generation_match=blob.generation)
+        except (google_exceptions.PreconditionFailed, google_exceptions.NotFound):
+            pass
+
+    def _kuyruga_dondur(self, blob):
+        """Kirası kaldırılmış başlığı özgün adıyla (sırasını koruyarak) kuyruğa kopyalar ve kiradaki nesneyi siler."""
+        try:
+            self.bucket.copy_blob(blob, self.bucket, KUYRUK_ONEKI + self._goreli_ad(blob), if_generation_match=0)
+        except google_exceptions.PreconditionFailed:
+            pass  # Kuyrukta zaten var
+        blob.delete(if_generation_match=blob.generation, if_metageneration_match=blob.metageneration)
+
+    def _basarisizlara_tasi(self, blob):
+        hedef_adi = BASARISIZ_ONEKI + self._goreli_ad(blob)
+        self.bucket.copy_blob(blob, self.bucket, hedef_adi)
+        blob.delete(if_generation_match=blob.generation, if_metageneration_match=blob.metageneration)
@@ -0,0 +1,162 @@
+# ffmpegmotoru.py (v1 - Doğrudan ffmpeg Filtre Grafiği ile Render)
+
+# Videoyu tek bir ffmpeg komutuyla üretir: arka plan döngüye alınıp ölçeklenir, önceden
+# düzleştirilmiş statik katman (PNG) üstüne bindirilir, altyazılar ASS olarak yakılır ve ses
+# eklenir. Kareler Python'a hiç gelmez; kod çözme, filtreler ve x264 ffmpeg içinde çok iş parçacıklı çalışır.
+
+import os
+import json
+import logging
+import subprocess
+
+FFMPEG = os.environ.get("FFMPEG_YOLU", "ffmpeg")
+FFPROBE = os.environ.get("FFPROBE_YOLU", "ffprobe")
+
+
+def ffprobe(yol):
+    """Dosyanın akış ve biçim bilgilerini döndürür."""
+    komut = [FFPROBE, "-v", "error", "-show_streams", "-show_format", "-of", "json", yol]
+    sonuc = subprocess.run(komut, check=True, capture_output=True, text=True)
+    return json.loads(sonuc.stdout)
+
+def sure_al(yol):
+    """Medya dosyasının süresi (saniye)."""
+    return float(ffprobe(yol)["format"]["duration"])
+
+def kare_sayisi_al(yol):
+    """İlk video akışındaki kare sayısı; kapsayıcı üst verisi yerine paketler sayılır."""
+    komut = [FFPROBE, "-v", "error", "-select_streams", "v:0", "-count_packets",
+             "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", yol]
+    sonuc = subprocess.run(komut, check=True, capture_output=True, text=True)
+    return int(sonuc.stdout.strip())
+
+def video_boyutu_al(yol):
+    """İlk video akışının (genişlik, yükseklik) değeri; döndürme (rotate) etiketi hesaba katılır."""
+    akis = next(s for s in ffprobe(yol)["streams"] if s.get("codec_type") == "video")
+    genislik, yukseklik = int(akis["width"]), int(akis["height"])
+    donus = akis.get("tags", {}).get("rotate") or next(
+        (str(v.get("rotation", "")) for v in akis.get("side_data_list", []) if "rotation" in v), "")
+    if donus.lstrip("-") in ("90", "270"):
+        genislik, yukseklik = yukseklik, genislik
+    return genislik, yukseklik
+
+def filtre_yolu(yol):
+    """Dosya yolunu filtre grafiğinde seçenek değeri olarak kullanılacak şekilde iki düzeyde kaçışlar."""
+    for karakter in "\\:'":
+        yol = yol.replace(karakter, "\\" + karakter)
+    for karakter in "\\'[],;":
+        yol = yol.replace(karakter, "\\" + karakter)
+    return yol
+
+
+# --- ASS ALTYAZI ---
+
+def _ass_zaman(saniye):
+    santisaniye = int(round(saniye * 100))
+    saat, kalan = divmod(santisaniye, 360000)
+    dakika, kalan = divmod(kalan, 6000)
+    sn, cs = divmod(kalan, 100)
+    return f"{saat}:{dakika:02d}:{sn:02d}.{cs:02d}"
+
+def ass_yaz(altyazilar, yol, video_genislik, video_yukseklik, font_adi, font_boyutu, kalin, altyazi_x, altyazi_y,
+            video_suresi, satirlara_bol):
+    """
+    Altyazıları, Pillow atlasıyla aynı yerleşimde (üste hizalı, yatayda ortalı, sol/sağ kenar
+    boşluğu altyazi_x) beyaz, kenarlıksız metin olarak ASS dosyasına yazar.
+    'font_boyutu' libass ölçeğindedir (ascent + descent piksel).
+    'satirlara_bol' (metin -> satır listesi) atlasın satır bölücüsüdür; satırlar \\N ile önceden kırılır ve
+    libass'in dengeli kaydırması kapatılır (WrapStyle 2), böylece iki motor satırları aynı kelimelerden böler.
+    """
+    baslik = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {video_genislik}",
+        f"PlayResY: {video_yukseklik}",
+        "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Altyazi,{font_adi},{font_boyutu},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,{-1 if kalin else 0},0,0,0,100,100,0,0,1,0,0,8,"
+        f"{altyazi_x},{altyazi_x},{altyazi_y},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    satirlar = []
+    for altyazi in altyazilar:
+        if altyazi['baslangic'] >= video_suresi or not altyazi['metin'].strip():
+            continue
+        bitis = min(altyazi['bitis'], video_suresi)
+        metin = "\\N".join(satirlara_bol(altyazi['metin'].upper())).replace("{", "(").replace("}", ")")
+        satirlar.append(f"Dialogue: 0,{_ass_zaman(altyazi['baslangic'])},{_ass_zaman(bitis)},Altyazi,,0,0,0,,{metin}")
+    with open(yol, "w", encoding="utf-8") as f:
+        f.write("\n".join(baslik + satirlar) + "\n")
+    return yol
+
+
+# --- RENDER ---
+
+def render(bg_video_path, audio_path, overlay_png, ass_path, fonts_dir, output_path,
+           video_genislik, video_yukseklik, video_suresi, fps, kodlayici_argumanlari, threads=0):
+    """
+    Tek filtre grafiğiyle render eder:
+    [arka plan, sonsuz döngü] -> scale -> overlay(statik PNG) -> subtitles(ASS) ; [ses] -> apad ; -t video_suresi
+    """
+    filtre = (
+        f"[0:v]scale={video_genislik}:{video_yukseklik},setsar=1,fps={fps}[bg];"
+        f"[bg][1:v]overlay=0:0:format=auto[kaplanmis];"
+        f"[kaplanmis]subtitles=filename={filtre_yolu(ass_path)}:fontsdir={filtre_yolu(fonts_dir)},format=yuv420p[v];"
+        f"[2:a]apad[a]"
+    )
+    komut = [
+        FFMPEG, "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+        "-stream_loop", "-1", "-i", bg_video_path,
+        "-loop", "1", "-framerate", str(fps), "-i", overlay_png,
+        "-i", audio_path,
+        "-filter_complex", filtre,
+        "-map", "[v]", "-map", "[a]",
+        "-t", f"{video_suresi:.3f}",
+        *kodlayici_argumanlari,
+        "-threads", str(threads),
+        "-movflags", "+faststart",
+        output_path,
+    ]
+    logging.info(f"🎞️ ffmpeg filtre grafiği ile render başlatılıyor ({video_genislik}x{video_yukseklik}, {video_suresi:.1f}s).")
+    sonuc = subprocess.run(komut, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if sonuc.returncode != 0:
+        hata_ozeti = "\n".join(sonuc.stderr.strip().splitlines()[-15:])
+        logging.error(f"❌ ffmpeg render hatası (kod {sonuc.returncode}):\n{hata_ozeti}")
+        raise RuntimeError(f"ffmpeg render başarısız oldu (kod {sonuc.returncode}).")
+    return output_path
+
+def birlestir(segment_yollari, audio_path, output_path, video_suresi, ses_argumanlari):
+    """
+    Aynı ayarlarla kodlanmış video segmentlerini concat demuxer ile yeniden kodlamadan (-c:v copy)
+    uç uca ekler; sesi video süresine kadar sessizlikle uzatarak kodlar.
+    """
+    liste_yolu = output_path + ".segmentler.txt"
+    with open(liste_yolu, "w", encoding="utf-8") as f:
+        for yol in segment_yollari:
+            f.write("file '" + os.path.abspath(yol).replace("'", "'\\''") + "'\n")
+    komut = [
+        FFMPEG, "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+        "-f", "concat", "-safe", "0", "-i", liste_yolu,
+        "-i", audio_path,
+        "-map", "0:v", "-map", "1:a",
+        "-c:v", "copy", "-af", "apad", *ses_argumanlari,
+        "-t", f"{video_suresi:.3f}",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+    try:
+        sonuc = subprocess.run(komut, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    finally:
+        os.remove(liste_yolu)
+    if sonuc.returncode != 0:
+        hata_ozeti = "\n".join(sonuc.stderr.strip().splitlines()[-15:])
+        logging.error(f"❌ ffmpeg segment birleştirme hatası (kod {sonuc.returncode}):\n{hata_ozeti}")
+        raise RuntimeError(f"ffmpeg segment birleştirme başarısız oldu (kod {sonuc.returncode}).")
+    logging.info(f"🔗 {len(segment_yollari)} segment birleştirildi: {output_path}")
+    return output_path
@@ -0,0 +1,97 @@
+# geminiistemcisi.py (v1 - Anahtar Planlayıcılı Gemini İstemcisi)
+
+import time
+import logging
+import threading
+from typing import Callable, List, Optional
+
+import google.ai.generativelanguage as glm
+from google.generativeai.types import generation_types
+from google.api_core import exceptions as google_exceptions
+
+import anahtaryoneticisi
+import olcumleme
+import yanitonbellegi
+
+# Her anahtar için kendi anahtarıyla yapılandırılmış bir GenerativeServiceClient önbelleğe alınır.
+# Süreç genelindeki genai.configure kullanılmaz; paralel çağrılar birbirinin anahtarını ezmez.
+_istemciler = {}
+_istemci_kilidi = threading.Lock()
+
+
+def _istemci_al(api_key: str) -> glm.GenerativeServiceClient:
+    with _istemci_kilidi:
+        istemci = _istemciler.get(api_key)
+        if istemci is None:
+            istemci = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+            _istemciler[api_key] = istemci
+        return istemci
+
+def _istek_olustur(prompt: str, model_name: str, generation_config: dict) -> glm.GenerateContentRequest:
+    if "/" not in model_name:
+        model_name = f"models/{model_name}"
+    return glm.GenerateContentRequest(
+        model=model_name,
+        contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+        generation_config=glm.GenerationConfig(**generation_config),
+    )
+
+def _icerik_uret(api_key: str, prompt: str, model_name: str, generation_config: dict):
+    """İsteği doğrudan anahtarın istemcisine gönderir; yanıt GenerativeModel'inkiyle aynı türdedir (.text vb.)."""
+    istek = _istek_olustur(prompt, model_name, generation_config)
+    return generation_types.GenerateContentResponse.from_response(_istemci_al(api_key).generate_content(istek))
+
+def generate(prompt: str, model_name: str, generation_config: dict, api_keys: List[str]):
+    """
+    İsteği, modelin anahtar planlayıcısının seçtiği anahtarla gönderir.
+    Kota hatasında anahtar bekleme süresine alınır ve istek başka bir anahtarla (gerekirse
+    bekleme bitince aynı anahtarla) tekrarlanır; yetki hatası alan anahtar bu istek için bir daha denenmez.
+    Yanıtı döndürür; uygun anahtar kalmazsa None döner. Anahtarla ilgisi olmayan hatalar çağırana iletilir.
+    """
+    planlayici = anahtaryoneticisi.get_scheduler(model_name)
+    reddedilenler = set()
+    for _ in range(3 * len(api_keys)):
+        api_key = planlayici.acquire(api_keys, exclude=reddedilenler)
+        if api_key is None:
+            break
+        etiket = anahtaryoneticisi.key_label(api_key)
+        request_start = time.perf_counter()
+        basarili = False
+        try:
+            response = _icerik_uret(api_key, prompt, model_name, generation_config)
+            anahtaryoneticisi.record_success(api_key, time.perf_counter() - request_start, scope=model_name)
+            basarili = True
+            return response
+        except google_exceptions.ResourceExhausted:
+            anahtaryoneticisi.record_failure(api_key, "kota", scope=model_name)
+            logging.warning(f"⚠️ API anahtarı {etiket} kotaya takıldı. Başka bir anahtar denenecek...")
+        except google_exceptions.PermissionDenied:
+            anahtaryoneticisi.record_failure(api_key, "yetki", scope=model_name)
+            reddedilenler.add(api_key)
+            logging.warning(f"⚠️ API anahtarı {etiket} için izin reddedildi. Başka bir anahtar denenecek...")
+        finally:
+            planlayici.release(api_key)
+            olcumleme.api_cagrisi(f"gemini:{model_name}", time.perf_counter() - request_start, basarili)
+
+    logging.error("Tüm API anahtarları denendi ve hiçbiri başarılı olamadı.")
+    return None
+
+def generate_cached(prompt: str, model_name: str, generation_config: dict, api_keys: List[str],
+                    validate: Optional[Callable[[str], bool]] = None):
+    """
+    generate() ile aynıdır, ancak önce yanıt önbelleğine bakar. Yeni yanıt yalnızca metni boş değilse
+    ve 'validate' (verildiyse) onu kabul ederse önbelleğe yazılır; geçersiz yanıtlar tekrar denemelerde yeniden üretilir.
+    """
+    cached = yanitonbellegi.al(model_name, generation_config, prompt)
+    if cached is not None and (validate is None or validate(cached.text)):
+        return cached
+
+    response = generate(prompt, model_name, generation_config, api_keys)
+    try:
+        text = response.text if response is not None else None
+    except ValueError:
+        # Güvenlik filtresine takılan yanıtlarda .text erişimi hata verir; önbelleğe yazılmaz.
+        text = None
+    if text and (validate is None or validate(text)):
+        yanitonbellegi.kaydet(model_name, generation_config, prompt, text)
+    return response
@@ -8,10 +8,16 @@ import wave
 import base64
 import whisper
 import re
-import struct
 import logging
-from google.cloud import secretmanager
-from google.api_core import exceptions as google_exceptions
+import threading
+import contextvars
+import numpy as np
+import subprocess
+import olcumleme
+import sesefektleri
+import ffmpegmotoru
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import anahtaryoneticisi
 
 # --- TEMEL AYARLAR ---
 logging.basicConfig(
@@ -27,58 +33,54 @@ MAX_SENTENCE_BYTES = 700
 MAX_RECURSION_DEPTH = 3
 MAX_RETRIES = 4
 INITIAL_BACKOFF_SECONDS = 2
+CHUNK_SILENCE_SECONDS = 0.4
+TTS_ANAHTAR_KAPSAMI = "tts"  # Anahtar sağlık kaydında TTS çağrılarının kapsamı (Gemini modelleri ayrı tutulur)
+TTS_ESZAMANLI_ISTEK = int(os.environ.get("TTS_ESZAMANLI_ISTEK", "4"))  # Aynı anda uçuşta olan en fazla TTS isteği
+# Boş bırakılırsa ses seviyesine dokunulmaz; örn. "-18" verilirse konuşma RMS'i bu dBFS'e getirilir.
+SES_RMS_HEDEF_DBFS = os.environ.get("SES_RMS_HEDEF_DBFS")
+# Yüklenen ses dosyasının biçimi: "flac" (kayıpsız arşiv), "opus" / "aac" (dağıtım) veya "wav" (ham PCM).
+# Render her durumda yerel WAV'ı kullanır; teslim dosyası bellekteki PCM tamponundan doğrudan kodlanır.
+SES_TESLIM_BICIMI = os.environ.get("SES_TESLIM_BICIMI", "flac").lower()
+SES_TESLIM_BICIMLERI = {
+    "flac": ("ses.flac", ["-c:a", "flac", "-compression_level", "8"]),
+    "opus": ("ses.opus", ["-c:a", "libopus", "-b:a", "64k"]),
+    "aac": ("ses.m4a", ["-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart"]),
+}
+WHISPER_MODEL_ADI = os.environ.get("WHISPER_MODEL", "base.en")
+WHISPER_THREAD_SAYISI = int(os.environ.get("WHISPER_THREADS", "0"))  # 0 = torch varsayılanı
+# Altyazı modu: "hizalama" = SRT, TTS'e gönderilen metin ve parçaların ses içindeki konumlarından
+# üretilir (Whisper yalnızca yedek olarak çalışır); "whisper" = her zaman Whisper ile deşifre edilir.
+ALTYAZI_MODU = os.environ.get("ALTYAZI_MODU", "hizalama")
+ALTYAZI_MAKS_KELIME = 14
+SESSIZLIK_MIN_SURE = 0.12
+SESSIZLIK_ESIK_ORANI = 0.04
+SESSIZLIK_ESLEME_TOLERANSI = 0.8
+
+# --- WHISPER MODEL ÖNBELLEĞİ ---
+# Model her video için yeniden yüklenmez; süreç boyunca bir kez yüklenip tekrar kullanılır.
+_whisper_modelleri = {}
+_whisper_kilidi = threading.Lock()
+WHISPER_METRIKLERI = {"yukleme_sayisi": 0, "yukleme_suresi": 0.0, "desifre_sayisi": 0, "desifre_suresi": 0.0}
 
 
 def load_api_keys_from_secret_manager(project_id: str) -> list:
-    """API anahtarlarını Secret Manager'dan yükler."""
-    try:
-        logging.info("🔑 Secret Manager'dan Google Cloud API anahtarları okunuyor...")
-        client = secretmanager.SecretManagerServiceClient()
-        # Bu modül Text-to-Speech API'sini kullandığı için,
-        # bu gizli kasanın ilgili API için geçerli anahtarlar içerdiğini varsayıyoruz.
-        name = f"projects/{project_id}/secrets/gemini-api-anahtarlari/versions/latest"
-        response = client.access_secret_version(request={"name": name})
-        payload = response.payload.data.decode("UTF-8")
-        api_keys = [line.strip() for line in payload.splitlines() if line.strip()]
-        if not api_keys:
-            logging.error("❌ Secret Manager'da 'gemini-api-anahtarlari' içinde anahtar bulunamadı.")
-            return []
-        logging.info(f"✅ Başarıyla {len(api_keys)} adet API anahtarı Secret Manager'dan alındı.")
-        return api_keys
-    except google_exceptions.NotFound:
-        logging.critical(f"❌ Secret Manager'da 'gemini-api-anahtarlari' secret'ı bulunamadı (Proje: {project_id}).")
-        raise
-    except Exception as e:
-        logging.critical(f"❌ Secret Manager'dan anahtar okunurken kritik hata: {e}")
-        raise
+    """API anahtarlarını paylaşılan anahtar servisinden (Secret Manager önbelleği) alır."""
+    # Bu modül Text-to-Speech API'sini kullandığı için,
+    # bu gizli kasanın ilgili API için geçerli anahtarlar içerdiğini varsayıyoruz.
+    return anahtaryoneticisi.get_api_keys(project_id)
 
 def apply_fade_out(audio_data, fade_duration_ms=500):
     """
     Ses verisinin sonuna yumuşak bir bitiş (linear fade-out) uygular.
+    'audio_data' yazılabilir bir tampon (bytearray/memoryview) ise efekt yerinde uygulanır ve aynı nesne döner.
     """
     try:
         logging.info(f"🌬️ Sona doğal bir bitiş için {fade_duration_ms}ms'lik 'fade-out' efekti uygulanıyor...")
-        sample_width = 2
-        fade_samples = int(SAMPLE_RATE * (fade_duration_ms / 1000.0))
-        total_samples = len(audio_data) // sample_width
-        fade_samples = min(fade_samples, total_samples)
-
-        if fade_samples == 0:
+        if isinstance(audio_data, bytes):
+            audio_data = bytearray(audio_data)
+        if not sesefektleri.fade_out(audio_data, fade_duration_ms, SAMPLE_RATE):
             logging.warning("Fade-out uygulanamayacak kadar kısa ses, atlanıyor.")
-            return audio_data
-
-        main_part = audio_data[:-fade_samples * sample_width]
-        fade_part = audio_data[-fade_samples * sample_width:]
-        faded_audio = bytearray()
-
-        for i in range(fade_samples):
-            multiplier = 1.0 - (i / fade_samples)
-            sample_bytes = fade_part[i * sample_width : (i + 1) * sample_width]
-            original_sample = struct.unpack('<h', sample_bytes)[0]
-            faded_sample = int(original_sample * multiplier)
-            faded_audio.extend(struct.pack('<h', faded_sample))
-
-        return main_part + faded_audio
+        return audio_data
     except Exception as e:
         logging.error(f"⚠️ Fade-out uygulanamadı: {e}. Ses orjinal haliyle bırakılıyor.")
         return audio_data
@@ -104,48 +106,83 @@ def extract_target_sections(text):
         return text.strip()
 
 
-def fix_long_sentences(text):
-    """API limitini aşabilecek çok uzun cümleleri, anlamı bozmayacak şekilde noktalama işaretlerinden böler."""
-    logging.info("🔧 Uzun cümleler kontrol ediliyor ve düzeltiliyor...")
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    fixed_sentences = []
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-            
-        if len(sentence.encode('utf-8')) <= MAX_SENTENCE_BYTES:
-            fixed_sentences.append(sentence)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+# Ardından yeni bir cümle başlamış sınır: cümle sonundaki boşluk dizisi artık uzayamaz, cümle kesinleşmiştir.
+CLOSED_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=\S)')
+
+def split_long_sentence(sentence):
+    """API limitini aşabilecek tek bir cümleyi noktalama işaretlerinden böler; cümle parçalarının listesini döndürür."""
+    sentence = sentence.strip()
+    if not sentence:
+        return []
+    if len(sentence.encode('utf-8')) <= MAX_SENTENCE_BYTES:
+        return [sentence]
+
+    logging.warning(f"Uzun cümle bulundu ({len(sentence.encode('utf-8'))} byte), bölünüyor...")
+    parts = re.split(r'(,\s*|\s+and\s+|\s+but\s+|\s+or\s+|;\s+|:\s+)', sentence)
+    new_sentence_parts = []
+    current_part = ""
+    for i in range(0, len(parts), 2):
+        part = parts[i]
+        delimiter = parts[i+1] if i+1 < len(parts) else ""
+        if len((current_part + part + delimiter).encode('utf-8')) > MAX_SENTENCE_BYTES and current_part:
+            new_sentence_parts.append(current_part.strip())
+            current_part = part + delimiter
         else:
-            logging.warning(f"Uzun cümle bulundu ({len(sentence.encode('utf-8'))} byte), bölünüyor...")
-            parts = re.split(r'(,\s*|\s+and\s+|\s+but\s+|\s+or\s+|;\s+|:\s+)', sentence)
-            new_sentence_parts = []
-            current_part = ""
-            for i in range(0, len(parts), 2):
-                part = parts[i]
-                delimiter = parts[i+1] if i+1 < len(parts) else ""
-                if len((current_part + part + delimiter).encode('utf-8')) > MAX_SENTENCE_BYTES and current_part:
-                    new_sentence_parts.append(current_part.strip())
-                    current_part = part + delimiter
-                else:
-                    current_part += part + delimiter
-            if current_part:
-                new_sentence_parts.append(current_part.strip())
-            fixed_sentences.extend(new_sentence_parts)
-    
-    result = ' '.join(fixed_sentences)
-    logging.info("✅ Uzun cümle düzeltme işlemi tamamlandı.")
-    return result
+            current_part += part + delimiter
+    if current_part:
+        new_sentence_parts.append(current_part.strip())
+    return new_sentence_parts
 
-def smart_text_splitter(text, max_length=API_CHUNK_SIZE):
-    """Metni, cümle ve paragraf sonlarını dikkate alarak API limitlerine uygun parçalara böler."""
-    logging.info("🧠 Metin, API için akıllı parçalara ayrılıyor...")
-    text = fix_long_sentences(text)
-    chunks = []
-    remaining_text = text
-    
-    while len(remaining_text.encode('utf-8')) > max_length:
+class TextChunker:
+    """
+    smart_text_splitter'ın artımlı hâli: metin parça parça verilir, kesinleşen API parçaları hemen döndürülür.
+    Metin tek seferde ya da bölüm bölüm verilse de aynı parçalar üretilir; parçalar bölüm sınırlarını aşabilir.
+    Uzunluklar UTF-8 bayt olarak ölçülür (API sınırı bayt cinsindendir). Bir cümle ancak ardından yeni bir
+    cümle başladığında, bir parça ise biriken metin max_length baytı aştığında kesinleşir; bölme noktası
+    yalnızca ilk max_length bayta sığan karakterlerde aranır, dolayısıyla sonradan gelen metin onu değiştirmez.
+    """
+
+    def __init__(self, max_length=API_CHUNK_SIZE):
+        self.max_length = max_length
+        self.pending = ""    # Henüz bitip bitmediği bilinmeyen cümle(ler)
+        self.remaining = ""  # Cümleleri düzeltilmiş, henüz parçalara ayrılmamış metin
+
+    def feed(self, text):
+        """Metni ekler ve kesinleşen parçaları döndürür."""
+        self.pending += text
+        last_boundary = None
+        for last_boundary in CLOSED_SENTENCE_BOUNDARY.finditer(self.pending):
+            pass
+        if last_boundary is None:
+            return []
+        self._add_sentences(self.pending[:last_boundary.start()])
+        self.pending = self.pending[last_boundary.end():]
+        chunks = []
+        while len(self.remaining.encode('utf-8')) > self.max_length:
+            self._take_chunk(chunks)
+        return chunks
+
+    def close(self):
+        """Metnin sonunu bildirir ve kalan tüm parçaları döndürür."""
+        self._add_sentences(self.pending)
+        self.pending = ""
+        chunks = []
+        while len(self.remaining.encode('utf-8')) > self.max_length:
+            self._take_chunk(chunks)
+        if self.remaining:
+            chunks.append(self.remaining)
+        self.remaining = ""
+        return chunks
+
+    def _add_sentences(self, text):
+        for part in (part for sentence in SENTENCE_BOUNDARY.split(text) for part in split_long_sentence(sentence)):
+            self.remaining = f"{self.remaining} {part}".lstrip()
+
+    def _take_chunk(self, chunks):
+        remaining_text = self.remaining
+        # Bölme penceresi: UTF-8 karşılığı max_length bayta sığan en uzun karakter öneki.
+        max_length = len(remaining_text.encode('utf-8')[:self.max_length].decode('utf-8', 'ignore'))
         split_pos = -1
         possible_split = remaining_text.rfind('\n', 0, max_length)
         if possible_split != -1:
@@ -164,35 +201,16 @@ def smart_text_splitter(text, max_length=API_CHUNK_SIZE):
         chunk = remaining_text[:split_pos].strip()
         if chunk:
             chunks.append(chunk)
-        remaining_text = remaining_text[split_pos:].strip()
-    
-    if remaining_text:
-        chunks.append(remaining_text)
-    
+        self.remaining = remaining_text[split_pos:].strip()
+
+def smart_text_splitter(text, max_length=API_CHUNK_SIZE):
+    """Metni, cümle ve paragraf sonlarını dikkate alarak API limitlerine uygun parçalara böler."""
+    logging.info("🧠 Metin, API için akıllı parçalara ayrılıyor...")
+    chunker = TextChunker(max_length)
+    chunks = chunker.feed(text) + chunker.close()
     logging.info(f"✅ Metin {len(chunks)} parçaya güvenli şekilde bölündü.")
     return chunks
 
-def test_api_key(api_key, key_number):
-    """Verilen Google Cloud API anahtarının geçerli olup olmadığını test eder."""
-    try:
-        logging.info(f"🔍 API anahtarı #{key_number} test ediliyor...")
-        if not api_key or len(api_key) < 30:
-            logging.error(f"❌ API anahtarı #{key_number} geçersiz formatta (çok kısa).")
-            return False
-        
-        test_url = f"https://texttospeech.googleapis.com/v1/voices?key={api_key}"
-        response = requests.get(test_url, timeout=10)
-        
-        if response.status_code == 200:
-            logging.info(f"✅ API anahtarı #{key_number} geçerli.")
-            return True
-        else:
-            logging.error(f"❌ API anahtarı #{key_number} geçersiz. Durum Kodu: {response.status_code}, Mesaj: {response.text}")
-            return False
-    except requests.exceptions.RequestException as e:
-        logging.error(f"❌ API anahtarı #{key_number} test edilirken ağ hatası: {e}")
-        return False
-
 def process_single_chunk(chunk, api_key, chunk_id, recursion_depth=0):
     """
     Tek bir metin parçasını seslendirir ve hatalara karşı dayanıklıdır.
@@ -212,7 +230,11 @@ def process_single_chunk(chunk, api_key, chunk_id, recursion_depth=0):
     for attempt in range(MAX_RETRIES):
         try:
             logging.info(f"➡️ Parça {chunk_id} işleniyor ({len(chunk.encode('utf-8'))} byte), deneme #{attempt + 1}...")
+            request_start = time.perf_counter()
             response = requests.post(url, json=data, timeout=90)
+            request_seconds = time.perf_counter() - request_start
+            anahtaryoneticisi.record_http_result(api_key, response.status_code, request_seconds, scope=TTS_ANAHTAR_KAPSAMI)
+            olcumleme.api_cagrisi("tts", request_seconds, response.status_code == 200)
             
             if response.status_code == 200:
                 result = response.json()
@@ -244,7 +266,7 @@ def process_single_chunk(chunk, api_key, chunk_id, recursion_depth=0):
                     smaller_chunks = smart_text_splitter(chunk, max_length=len(chunk.encode('utf-8')) // 2)
                     if len(smaller_chunks) <= 1: return None
                     
-                    combined_audio = b''
+                    combined_audio = bytearray()
                     for i, small_chunk in enumerate(smaller_chunks):
                         small_audio = process_single_chunk(small_chunk, api_key, f"{chunk_id}.{i+1}", recursion_depth + 1)
                         if small_audio: combined_audio += small_audio
@@ -254,6 +276,8 @@ def process_single_chunk(chunk, api_key, chunk_id, recursion_depth=0):
                 return None
 
         except requests.exceptions.RequestException as e:
+            anahtaryoneticisi.record_failure(api_key, "gecici", scope=TTS_ANAHTAR_KAPSAMI)
+            olcumleme.api_cagrisi("tts", time.perf_counter() - request_start, False)
             logging.warning(f"⚠️ Parça {chunk_id} işlenirken ağ hatası: {e}. {backoff_time}s sonra tekrar denenecek.")
             time.sleep(backoff_time)
             backoff_time *= 2
@@ -261,45 +285,176 @@ def process_single_chunk(chunk, api_key, chunk_id, recursion_depth=0):
     logging.critical(f"❌ Parça {chunk_id}, {MAX_RETRIES} denemeden sonra hala işlenemedi.")
     return None
 
-def text_to_speech_process(text, api_keys):
-    """Metni seslendirmek için tüm süreci yönetir, geçerli API anahtarlarını dener."""
-    logging.info("Geçerli API anahtarları test ediliyor...")
-    valid_keys = [(i, key) for i, key in enumerate(api_keys, 1) if test_api_key(key, i)]
-    
+def synthesize_chunk_with_failover(chunk, valid_keys, chunk_index):
+    """
+    Bir parçayı, sırası gelen API anahtarından başlayarak seslendirir; başarısız olursa diğer geçerli anahtarları dener.
+    Başlangıç anahtarı parça sırasına göre döndürülür, böylece eşzamanlı istekler anahtarlara yayılır.
+    """
+    chunk_id = str(chunk_index + 1)
+    for offset in range(len(valid_keys)):
+        key_number, api_key = valid_keys[(chunk_index + offset) % len(valid_keys)]
+        if offset < len(valid_keys) - 1 and not anahtaryoneticisi.is_available(api_key, scope=TTS_ANAHTAR_KAPSAMI):
+            continue
+        audio_data = process_single_chunk(chunk, api_key, chunk_id)
+        if audio_data:
+            return audio_data
+        logging.error(f"Parça {chunk_id} API anahtarı #{key_number} ile başarısız oldu. Sonraki anahtar denenecek.")
+    return None
+
+def select_valid_keys(api_keys):
+    """Kullanıma uygun anahtarları (anahtar numarası, anahtar) çiftleri olarak döndürür."""
+    # Anahtarlar her işte ayrıca test edilmez; sağlık durumu gerçek çağrıların sonuçlarından öğrenilir.
+    key_numbers = {key: i for i, key in enumerate(api_keys, 1)}
+    well_formed = [key for key in api_keys if key and len(key) >= 30]
+    valid_keys = [(key_numbers[key], key) for key in anahtaryoneticisi.healthy_keys(well_formed, scope=TTS_ANAHTAR_KAPSAMI)]
+    if valid_keys:
+        logging.info(f"✅ {len(valid_keys)}/{len(api_keys)} API anahtarı kullanıma uygun.")
+    return valid_keys
+
+def text_to_speech_process(text, api_keys, chunk_timings=None):
+    """
+    Metni seslendirmek için tüm süreci yönetir, geçerli API anahtarlarını dener.
+    Parçalar en fazla TTS_ESZAMANLI_ISTEK eşzamanlı istekle seslendirilir ve sırasıyla birleştirilir.
+    'chunk_timings' listesi verilirse, her parçanın metni ve ses verisi içindeki bayt aralığı
+    ({"metin", "baslangic_bayt", "bitis_bayt"}) bu listeye yazılır.
+    """
+    valid_keys = select_valid_keys(api_keys)
     if not valid_keys:
         logging.critical("❌ Hiçbir geçerli API anahtarı bulunamadı! İşlem durduruluyor.")
         return None
     
-    logging.info(f"✅ {len(valid_keys)} adet geçerli API anahtarı bulundu.")
     text_chunks = smart_text_splitter(text)
+    if not text_chunks:
+        logging.critical("❌ Seslendirilecek metin parçası bulunamadı.")
+        return None
 
-    for key_number, api_key in valid_keys:
-        logging.info(f"\n🔄 API anahtarı #{key_number} ile seslendirme deneniyor...")
-        combined_audio_content = b''
-        successful_chunks = 0
-        
-        for i, chunk in enumerate(text_chunks, 1):
-            audio_data = process_single_chunk(chunk, api_key, str(i))
-            if audio_data:
-                combined_audio_content += audio_data
-                successful_chunks += 1
-                if i < len(text_chunks):
-                    silence = b'\x00\x00' * int(SAMPLE_RATE * 0.4)
-                    combined_audio_content += silence
-            else:
-                logging.error(f"Parça {i} bu API anahtarı ile başarısız oldu. Sonraki anahtar denenecek.")
-                break
-        
-        if successful_chunks == len(text_chunks):
-            logging.info(f"🎉 Tüm parçalar API anahtarı #{key_number} ile başarıyla işlendi!")
-            final_audio = apply_fade_out(combined_audio_content)
-            logging.info("➕ Sesin sonuna video düzenlemesi için 5 saniye sessizlik ekleniyor...")
-            silence_bytes = b'\x00\x00' * (SAMPLE_RATE * 5)
-            final_audio += silence_bytes
-            return final_audio
-
-    logging.critical("❌ Tüm API anahtarları denendi ancak seslendirme tamamlanamadı.")
-    return None
+    worker_count = max(1, min(TTS_ESZAMANLI_ISTEK, len(text_chunks)))
+    logging.info(f"\n🔄 {len(text_chunks)} parça, {worker_count} eşzamanlı istekle {len(valid_keys)} anahtara dağıtılarak seslendiriliyor...")
+    chunk_audio = [None] * len(text_chunks)
+    executor = ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="tts")
+    try:
+        futures = {
+            executor.submit(contextvars.copy_context().run, synthesize_chunk_with_failover, chunk, valid_keys, i): i
+            for i, chunk in enumerate(text_chunks)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            chunk_audio[i] = future.result()
+            if not chunk_audio[i]:
+                logging.critical(f"❌ Parça {i + 1} hiçbir API anahtarı ile seslendirilemedi.")
+                return None
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    logging.info(f"🎉 Tüm parçalar ({len(text_chunks)}) başarıyla işlendi, sırayla birleştiriliyor...")
+    return assemble_audio(text_chunks, chunk_audio, chunk_timings)
+
+class StreamingSynthesizer:
+    """
+    Metin bölümlerini, metnin geri kalanı henüz üretilirken seslendirir.
+    Bölümler tek bir TextChunker'a sırayla verilir; kesinleşen parçalar hemen TTS havuzuna gönderilir.
+    Parçalar bölüm sınırlarını aşabildiği için parça listesi, dolayısıyla ses ve altyazı zamanlaması,
+    metnin tamamının text_to_speech_process() ile seslendirilmesindekiyle aynıdır.
+    """
+    # Bölümler metinde '\n\n---\n\n' ile ayrılır; extract_target_sections '---' satırını boş satıra çevirir.
+    SECTION_BREAK = "\n\n\n\n"
+
+    def __init__(self, api_keys):
+        self.valid_keys = select_valid_keys(api_keys)
+        if not self.valid_keys:
+            raise Exception("Akışlı seslendirme için geçerli API anahtarı bulunamadı.")
+        self.chunker = TextChunker()
+        self.sections_received = 0
+        self.text_chunks = []
+        self.futures = []
+        self.executor = ThreadPoolExecutor(max_workers=max(1, TTS_ESZAMANLI_ISTEK), thread_name_prefix="tts_akis")
+
+    def submit_section(self, section_text):
+        """Bir bölümü parçalayıcıya verir ve kesinleşen parçaları hemen seslendirme kuyruğuna ekler."""
+        section_text = re.sub(r'\n---\n', '\n\n', section_text).strip()
+        if not section_text:
+            return
+        if self.sections_received:
+            section_text = self.SECTION_BREAK + section_text
+        self.sections_received += 1
+        self._submit_chunks(self.chunker.feed(section_text))
+        logging.info(f"🎙️ Bölüm {self.sections_received} seslendirme kuyruğuna alındı (toplam {len(self.text_chunks)} parça).")
+
+    def _submit_chunks(self, chunks):
+        for chunk in chunks:
+            i = len(self.text_chunks)
+            self.text_chunks.append(chunk)
+            self.futures.append(self.executor.submit(
+                contextvars.copy_context().run, synthesize_chunk_with_failover, chunk, self.valid_keys, i
+            ))
+
+    def finish(self, chunk_timings=None, expected_chunks=None):
+        """
+        Metnin sonunu bildirir, tüm parçaların bitmesini bekler ve birleştirilmiş sesi döndürür.
+        'expected_chunks' (metnin tamamının smart_text_splitter çıktısı) verilir ve parçalar bununla
+        eşleşmezse ses beklenmeden None döner; bir parça seslendirilemezse de None döner.
+        """
+        try:
+            self._submit_chunks(self.chunker.close())
+            if not self.text_chunks:
+                logging.critical("❌ Seslendirilecek metin parçası bulunamadı.")
+                return None
+            if expected_chunks is not None and self.text_chunks != expected_chunks:
+                logging.warning(f"⚠️ Akışlı parçalar ({len(self.text_chunks)}) metnin tamamının parçalarıyla "
+                                f"({len(expected_chunks)}) eşleşmiyor; akışlı ses kullanılmayacak.")
+                return None
+            chunk_audio = []
+            for i, future in enumerate(self.futures):
+                audio_data = future.result()
+                if not audio_data:
+                    logging.critical(f"❌ Parça {i + 1} hiçbir API anahtarı ile seslendirilemedi.")
+                    return None
+                chunk_audio.append(audio_data)
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        logging.info(f"🎉 Akışlı seslendirilen {len(self.text_chunks)} parça sırayla birleştiriliyor...")
+        return assemble_audio(self.text_chunks, chunk_audio, chunk_timings)
+
+    def cancel(self):
+        """Bekleyen parçaları iptal eder (metin üretimi başarısız olduğunda)."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def start_streaming_synthesis(project_id: str):
+    """Akışlı seslendiriciyi başlatır; anahtarlar alınamazsa None döner ve normal akışa dönülür."""
+    try:
+        return StreamingSynthesizer(load_api_keys_from_secret_manager(project_id))
+    except Exception as e:
+        logging.warning(f"⚠️ Akışlı seslendirme başlatılamadı, metin bittikten sonra seslendirilecek: {e}")
+        return None
+
+def assemble_audio(text_chunks, chunk_audio, chunk_timings=None):
+    """
+    Parça seslerini, aralarındaki sessizlikleri ve sondaki 5 saniyelik sessizliği tek bir tampona yerleştirir.
+    Tampon son boyutunda ve sıfırlarla (sessizlik) bir kez ayrılır; parçalar memoryview dilimlerine kopyalanır,
+    fade-out da aynı tampon üzerinde yerinde uygulanır. Böylece ses verisi birleştirme sırasında tekrar tekrar kopyalanmaz.
+    """
+    sample_width = 2
+    silence_len = int(SAMPLE_RATE * CHUNK_SILENCE_SECONDS) * sample_width
+    tail_len = SAMPLE_RATE * 5 * sample_width
+    speech_len = sum(len(a) for a in chunk_audio) + silence_len * (len(chunk_audio) - 1)
+
+    buffer = bytearray(speech_len + tail_len)
+    view = memoryview(buffer)
+    if chunk_timings is not None:
+        chunk_timings.clear()
+    offset = 0
+    for chunk, audio_data in zip(text_chunks, chunk_audio):
+        view[offset:offset + len(audio_data)] = audio_data
+        if chunk_timings is not None:
+            chunk_timings.append({"metin": chunk, "baslangic_bayt": offset, "bitis_bayt": offset + len(audio_data)})
+        offset += len(audio_data) + silence_len
+
+    if SES_RMS_HEDEF_DBFS:
+        gain_db = sesefektleri.normalize_rms(view[:speech_len], float(SES_RMS_HEDEF_DBFS))
+        logging.info(f"🔊 Konuşma seviyesi {SES_RMS_HEDEF_DBFS} dBFS RMS hedefine getirildi ({gain_db:+.1f} dB).")
+    apply_fade_out(view[:speech_len])
+    logging.info("➕ Sesin sonuna video düzenlemesi için 5 saniye sessizlik eklendi.")
+    return buffer
 
 def save_audio(audio_content, output_dir, filename='ses.wav'):
     """Ses verisini belirtilen yola .wav dosyası olarak kaydeder."""
@@ -319,6 +474,31 @@ def save_audio(audio_content, output_dir, filename='ses.wav'):
         logging.error(f"❌ Ses dosyası kaydedilirken hata: {e}")
         return None
 
+def get_whisper_model(model_name=WHISPER_MODEL_ADI):
+    """Whisper modelini ilk çağrıda yükler, sonraki çağrılarda önbellekten döndürür."""
+    with _whisper_kilidi:
+        model = _whisper_modelleri.get(model_name)
+        if model is None:
+            if WHISPER_THREAD_SAYISI > 0:
+                import torch
+                torch.set_num_threads(WHISPER_THREAD_SAYISI)
+            logging.info(f"\n🤖 Whisper modeli yükleniyor ({model_name})...")
+            start = time.perf_counter()
+            model = whisper.load_model(model_name)
+            elapsed = time.perf_counter() - start
+            WHISPER_METRIKLERI["yukleme_sayisi"] += 1
+            WHISPER_METRIKLERI["yukleme_suresi"] += elapsed
+            logging.info(f"✅ Whisper modeli {elapsed:.2f}s içinde yüklendi ve önbelleğe alındı.")
+            _whisper_modelleri[model_name] = model
+        return model
+
+def warm_up_whisper(model_name=WHISPER_MODEL_ADI):
+    """İşçi başlarken modeli önceden yükler; ilk iş model yükleme süresini beklemez."""
+    try:
+        get_whisper_model(model_name)
+    except Exception as e:
+        logging.warning(f"⚠️ Whisper modeli önceden yüklenemedi, ilk kullanımda tekrar denenecek: {e}")
+
 def seconds_to_srt_time(seconds):
     """Saniye değerini SRT altyazı formatına (HH:MM:SS,mmm) çevirir."""
     millis = int((seconds - int(seconds)) * 1000)
@@ -327,34 +507,173 @@ def seconds_to_srt_time(seconds):
     hours, minutes = divmod(minutes, 60)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
 
+def write_srt(segments, output_dir):
+    """(başlangıç, bitiş, metin) listesini SRT dosyası olarak yazar."""
+    srt_lines = []
+    for i, (start, end, text) in enumerate(segments, 1):
+        srt_lines.append(f"{i}\n{seconds_to_srt_time(start)} --> {seconds_to_srt_time(end)}\n{text}\n")
+
+    srt_file_path = os.path.join(output_dir, "altyazi.srt")
+    with open(srt_file_path, 'w', encoding='utf-8') as srt_file:
+        srt_file.write('\n'.join(srt_lines))
+    return srt_file_path
+
+def split_subtitle_segments(text):
+    """Parça metnini cümlelere, uzun cümleleri de ALTYAZI_MAKS_KELIME'yi aşmayan eşit gruplara böler."""
+    segments = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        words = sentence.split()
+        if not words:
+            continue
+        group_count = -(-len(words) // ALTYAZI_MAKS_KELIME)
+        group_size = -(-len(words) // group_count)
+        for i in range(0, len(words), group_size):
+            segments.append(" ".join(words[i:i + group_size]))
+    return segments
+
+def find_silences(pcm_bytes):
+    """
+    16-bit PCM verisindeki konuşma sınırlarını ve sessiz aralıkları 10ms'lik çerçeve enerjisinden bulur.
+    (konuşma_başı, konuşma_sonu, [(sessizlik_başı, sessizlik_sonu), ...]) döner; süreler saniyedir.
+    """
+    samples = np.frombuffer(pcm_bytes, dtype='<i2')
+    frame = SAMPLE_RATE // 100
+    frame_count = len(samples) // frame
+    total = len(samples) / SAMPLE_RATE
+    if frame_count == 0:
+        return 0.0, total, []
+
+    frames = samples[:frame_count * frame].astype(np.float32).reshape(frame_count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    silent = rms < max(float(rms.max()) * SESSIZLIK_ESIK_ORANI, 1.0)
+    voiced = np.flatnonzero(~silent)
+    if len(voiced) == 0:
+        return 0.0, total, []
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    min_frames = int(SESSIZLIK_MIN_SURE * 100)
+    silences = [
+        (start / 100.0, end / 100.0)
+        for start, end in zip(edges[::2], edges[1::2])
+        if end - start >= min_frames and start > voiced[0] and end <= voiced[-1]
+    ]
+    return voiced[0] / 100.0, (voiced[-1] + 1) / 100.0, silences
+
+def align_chunk_segments(segments, pcm_bytes):
+    """
+    Bir TTS parçasının altyazı bölümlerini parçanın sesine hizalar.
+    Bölüm sınırları önce karakter sayısına göre tahmin edilir, sonra tahmine en yakın sessizliğe oturtulur.
+    Parçaya göreli (başlangıç, bitiş, metin) listesi döner.
+    """
+    speech_start, speech_end, silences = find_silences(pcm_bytes)
+    weights = np.array([len(seg) + (8 if seg[-1] in ".!?" else 0) for seg in segments], dtype=np.float64)
+    estimates = speech_start + np.cumsum(weights)[:-1] / weights.sum() * (speech_end - speech_start)
+
+    boundaries = [speech_start]
+    for estimate in estimates:
+        candidates = [
+            (abs((a + b) / 2 - estimate), (a + b) / 2) for a, b in silences
+            if (a + b) / 2 > boundaries[-1] and abs((a + b) / 2 - estimate) <= SESSIZLIK_ESLEME_TOLERANSI
+        ]
+        boundary = min(candidates)[1] if candidates else max(float(estimate), boundaries[-1])
+        boundaries.append(boundary)
+    boundaries.append(speech_end)
+
+    return [(boundaries[i], boundaries[i + 1], seg) for i, seg in enumerate(segments)]
+
+def generate_srt_from_tts_timing(audio_content, chunk_timings, output_dir):
+    """
+    SRT altyazısını, TTS'e gönderilen metinden ve her parçanın ses içindeki konumundan üretir.
+    Whisper çalıştırılmaz; altyazı metni seslendirilen metnin kendisidir.
+    """
+    try:
+        logging.info("\n📐 Altyazı, TTS parça zamanlamalarından hizalanıyor...")
+        bytes_per_second = SAMPLE_RATE * 2
+        srt_segments = []
+        for timing in chunk_timings:
+            segments = split_subtitle_segments(timing["metin"])
+            if not segments:
+                continue
+            chunk_offset = timing["baslangic_bayt"] / bytes_per_second
+            chunk_pcm = memoryview(audio_content)[timing["baslangic_bayt"]:timing["bitis_bayt"]]
+            for start, end, text in align_chunk_segments(segments, chunk_pcm):
+                srt_segments.append((chunk_offset + start, chunk_offset + end, text))
+
+        if not srt_segments:
+            logging.error("❌ Hizalanacak altyazı bölümü bulunamadı.")
+            return None
+
+        srt_file_path = write_srt(srt_segments, output_dir)
+        logging.info(f"✅ Hizalanmış SRT altyazı dosyası oluşturuldu ({len(srt_segments)} bölüm): {srt_file_path}")
+        return srt_file_path
+    except Exception as e:
+        logging.error(f"❌ TTS zamanlamasından altyazı oluşturma hatası: {e}")
+        return None
+
 def generate_synchronized_srt(audio_file_path, output_dir):
     """Oluşturulan ses dosyasını OpenAI Whisper ile deşifre ederek senkronize SRT altyazısı oluşturur."""
     try:
-        logging.info(f"\n🤖 Whisper modeli yükleniyor (base)...")
-        model = whisper.load_model("base.en")
+        model = get_whisper_model()
         logging.info(f"🎤 Ses dosyası deşifre ediliyor: {audio_file_path}")
+        start = time.perf_counter()
         result = model.transcribe(audio_file_path, fp16=False, language="en")
+        elapsed = time.perf_counter() - start
+        WHISPER_METRIKLERI["desifre_sayisi"] += 1
+        WHISPER_METRIKLERI["desifre_suresi"] += elapsed
+        logging.info(
+            f"⏱️ Deşifre {elapsed:.2f}s sürdü (toplam: {WHISPER_METRIKLERI['desifre_sayisi']} deşifre / "
+            f"{WHISPER_METRIKLERI['desifre_suresi']:.1f}s, {WHISPER_METRIKLERI['yukleme_sayisi']} model yükleme / "
+            f"{WHISPER_METRIKLERI['yukleme_suresi']:.1f}s)."
+        )
         
-        srt_lines = []
-        for i, segment in enumerate(result['segments'], 1):
-            start_time = seconds_to_srt_time(segment['start'])
-            end_time = seconds_to_srt_time(segment['end'])
-            text = segment['text'].strip()
-            srt_lines.append(f"{i}\n{start_time} --> {end_time}\n{text}\n")
-
-        srt_file_path = os.path.join(output_dir, "altyazi.srt")
-        with open(srt_file_path, 'w', encoding='utf-8') as srt_file:
-            srt_file.write('\n'.join(srt_lines))
+        srt_file_path = write_srt(
+            [(segment['start'], segment['end'], segment['text'].strip()) for segment in result['segments']],
+            output_dir
+        )
         logging.info(f"✅ Senkronize SRT altyazı dosyası oluşturuldu: {srt_file_path}")
         return srt_file_path
     except Exception as e:
         logging.critical(f"❌ Whisper ile altyazı oluşturma hatası: {e}")
         return None
 
-def run_audio_and_srt_process(story_text, output_dir, project_id: str):
+def export_audio(audio_content, output_dir, wav_path, audio_format=None):
+    """
+    Bellekteki PCM tamponunu ffmpeg'in stdin'ine verip teslim biçimine kodlar; WAV diskten tekrar okunmaz.
+    Biçim "wav" ise veya kodlama başarısız olursa mevcut WAV dosyasının yolu döner.
+    """
+    audio_format = (audio_format or SES_TESLIM_BICIMI).lower()
+    if audio_format == "wav":
+        return wav_path
+    if audio_format not in SES_TESLIM_BICIMLERI:
+        logging.warning(f"⚠️ Bilinmeyen ses teslim biçimi '{audio_format}', WAV kullanılacak.")
+        return wav_path
+
+    filename, codec_args = SES_TESLIM_BICIMLERI[audio_format]
+    full_path = os.path.join(output_dir, filename)
+    command = [
+        ffmpegmotoru.FFMPEG, "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+        "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+        *codec_args, full_path,
+    ]
+    try:
+        subprocess.run(command, input=memoryview(audio_content), check=True, capture_output=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        details = e.stderr.decode(errors="replace").strip()[-300:] if getattr(e, "stderr", None) else e
+        logging.warning(f"⚠️ Ses {audio_format} biçimine kodlanamadı, WAV yüklenecek: {details}")
+        return wav_path
+    ratio = os.path.getsize(full_path) / max(os.path.getsize(wav_path), 1)
+    logging.info(f"🗜️ Teslim sesi kodlandı: {full_path} ({os.path.getsize(full_path) / 1024 / 1024:.2f} MB, WAV'ın %{ratio * 100:.0f}'i)")
+    return full_path
+
+def run_audio_and_srt_process(story_text, output_dir, project_id: str, synthesizer=None):
     """
     Ana ses ve altyazı üretme iş akışını yönetir.
     API anahtarlarını Secret Manager'dan alır.
+    'synthesizer' (StreamingSynthesizer) verilirse metin zaten üretilirken seslendirilmiştir; yalnızca
+    kalan parçalar beklenir. Akışlı seslendirme başarısız olursa metnin tamamı baştan seslendirilir.
+
+    Returns:
+        (render için WAV yolu, SRT yolu, yüklenecek teslim sesi yolu)
     """
     logging.info("--- Ses ve Senkronize Altyazı Üretim Modülü Başlatıldı (Secret Manager Versiyonu) ---")
     
@@ -372,18 +691,34 @@ def run_audio_and_srt_process(story_text, output_dir, project_id: str):
     
     logging.info(f"İşlenecek metin boyutu: {len(target_text)} karakter.")
     
-    audio_content = text_to_speech_process(target_text, keys_to_use)
-    if not audio_content:
-        raise Exception("Tüm API anahtarları denendi ancak ses içeriği üretilemedi.")
-    
-    audio_file_path = save_audio(audio_content, output_dir)
-    if not audio_file_path:
-        raise Exception("Oluşturulan ses dosyası diske kaydedilemedi.")
+    chunk_timings = []
+    with olcumleme.asama("tts"):
+        audio_content = synthesizer.finish(chunk_timings, smart_text_splitter(target_text)) if synthesizer else None
+        if synthesizer and not audio_content:
+            logging.warning("⚠️ Akışlı seslendirme tamamlanamadı, metnin tamamı yeniden seslendiriliyor.")
+        if not audio_content:
+            audio_content = text_to_speech_process(target_text, keys_to_use, chunk_timings)
+        if not audio_content:
+            raise Exception("Tüm API anahtarları denendi ancak ses içeriği üretilemedi.")
+        
+        audio_file_path = save_audio(audio_content, output_dir)
+        if not audio_file_path:
+            raise Exception("Oluşturulan ses dosyası diske kaydedilemedi.")
+
+    with olcumleme.asama("ses_kodlama"):
+        delivery_audio_path = export_audio(audio_content, output_dir, audio_file_path)
         
-    srt_file_path = generate_synchronized_srt(audio_file_path, output_dir)
+    srt_file_path = None
+    with olcumleme.asama("altyazi"):
+        if ALTYAZI_MODU == "hizalama":
+            srt_file_path = generate_srt_from_tts_timing(audio_content, chunk_timings, output_dir)
+            if not srt_file_path:
+                logging.warning("⚠️ Hizalama ile altyazı üretilemedi, Whisper'a geri dönülüyor.")
+        if not srt_file_path:
+            srt_file_path = generate_synchronized_srt(audio_file_path, output_dir)
     if not srt_file_path:
         logging.warning("Altyazı dosyası oluşturulamadı ancak işlem devam ediyor.")
     
     logging.info("--- Ses ve Altyazı Üretimi Başarıyla Tamamlandı ---")
-    return audio_file_path, srt_file_path
+    return audio_file_path, srt_file_path, delivery_audio_path
 
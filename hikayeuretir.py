@@ -1,17 +1,35 @@
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
-import time
+import os
 import re
+import json
 import random
 import logging
-from typing import Union, Tuple, List, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import anahtaryoneticisi
+import geminiistemcisi
 
 # --- Global Değişkenler ---
-# Bu değişkenler, modülün o anki oturumda kullandığı API anahtarlarını,
-# sıradaki anahtarın hangisi olduğunu ve yapılandırılmış Gemini modelini tutar.
+# Bu değişkenler, modülün o anki oturumda kullandığı API anahtarlarını ve Gemini model yapılandırmasını tutar.
+# Hangi isteğin hangi anahtarla gideceğine anahtar başına hız sınırlayıcılı planlayıcı karar verir.
 API_KEYS: List[str] = []
-current_api_key_index: int = 0
-model: Optional[genai.GenerativeModel] = None
+MODEL_NAME = "gemini-2.5-pro"
+GENERATION_CONFIG = {
+    "temperature": 0.8,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 2048
+}
+# Birleştirme geçişi tüm metni tek seferde geri yazdığı için daha geniş bir çıktı sınırı kullanır.
+STITCH_GENERATION_CONFIG = {**GENERATION_CONFIG, "temperature": 0.3, "max_output_tokens": 8192}
+
+# Metin üretim modu: "sirali" = bölümler sırayla, önceki metnin tamamı bağlam olarak verilerek üretilir;
+# "taslak" = önce tek çağrıda kısa bir taslak alınır, bölümler bu taslaktan eşzamanlı üretilir ve
+# (METIN_BIRLESTIRME_GECISI açıksa) tek bir hafif geçişle geçişler düzeltilir.
+METIN_URETIM_MODU = os.environ.get("METIN_URETIM_MODU", "sirali").lower()
+METIN_BIRLESTIRME_GECISI = os.environ.get("METIN_BIRLESTIRME_GECISI", "1") == "1"
+SECTION_SEPARATOR = "\n\n---\n\n"
 
 # --- Gemini API Entegrasyon Fonksiyonları ---
 
@@ -20,81 +38,27 @@ def initialize_gemini(api_keys_list: List[str]) -> bool:
     Ana yönetici (worker.py) tarafından çağrılır.
     Secret Manager'dan alınan API anahtar listesi ile Gemini'yi başlatır.
     """
-    global API_KEYS, current_api_key_index
+    global API_KEYS
     if not api_keys_list:
         logging.critical("❌ Başlatma için hiç API anahtarı sağlanmadı.")
         return False
         
     API_KEYS = api_keys_list
-    current_api_key_index = 0
-    # İlk anahtarla yapılandırmayı dene
-    return configure_gemini() is not None
+    logging.info(f"✅ Gemini {len(API_KEYS)} API anahtarıyla başlatıldı ({MODEL_NAME}).")
+    return True
 
-def configure_gemini() -> Optional[genai.GenerativeModel]:
+def generate_with_failover(prompt: str, validate=None, generation_config=None):
     """
-    Sıradaki API anahtarını kullanarak Gemini modelini yapılandırır.
-    Bir anahtar başarısız olursa, listedeki bir sonrakini dener.
+    Gemini API'ye güvenli bir şekilde istek gönderir.
+    Anahtar, kotası ve yükü en uygun olan arasından seçilir; kota veya izin hatasında başka bir anahtar denenir.
+    Aynı prompt için daha önce üretilmiş (ve 'validate' ile doğrulanmış) yanıt varsa önbellekten döner;
+    böylece başarısız bir işin tekrarında ücreti ödenmiş bölümler yeniden üretilmez.
     """
-    global current_api_key_index, model
-    # Kullanılabilir anahtar kalıp kalmadığını kontrol et
-    if not API_KEYS or current_api_key_index >= len(API_KEYS):
-        logging.error("❌ Kullanılabilir Gemini API anahtarı kalmadı.")
-        return None
-        
     try:
-        api_key = API_KEYS[current_api_key_index]
-        logging.info(f"🔄 Gemini API anahtarı {current_api_key_index + 1}/{len(API_KEYS)} deneniyor...")
-        genai.configure(api_key=api_key)
-        
-        # Model yapılandırması
-        generation_config = {
-            "temperature": 0.8,
-            "top_p": 0.95,
-            "top_k": 40,
-            "max_output_tokens": 2048
-        }
-        # Daha modern ve verimli bir model kullanıyoruz
-        model = genai.GenerativeModel(
-            model_name="gemini-2.5-pro",
-            generation_config=generation_config
-        )
-        logging.info(f"✅ Gemini API anahtarı {current_api_key_index + 1} başarıyla yapılandırıldı.")
-        return model
+        return geminiistemcisi.generate_cached(prompt, MODEL_NAME, generation_config or GENERATION_CONFIG, API_KEYS, validate)
     except Exception as e:
-        logging.error(f"❌ API anahtarı {current_api_key_index + 1} ile yapılandırma hatası: {e}")
-        # Başarısız olursa bir sonraki anahtarı denemek için indeksi artır
-        current_api_key_index += 1
-        return configure_gemini()
-
-def generate_with_failover(prompt: str):
-    """
-    Gemini API'ye güvenli bir şekilde istek gönderir.
-    Kota veya izin hatası gibi durumlarda otomatik olarak bir sonraki API anahtarını dener.
-    """
-    global current_api_key_index, model
-    
-    while current_api_key_index < len(API_KEYS):
-        try:
-            # Eğer model henüz yapılandırılmadıysa, şimdi yap
-            if model is None:
-                if not configure_gemini():
-                    return None # Hiç geçerli anahtar bulunamadıysa None dön
-            
-            # İçerik üretme isteği gönder
-            response = model.generate_content(prompt)
-            return response
-            
-        except (google_exceptions.ResourceExhausted, google_exceptions.PermissionDenied) as e:
-            logging.warning(f"⚠️ API anahtarı {current_api_key_index + 1} kotaya takıldı veya izin sorunu. Değiştiriliyor...")
-            current_api_key_index += 1
-            model = None # Modeli sıfırla ki sonraki anahtarla yeniden denensin
-            
-        except Exception as e:
-            logging.error(f"❌ Metin üretimi sırasında beklenmedik API hatası: {e}")
-            return None # Beklenmedik hatalarda işlemi durdur
-            
-    logging.error("Tüm API anahtarları denendi ve hiçbiri başarılı olamadı.")
-    return None
+        logging.error(f"❌ Metin üretimi sırasında beklenmedik API hatası: {e}")
+        return None # Beklenmedik hatalarda işlemi durdur
 
 # --- "The Creator's Blueprint" İçerik Üretici Sınıfı ---
 
@@ -121,24 +85,30 @@ class CreatorsBlueprintGenerator:
             6: {"name": "The Blueprint Summary & CTA", "words": 150, "task": "Provide a concise summary and a clear call to action."}
         }
 
-    def get_and_process_next_title(self, titles_list: List[str]) -> Tuple[Union[str, None], List[str]]:
+    def generate_full_script(self, video_title: str, on_section: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
-        Verilen başlık listesinin en üstündeki başlığı işler.
-        İşlenen başlığı ve geriye kalan başlıkların olduğu yeni listeyi döndürür.
-        Bu fonksiyon, dosya okuma/yazma işlemini worker.py'a bırakır.
+        Verilen bir başlık için, script_structure'ı takip ederek tam bir video metni üretir.
+        METIN_URETIM_MODU "taslak" ise taslak öncelikli eşzamanlı üretim denenir; taslak alınamazsa sıralı üretime dönülür.
+        'on_section' verilirse, kesinleşen her bölüm metni sırayla bu fonksiyona iletilir (ör. akışlı seslendirme için).
         """
-        if not titles_list:
-            logging.info("✅ İşlenecek başka başlık kalmadı.")
-            return None, []
-            
-        title_to_process = titles_list[0]
-        remaining_titles = titles_list[1:]
-        logging.info(f"🔹 Sıradaki başlık: '{title_to_process}'. Listede kalan: {len(remaining_titles)}")
-        return title_to_process, remaining_titles
+        if METIN_URETIM_MODU == "taslak":
+            outline = self.generate_outline(video_title)
+            if outline:
+                return self.generate_script_from_outline(video_title, outline, on_section)
+            logging.warning("⚠️ Taslak üretilemedi, sıralı metin üretimine geçiliyor.")
+        return self.generate_script_sequentially(video_title, on_section)
 
-    def generate_full_script(self, video_title: str) -> Optional[str]:
+    @staticmethod
+    def section_rules() -> str:
+        return """CRITICAL INSTRUCTIONS:
+- Write ONLY the text for this section. Do NOT add titles or summaries unless the section name is "The Blueprint Summary & CTA".
+- If the section is "The Core Problem", you MUST start with this disclaimer: "Before we dive in, I want to be crystal clear: I'm a financial educator, not a licensed financial advisor... Please always consult with a qualified professional for your unique situation. Okay, let's get into it."
+"""
+
+    def generate_script_sequentially(self, video_title: str, on_section: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
-        Verilen bir başlık için, script_structure'ı takip ederek tam bir video metni üretir.
+        Bölümleri sırayla üretir; her bölüme o ana kadar yazılan metnin tamamı bağlam olarak verilir.
+        Her bölüm üretilir üretilmez 'on_section' ile iletilir; sonraki bölümler yazılırken seslendirilebilir.
         """
         logging.info(f"--- '{video_title}' için metin üretimi başladı ---")
         full_script_parts = []
@@ -161,26 +131,153 @@ Your task is to write ONLY the text for the next single section.
 NEXT SECTION: "{section_name}"
 GOAL: "{section_info['task']}"
 TARGET WORDS: ~{section_info['words']}
-CRITICAL INSTRUCTIONS:
-- Write ONLY the text for this section. Do NOT add titles or summaries unless the section name is "The Blueprint Summary & CTA".
-- If the section is "The Core Problem", you MUST start with this disclaimer: "Before we dive in, I want to be crystal clear: I'm a financial educator, not a licensed financial advisor... Please always consult with a qualified professional for your unique situation. Okay, let's get into it."
-"""
-            response = generate_with_failover(prompt)
-            section_text = response.text.strip() if response and hasattr(response, 'text') else None
+{self.section_rules()}"""
+            section_text = self.response_text(generate_with_failover(prompt))
 
             if section_text:
                 full_script_parts.append(section_text)
                 script_so_far += section_text + "\n\n"
                 logging.info(f"✅  Bölüm {i} tamamlandı ({len(section_text.split())} kelime).")
-                time.sleep(2) # API'ye aşırı yüklenmemek için kısa bir bekleme
+                if on_section:
+                    on_section(section_text)
             else:
                 logging.error(f"❌  Bölüm {i} üretilemedi! Bu başlık için metin üretimi iptal ediliyor.")
                 return None
         
-        final_script = "\n\n---\n\n".join(full_script_parts)
+        final_script = SECTION_SEPARATOR.join(full_script_parts)
         logging.info(f"--- '{video_title}' için metin üretimi başarıyla tamamlandı ---")
         return final_script
 
+    @staticmethod
+    def response_text(response) -> Optional[str]:
+        return response.text.strip() if response and hasattr(response, 'text') and response.text else None
+
+    # --- Taslak öncelikli eşzamanlı üretim ---
+
+    def generate_outline(self, video_title: str) -> Optional[dict]:
+        """Tek çağrıda seçilen giriş tipini, ana prensibi, benzetmeyi ve her bölümün 1-2 cümlelik özetini alır."""
+        logging.info(f"🗺️  '{video_title}' için taslak üretiliyor...")
+        hook_list = "\n".join(f"- {h['name']}: {h['description']}" for h in self.hook_types)
+        section_list = "\n".join(
+            f"{i}. {info['name']} (~{info['words']} words): {info['task']}" for i, info in self.script_structure.items()
+        )
+        prompt = f"""
+You are planning a script for a YouTube channel called 'The Creator's Blueprint', hosted by Leo, a calm, empathetic, and knowledgeable financial educator for creative professionals.
+VIDEO TITLE: "{video_title}"
+HOOK TYPES (choose exactly one):
+{hook_list}
+SECTIONS:
+{section_list}
+Return ONLY a JSON object, with no extra text, in this form:
+{{"hook_type": "<chosen hook type>", "principle": "<the single evergreen principle of section 3>", "analogy": "<the creative-world analogy of section 4>", "sections": {{"1": "<1-2 sentence summary of what section 1 says>", "2": "...", "3": "...", "4": "...", "5": "...", "6": "..."}}}}
+"""
+        text = self.response_text(generate_with_failover(prompt, validate=lambda t: self.parse_outline(t) is not None))
+        outline = self.parse_outline(text) if text else None
+        if not outline:
+            logging.warning("⚠️ Taslak yanıtı çözümlenemedi veya eksik bölüm özetleri içeriyor.")
+            return None
+        logging.info(f"✅ Taslak hazır (giriş tipi: {outline.get('hook_type', '?')}).")
+        return outline
+
+    def parse_outline(self, text: str) -> Optional[dict]:
+        """Taslak JSON'unu çözer; her bölüm için özet yoksa None döner."""
+        try:
+            outline = json.loads(re.sub(r'^```json\s*|\s*```$', '', text.strip(), flags=re.MULTILINE))
+            sections = {int(k): str(v).strip() for k, v in outline.get("sections", {}).items()}
+        except (ValueError, AttributeError):
+            return None
+        if set(sections) != set(self.script_structure) or not all(sections.values()):
+            return None
+        outline["sections"] = sections
+        return outline
+
+    def build_section_prompt(self, video_title: str, i: int, outline: dict) -> str:
+        """Bölüm komutu: tüm taslak (kısa) + yalnızca komşu bölümlerin özetleri; önceki metnin tamamı gönderilmez."""
+        section_info = self.script_structure[i]
+        outline_lines = "\n".join(
+            f"{n}. {self.script_structure[n]['name']}: {summary}" for n, summary in sorted(outline["sections"].items())
+        )
+        previous_summary = outline["sections"].get(i - 1, "Nothing - this is the very first part of the script.")
+        next_summary = outline["sections"].get(i + 1, "Nothing - this is the final part of the script.")
+        return f"""
+You are a calm, empathetic, and knowledgeable financial educator for a YouTube channel called 'The Creator's Blueprint'.
+VIDEO TITLE: "{video_title}"
+SCRIPT OUTLINE (the whole video, for consistency):
+{outline_lines}
+HOOK TYPE: {outline.get('hook_type', '')}
+CORE PRINCIPLE: {outline.get('principle', '')}
+CREATIVE ANALOGY: {outline.get('analogy', '')}
+THE SECTION BEFORE THIS ONE COVERS: {previous_summary}
+THE SECTION AFTER THIS ONE WILL COVER: {next_summary}
+Your task is to write ONLY the text for this single section, so that it flows from the previous section and sets up the next one.
+SECTION: "{section_info['name']}"
+GOAL: "{section_info['task']}"
+TARGET WORDS: ~{section_info['words']}
+{self.section_rules()}"""
+
+    def generate_script_from_outline(self, video_title: str, outline: dict,
+                                     on_section: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Tüm bölümleri taslaktan eşzamanlı üretir; ardından isteğe bağlı birleştirme geçişini uygular.
+        Birleştirme geçişi bölüm sınırlarını değiştirebildiğinden 'on_section' bölümleri ancak geçişten sonra alır.
+        """
+        logging.info(f"--- '{video_title}' için {len(self.script_structure)} bölüm eşzamanlı üretiliyor ---")
+        with ThreadPoolExecutor(max_workers=len(self.script_structure), thread_name_prefix="bolum") as executor:
+            futures = {
+                i: executor.submit(contextvars.copy_context().run, generate_with_failover,
+                                   self.build_section_prompt(video_title, i, outline))
+                for i in self.script_structure
+            }
+            sections = {i: self.response_text(future.result()) for i, future in futures.items()}
+
+        missing = [i for i, text in sections.items() if not text]
+        if missing:
+            logging.error(f"❌  Bölüm(ler) {missing} üretilemedi! Bu başlık için metin üretimi iptal ediliyor.")
+            return None
+        for i, text in sections.items():
+            logging.info(f"✅  Bölüm {i} tamamlandı ({len(text.split())} kelime).")
+
+        parts = [sections[i] for i in sorted(sections)]
+        if METIN_BIRLESTIRME_GECISI:
+            parts = self.stitch_sections(parts)
+        if on_section:
+            for part in parts:
+                on_section(part)
+        logging.info(f"--- '{video_title}' için metin üretimi başarıyla tamamlandı ---")
+        return SECTION_SEPARATOR.join(parts)
+
+    def stitch_sections(self, parts: List[str]) -> List[str]:
+        """
+        Bağımsız üretilen bölümlerin geçişlerini tek bir çağrıyla yumuşatır. Yanıt bölüm sayısını
+        korumazsa veya bir bölümün uzunluğu belirgin biçimde değişirse özgün bölümler kullanılır.
+        """
+        logging.info("🧵 Bölüm geçişleri düzeltiliyor...")
+        prompt = f"""
+Below is a complete YouTube script split into {len(parts)} sections, separated by lines that contain only '---'.
+The sections were written independently, so the transitions between them may be abrupt or repeat ideas.
+Lightly edit ONLY the first and last sentences of each section so the script flows naturally and nothing is repeated.
+Keep everything else word for word, including the disclaimer. Keep exactly {len(parts)} sections and the '---' separator lines.
+Return ONLY the script.
+
+{SECTION_SEPARATOR.join(parts)}
+"""
+        response = generate_with_failover(prompt, lambda t: self.split_stitched(t, parts) is not None, STITCH_GENERATION_CONFIG)
+        stitched = self.split_stitched(self.response_text(response) or "", parts)
+        if stitched is None:
+            logging.warning("⚠️ Birleştirme geçişi başarısız oldu veya bölüm yapısını korumadı, bölümler olduğu gibi kullanılacak.")
+            return parts
+        return stitched
+
+    @staticmethod
+    def split_stitched(text: str, parts: List[str]) -> Optional[List[str]]:
+        """Birleştirilmiş metni bölümlere ayırır; bölüm sayısı veya uzunluklar belirgin biçimde değiştiyse None döner."""
+        stitched = [p.strip() for p in re.split(r'\n\s*---\s*\n', text.strip())]
+        if len(stitched) != len(parts) or not all(
+            0.75 <= len(new.split()) / max(len(old.split()), 1) <= 1.25 for new, old in zip(stitched, parts)
+        ):
+            return None
+        return stitched
+
     def format_script_for_saving(self, script: str, title: str) -> Optional[str]:
         """
         Üretilen metni, video hakkında bilgiler içeren bir başlık bloğuyla formatlar.
@@ -196,49 +293,39 @@ CRITICAL INSTRUCTIONS:
         return "\n".join(header) + script
 
 # --- ANA FONKSİYON (worker.py tarafından çağrılır) ---
-def run_script_generation_process(api_keys: List[str], title_list: List[str]) -> Tuple[Optional[str], Optional[str], List[str]]:
+def run_script_generation_process(project_id: str, video_title: str,
+                                  on_section: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """
-    Tüm hikaye üretim sürecini yönetir.
+    Verilen başlık için tüm hikaye üretim sürecini yönetir.
     
     Args:
-        api_keys: Secret Manager'dan alınan Gemini API anahtarları.
-        title_list: Cloud Storage'dan okunan mevcut başlık listesi.
+        project_id: Gemini API anahtarlarının okunacağı Google Cloud projesi.
+        video_title: Başlık kuyruğundan alınan video başlığı.
+        on_section: Verilirse, kesinleşen her bölüm metni sırayla bu fonksiyona iletilir.
         
     Returns:
-        Bir tuple döner: (formatlanmış_metin, işlenen_başlık, kalan_başlıklar_listesi)
+        Başlık bloğuyla formatlanmış metin; üretim başarısız olursa None.
     """
     logging.info("--- Hikaye Üretim Modülü Başlatıldı ---")
     
-    # Gelen API anahtarlarıyla Gemini'yi başlat
-    if not initialize_gemini(api_keys):
+    # Paylaşılan anahtar servisinden alınan anahtarlarla Gemini'yi başlat
+    if not initialize_gemini(anahtaryoneticisi.get_api_keys(project_id)):
         logging.critical("❌ Gemini API anahtarlarıyla başlatılamadı.")
-        return None, None, title_list
+        return None
 
     generator = CreatorsBlueprintGenerator()
-    
-    # Sıradaki başlığı ve güncel listeyi al
-    video_title, remaining_titles = generator.get_and_process_next_title(title_list)
-    
-    # Eğer işlenecek başlık kalmadıysa, sonucu worker'a bildir
-    if not video_title:
-        return None, None, remaining_titles
 
     # Seçilen başlık için tam metni üret
-    script_content = generator.generate_full_script(video_title)
-    
-    # Metin üretimi başarısız olduysa
+    script_content = generator.generate_full_script(video_title, on_section)
     if not script_content:
-        logging.error(f"❌ '{video_title}' için metin üretilemedi. Başlık tekrar denenecek şekilde listenin sonuna ekleniyor.")
-        # Başarısız olan başlığı listenin sonuna ekleyerek tekrar denenmesini sağla
-        # ve sonucu worker'a bildir.
-        return None, video_title, remaining_titles + [video_title]
+        logging.error(f"❌ '{video_title}' için metin üretilemedi.")
+        return None
 
     # Başarılı metni formatla
     formatted_script = generator.format_script_for_saving(script_content, video_title)
     if not formatted_script:
         logging.error("❌ Metin formatlanamadı.")
-        return None, video_title, remaining_titles
+        return None
 
     logging.info(f"✅ '{video_title}' için tüm işlemler başarıyla tamamlandı.")
-    # Formatlanmış metni, işlenen başlığı ve güncel başlık listesini worker'a döndür
-    return formatted_script, video_title, remaining_titles
+    return formatted_script
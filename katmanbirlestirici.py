@@ -0,0 +1,116 @@
+# katmanbirlestirici.py (v1 - Statik Katman Düzleştirme)
+
+# Videodaki sabit katmanlar (altyazı arka planı, profil fotoğrafı, isim etiketi) render başında
+# bir kez tek bir premultiplied RGBA katmanına düzleştirilir. Her karede yalnızca
+# arka plan + bu katman + o anki altyazı, NumPy ile ve yalnızca katmanın kapladığı bölgede harmanlanır.
+
+import numpy as np
+from PIL import Image
+
+
+class StatikKatman:
+    """Tam kare boyutunda, premultiplied (renk * alfa) float32 RGBA katmanı."""
+
+    def __init__(self, genislik, yukseklik):
+        self.genislik = genislik
+        self.yukseklik = yukseklik
+        self.renk = np.zeros((yukseklik, genislik, 3), dtype=np.float32)
+        self.alfa = np.zeros((yukseklik, genislik, 1), dtype=np.float32)
+        self.kutu = None
+
+    def _bolge(self, x, y, w, h):
+        """Kare dışına taşan kısımları kırpar; (hedef dilimi, kaynak dilimi) döner."""
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.genislik), min(y + h, self.yukseklik)
+        if x0 >= x1 or y0 >= y1:
+            return None, None
+        return (slice(y0, y1), slice(x0, x1)), (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+
+    def _ustune_ekle(self, hedef, renk, alfa):
+        """'over' işlemi: kaynak premultiplied renk/alfa mevcut katmanın üstüne konur."""
+        self.renk[hedef] = renk + self.renk[hedef] * (1.0 - alfa)
+        self.alfa[hedef] = alfa + self.alfa[hedef] * (1.0 - alfa)
+
+    def dikdortgen_ekle(self, x, y, w, h, renk, opaklik=1.0):
+        hedef, _ = self._bolge(x, y, w, h)
+        if hedef is None:
+            return
+        alfa = np.float32(opaklik)
+        self._ustune_ekle(hedef, np.asarray(renk, dtype=np.float32) * alfa, alfa)
+
+    def resim_ekle(self, resim, x, y):
+        """RGB veya RGBA uint8 diziyi (x, y) konumuna ekler."""
+        h, w = resim.shape[:2]
+        hedef, kaynak = self._bolge(x, y, w, h)
+        if hedef is None:
+            return
+        parca = resim[kaynak].astype(np.float32)
+        if parca.shape[2] == 4:
+            alfa = parca[..., 3:] / 255.0
+        else:
+            alfa = np.ones(parca.shape[:2] + (1,), dtype=np.float32)
+        self._ustune_ekle(hedef, parca[..., :3] * alfa, alfa)
+
+    def tamamla(self):
+        """Katmanın boş olmayan bölgesini bulur; kare başına harmanlama yalnızca bu kutuda yapılır."""
+        satirlar = np.flatnonzero(self.alfa.any(axis=(1, 2)))
+        sutunlar = np.flatnonzero(self.alfa.any(axis=(0, 2)))
+        if len(satirlar):
+            self.kutu = (slice(satirlar[0], satirlar[-1] + 1), slice(sutunlar[0], sutunlar[-1] + 1))
+            self._kutu_renk = self.renk[self.kutu].copy()
+            self._kutu_ters_alfa = 1.0 - self.alfa[self.kutu]
+        return self
+
+    def rgba(self):
+        """Katmanı düz (premultiplied olmayan) uint8 RGBA dizisi olarak döndürür."""
+        alfa = self.alfa[..., 0]
+        renk = np.divide(self.renk, self.alfa, out=np.zeros_like(self.renk), where=self.alfa > 0)
+        return np.dstack([renk, alfa * 255.0]).round().clip(0, 255).astype(np.uint8)
+
+    def png_kaydet(self, yol):
+        Image.fromarray(self.rgba(), "RGBA").save(yol)
+        return yol
+
+    def uygula(self, kare):
+        """Katmanı karenin bir kopyasına uygular; harmanlama yalnızca katmanın kutusu içinde yapılır."""
+        kare = np.array(kare, dtype=np.uint8, copy=True)
+        if self.kutu is None:
+            return kare
+        bolge = kare[self.kutu].astype(np.float32)
+        bolge *= self._kutu_ters_alfa
+        bolge += self._kutu_renk
+        kare[self.kutu] = bolge.round().clip(0, 255)
+        return kare
+
+
+class KareBirlestirici:
+    """
+    moviepy 'fl' fonksiyonu olarak kullanılır: arka plan karesine statik katmanı ve
+    altyazı atlasındaki etkin altyazıyı uygular.
+    """
+
+    def __init__(self, statik, atlas=None, altyazi_x=0, altyazi_y=0):
+        self.statik = statik
+        self.atlas = atlas
+        self.altyazi_x = altyazi_x
+        self.altyazi_y = altyazi_y
+
+    def altyazi_uygula(self, kare, t):
+        hucre = self.atlas.hucre(t)
+        if not hucre:
+            return kare
+        h, w = self.atlas.yukseklik, self.atlas.genislik
+        hedef, kaynak = self.statik._bolge(self.altyazi_x, self.altyazi_y, w, h)
+        if hedef is None:
+            return kare
+        alfa = self.atlas.alfa[hucre][kaynak][..., None].astype(np.float32) / 255.0
+        bolge = kare[hedef].astype(np.float32)
+        bolge += (self.atlas.renk_karesi[kaynak] - bolge) * alfa
+        kare[hedef] = bolge.round().clip(0, 255)
+        return kare
+
+    def __call__(self, get_frame, t):
+        kare = self.statik.uygula(get_frame(t))
+        if self.atlas is not None:
+            kare = self.altyazi_uygula(kare, t)
+        return kare
@@ -2,28 +2,37 @@
 
 from __future__ import annotations
 import json
+import hashlib
 import logging
 import sys
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Mapping, Optional
+from typing import Callable, Iterable, Mapping, Optional
 import re
 import os
+import shutil
 
 # --- Gerekli Kütüphaneler ---
 try:
-    import google.generativeai as genai
-    from google.cloud import secretmanager
-    from google.api_core import exceptions as google_exceptions
-    from PIL import Image, ImageDraw, ImageFont
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
 except ImportError:
     print("FATAL: Gerekli kütüphaneler bulunamadı. Lütfen 'requirements.txt' dosyasını kurun.")
     sys.exit(1)
 
+import anahtaryoneticisi
+import geminiistemcisi
+
 # --- Global Değişkenler ---
 API_KEYS = []
-current_api_key_index = 0
-model = None
+MODEL_NAME = "gemini-1.5-pro"
+GENERATION_CONFIG = {"temperature": 0.7, "top_p": 0.9, "top_k": 40}
+# >1 ise tek Gemini çağrısında bu kadar başlık/alt başlık çifti istenir ve hepsi A/B testi için
+# kucuk_resim_1..K.png olarak üretilir (ilk varyant ayrıca kucuk_resim.png olarak da kaydedilir).
+VARIANT_COUNT = int(os.environ.get("KUCUK_RESIM_VARYANT_SAYISI", "1"))
+VARIANT_MANIFEST_NAME = "kucuk_resim_manifest.json"
 
 # --- Kanal Kimliği ve Stil Ayarları ---
 @dataclass(frozen=True)
@@ -56,6 +65,11 @@ class ThumbnailStyle:
     max_section_spacing: int = 40
     text_stroke_width: int = 5
     text_stroke_color: tuple = (10, 15, 25)
+    text_shadow: bool = False
+    text_shadow_color: tuple = (0, 0, 0)
+    text_shadow_offset: tuple = (6, 8)
+    text_shadow_blur: int = 8
+    text_shadow_opacity: float = 0.6
 
 STYLE = ThumbnailStyle()
 CHANNEL_NAME = "The Creator's Blueprint"
@@ -66,83 +80,86 @@ logger = logging.getLogger(__name__)
 # --- Gemini API Fonksiyonları (Secret Manager Entegrasyonlu) ---
 
 def load_api_keys_from_secret_manager(project_id: str) -> bool:
-    """API anahtarlarını Secret Manager'dan yükler."""
+    """API anahtarlarını paylaşılan anahtar servisinden (Secret Manager önbelleği) yükler."""
     global API_KEYS
-    if API_KEYS: return True
     try:
-        logger.info("🔄 Gemini API anahtarları Secret Manager'dan okunuyor...")
-        client = secretmanager.SecretManagerServiceClient()
-        name = f"projects/{project_id}/secrets/gemini-api-anahtarlari/versions/latest"
-        response = client.access_secret_version(request={"name": name})
-        payload = response.payload.data.decode("UTF-8")
-        API_KEYS = [line.strip() for line in payload.splitlines() if line.strip()]
-        if not API_KEYS:
-            logger.error("❌ Secret Manager'da 'gemini-api-anahtarlari' secret'ı içinde API anahtarı bulunamadı.")
-            return False
-        logger.info(f"🔑 {len(API_KEYS)} Gemini API anahtarı başarıyla yüklendi.")
-        return True
-    except google_exceptions.NotFound:
-        logger.error(f"❌ Secret Manager'da 'gemini-api-anahtarlari' secret'ı bulunamadı (Proje: {project_id}).")
-        return False
+        API_KEYS = anahtaryoneticisi.get_api_keys(project_id)
     except Exception as e:
-        logger.error(f"❌ Secret Manager'dan anahtar okunurken kritik hata oluştu: {e}")
+        logger.error(f"❌ Gemini API anahtarları alınamadı: {e}")
         return False
-
-def configure_gemini():
-    """Sıradaki API anahtarı ile Gemini'yi yapılandırır."""
-    global current_api_key_index, model
-    if not API_KEYS or current_api_key_index >= len(API_KEYS):
-        logger.error("❌ Kullanılabilir Gemini API anahtarı kalmadı.")
-        return None
+    if not API_KEYS:
+        return False
+    logger.info(f"🔑 {len(API_KEYS)} Gemini API anahtarı kullanıma hazır.")
+    return True
+
+REQUIRED_KEYS = ["BOLD_TITLE", "INTRIGUING_SUBTITLE"]
+
+def parse_thumbnail_json(text: str) -> Mapping[str, str]:
+    """Gemini yanıtındaki JSON'u çözer ve gerekli anahtarları doğrular; geçersizse hata verir."""
+    if not text:
+        raise Exception("Gemini'den boş yanıt alındı.")
+    txt = re.sub(r'^```json\s*|\s*```$', '', text.strip(), flags=re.MULTILINE)
+    result = json.loads(txt)
+    if not all(key in result for key in REQUIRED_KEYS):
+        raise Exception(f"Gemini yanıtında eksik anahtarlar: {set(REQUIRED_KEYS) - set(result.keys())}")
+    return result
+
+def is_valid_thumbnail_json(text: str) -> bool:
     try:
-        api_key = API_KEYS[current_api_key_index]
-        logger.info(f"🔄 API anahtarı {current_api_key_index + 1}/{len(API_KEYS)} deneniyor...")
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        logger.info(f"✅ API anahtarı {current_api_key_index + 1} başarıyla yapılandırıldı.")
-        return model
-    except Exception as e:
-        logger.error(f"❌ API anahtarı {current_api_key_index + 1} ile yapılandırma hatası: {e}")
-        current_api_key_index += 1
-        return configure_gemini()
-
-def ask_gemini(prompt: str) -> Optional[Mapping[str, str]]:
-    """Gemini API çağrısı yapar ve JSON yanıtını doğrular."""
-    global current_api_key_index, model
-    initial_key_index = current_api_key_index
-    while True:
+        parse_thumbnail_json(text)
+        return True
+    except Exception:
+        return False
+
+def parse_variants_json(text: str, variant_count: int) -> list:
+    """
+    Varyant yanıtını ({"VARIANTS": [{...}, ...]}) çözer; her varyant gerekli anahtarları içermeli
+    ve en az 'variant_count' varyant bulunmalıdır. Fazlası atılır; tekrar eden başlıklar tek sayılır.
+    """
+    if not text:
+        raise Exception("Gemini'den boş yanıt alındı.")
+    txt = re.sub(r'^```json\s*|\s*```$', '', text.strip(), flags=re.MULTILINE)
+    variants, seen = [], set()
+    for variant in json.loads(txt).get("VARIANTS", []):
+        if not isinstance(variant, dict) or not all(variant.get(key) for key in REQUIRED_KEYS):
+            continue
+        pair = tuple(str(variant[key]).strip() for key in REQUIRED_KEYS)
+        if pair not in seen:
+            seen.add(pair)
+            variants.append(dict(zip(REQUIRED_KEYS, pair)))
+    if len(variants) < variant_count:
+        raise Exception(f"Gemini yanıtında {variant_count} geçerli varyant bekleniyordu, {len(variants)} bulundu.")
+    return variants[:variant_count]
+
+def ask_gemini(prompt: str, parse: Callable[[str], object] = parse_thumbnail_json):
+    """
+    Gemini API çağrısı yapar ve JSON yanıtını 'parse' ile doğrular.
+    Anahtar seçimi ve kota hataları planlayıcı tarafından yönetilir; geçersiz yanıtta istek,
+    anahtar sayısı kadar tekrar denenir. Aynı prompt için daha önce doğrulanmış bir yanıt
+    varsa yanıt önbelleğinden kullanılır.
+    """
+    def is_valid(text: str) -> bool:
         try:
-            if model is None:
-                model = configure_gemini()
-                if model is None: raise Exception("Yapılandırılacak geçerli API anahtarı kalmadı.")
-            
-            generation_config = {"temperature": 0.7, "top_p": 0.9, "top_k": 40}
-            logger.info("🤖 Gemini'ye thumbnail metni için istek gönderiliyor...")
-            response = model.generate_content(prompt, generation_config=generation_config)
-            
-            if not response.text:
-                raise Exception("Gemini'den boş yanıt alındı.")
-            
-            txt = re.sub(r'^```json\s*|\s*```$', '', response.text.strip(), flags=re.MULTILINE)
-            result = json.loads(txt)
-            
-            required_keys = ["BOLD_TITLE", "INTRIGUING_SUBTITLE"]
-            if not all(key in result for key in required_keys):
-                raise Exception(f"Gemini yanıtında eksik anahtarlar: {set(required_keys) - set(result.keys())}")
-            
-            return result
-        except (google_exceptions.ResourceExhausted, google_exceptions.PermissionDenied) as e:
-            logger.warning(f"⚠️ API anahtarı {current_api_key_index + 1} ile ilgili sorun: {type(e).__name__}. Anahtar değiştiriliyor...")
-            current_api_key_index = (current_api_key_index + 1) % len(API_KEYS)
-            model = None
-            if current_api_key_index == initial_key_index: raise Exception(f"Tüm API anahtarları denendi ve hepsi başarısız oldu. Son hata: {e}") from e
+            parse(text)
+            return True
+        except Exception:
+            return False
+
+    last_error = None
+    for attempt in range(max(1, len(API_KEYS))):
+        logger.info("🤖 Gemini'ye thumbnail metni için istek gönderiliyor...")
+        response = geminiistemcisi.generate_cached(prompt, MODEL_NAME, GENERATION_CONFIG, API_KEYS, is_valid)
+        if response is None:
+            raise Exception(f"Tüm API anahtarları denendi ve hepsi başarısız oldu. Son hata: {last_error}")
+        try:
+            return parse(response.text)
         except Exception as exc:
-            logger.error(f"❌ API Anahtarı {current_api_key_index + 1} ile beklenmedik API hatası: {exc}")
-            current_api_key_index = (current_api_key_index + 1) % len(API_KEYS)
-            model = None
-            if current_api_key_index == initial_key_index: raise Exception(f"Tüm API anahtarları denendi. Son hata: {exc}") from exc
+            last_error = exc
+            logger.error(f"❌ Gemini yanıtı kullanılamadı (deneme {attempt + 1}): {exc}")
+    raise Exception(f"Tüm denemeler başarısız oldu. Son hata: {last_error}")
 
 # --- Yapay Zeka Komut Üretimi ---
+@lru_cache(maxsize=8)
 def clean_script_text(script: str) -> str:
     if not script or not isinstance(script, str): return "A guide for creative professionals."
     script = re.sub(r'^=+\n(.+\n)+=+\n', '', script, flags=re.MULTILINE)
@@ -178,13 +195,168 @@ Script to analyze:
 ---
 """.strip()
 
+# --- Font Önbelleği ---
+@lru_cache(maxsize=None)
+def resolve_font_path(font_path: Path = STYLE.font_path) -> Optional[str]:
+    font_options = [
+        Path(font_path), Path("LiberationSans-Bold.ttf"),
+        Path("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"),
+        Path("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+        Path("Arial.ttf"),
+    ]
+    font_path_str = next((str(p) for p in font_options if p.exists()), None)
+    if font_path_str:
+        logger.info(f"✅ Thumbnail fontu bulundu: {font_path_str}")
+    else:
+        logger.error("❌ Hiçbir TrueType font bulunamadı! Varsayılan font kullanılıyor.")
+    return font_path_str
+
+@lru_cache(maxsize=None)
+def load_font(size: int, font_path: Path = STYLE.font_path):
+    """Fontu boyut başına bir kez diskten yükler; sonraki çağrılar aynı nesneyi döndürür."""
+    font_path_str = resolve_font_path(font_path)
+    if font_path_str:
+        try:
+            return ImageFont.truetype(font_path_str, size)
+        except (IOError, OSError):
+            logger.error(f"❌ Font yüklenemedi: {font_path_str}. Varsayılan font kullanılıyor.")
+    return ImageFont.load_default()
+
+class GlyphTable:
+    """
+    Bir font için karakter başına (ilerleme genişliği, üst, alt) tablosu. Satır genişliği ve yüksekliği
+    karakter değerlerinden toplanır; her karakter font başına yalnızca bir kez ölçülür.
+    """
+    def __init__(self, font) -> None:
+        self.font = font
+        self._glyphs = {}
+
+    def glyph(self, ch: str) -> tuple:
+        metrics = self._glyphs.get(ch)
+        if metrics is None:
+            _, top, _, bottom = self.font.getbbox(ch)
+            metrics = self._glyphs[ch] = (self.font.getlength(ch), top, bottom)
+        return metrics
+
+    def width(self, text: str) -> float:
+        return sum(self.glyph(ch)[0] for ch in text)
+
+    def height(self, text: str) -> int:
+        extents = [self.glyph(ch) for ch in text if not ch.isspace()]
+        if not extents:
+            return 0
+        return max(bottom for _, _, bottom in extents) - min(top for _, top, _ in extents)
+
+    def wrap(self, text: str, max_width: int) -> list[str]:
+        """
+        Metni tek geçişte satırlara böler: kelime genişlikleri tablodan bir kez hesaplanır, satır genişliği
+        yürüyen toplamla izlenir. Tek başına sığmayan bir kelime kendi satırına yerleştirilir.
+        """
+        lines, line, line_width = [], [], 0.0
+        space = self.glyph(" ")[0]
+        for word in (text or "").split():
+            word_width = self.width(word)
+            if line and line_width + space + word_width > max_width:
+                lines.append(" ".join(line))
+                line, line_width = [word], word_width
+            else:
+                line_width += (space if line else 0) + word_width
+                line.append(word)
+        if line:
+            lines.append(" ".join(line))
+        return lines
+
+@lru_cache(maxsize=None)
+def glyph_table(font) -> GlyphTable:
+    # Fontlar load_font ile paylaşıldığından tablo da font nesnesi başına bir kez oluşur.
+    return GlyphTable(font)
+
+@lru_cache(maxsize=None)
+def stroke_offsets(stroke_width: int) -> tuple:
+    """Kontur için kaydırmalar: yarıçapı stroke_width olan diskin (kenar hariç) içindeki tüm (dx, dy) noktaları."""
+    return tuple(
+        (dx, dy)
+        for dx in range(-stroke_width, stroke_width + 1)
+        for dy in range(-stroke_width, stroke_width + 1)
+        if dx * dx + dy * dy < stroke_width * stroke_width
+    )
+
+def stroke_mask(text: str, font, stroke_width: int) -> tuple:
+    """
+    Metnin konturunu tek bir rasterleştirmeyle üretir. Glif kapsama maskesi disk içindeki her kaydırmaya
+    taşınır ve alfa, aynı rengin her kaydırmada üst üste çizilmesiyle aynı sonucu verecek şekilde
+    1 - Π(1 - a) olarak birleştirilir. (maske, metin başlangıcına göre sol üst köşe) döndürür.
+    """
+    left, top, right, bottom = font.getbbox(text)
+    r = stroke_width
+    glyphs = Image.new("L", (right - left + 2 * r, bottom - top + 2 * r))
+    ImageDraw.Draw(glyphs).text((r - left, r - top), text, font=font, fill=255)
+    coverage = np.asarray(glyphs, dtype=np.float32) / 255.0
+    h, w = coverage.shape
+    transmittance = np.ones((h + 2 * r, w + 2 * r), dtype=np.float32)
+    transmittance[r:r + h, r:r + w] -= coverage
+    remaining = np.ones_like(coverage)
+    for dx, dy in stroke_offsets(r):
+        remaining *= transmittance[r - dy:r - dy + h, r - dx:r - dx + w]
+    mask = Image.fromarray(np.rint((1.0 - remaining) * 255.0).astype(np.uint8), "L")
+    return mask, (left - r, top - r)
+
+@dataclass
+class ThumbnailLayout:
+    """Yerleşim çözücüsünün sonucu: seçilen boyutlar, satırlar ve satır yükseklikleri."""
+    title_size: int
+    subtitle_size: int
+    line_spacing: int
+    section_spacing: int
+    title_lines: list = field(default_factory=list)
+    subtitle_lines: list = field(default_factory=list)
+    title_line_heights: list = field(default_factory=list)
+    subtitle_line_heights: list = field(default_factory=list)
+    fill_ratio: float = 0.0
+
+def build_variants_prompt(script: str, variant_count: int) -> str:
+    clean_script = clean_script_text(script)
+    return f"""
+Analyze this script from the YouTube channel 'The Creator's Blueprint' and create {variant_count} DIFFERENT candidate text pairs for a high-click-through-rate thumbnail. The candidates will be A/B tested against each other.
+Your host is Leo, an empathetic guide for American creative professionals. The tone should be professional, intriguing, and empowering.
+
+Each candidate has 2 text sections:
+1.  **BOLD_TITLE:** A powerful and concise phrase that grabs attention. Should be 3-5 words. It should summarize the core promise or the biggest pain point.
+2.  **INTRIGUING_SUBTITLE:** A question or statement that creates curiosity and highlights the core problem or promise of the video. Should be 6-12 words.
+
+Each candidate must take a clearly different angle (e.g. pain point, promise, curiosity gap, contrarian claim, urgency).
+
+CRITICAL REQUIREMENTS:
+-   The text must be in ALL CAPS.
+-   Do NOT use any special characters like asterisks (*).
+-   Return ONLY a valid JSON object with a "VARIANTS" list of exactly {variant_count} objects, each with keys "BOLD_TITLE" and "INTRIGUING_SUBTITLE".
+
+Example Output:
+{{
+  "VARIANTS": [
+    {{"BOLD_TITLE": "THE ARTIST MYTH", "INTRIGUING_SUBTITLE": "WHY YOUR PASSION ISN'T PAYING THE BILLS (YET)"}},
+    {{"BOLD_TITLE": "STOP WORKING FOR FREE", "INTRIGUING_SUBTITLE": "THE ONE PRICING RULE EVERY CREATIVE IGNORES"}}
+  ]
+}}
+
+Script to analyze:
+---
+{clean_script}
+---
+""".strip()
+
 # --- Thumbnail Oluşturma Sınıfı ---
 class ThumbnailCanvas:
-    def __init__(self, style: ThumbnailStyle = STYLE) -> None:
+    def __init__(self, style: ThumbnailStyle = STYLE, base_image: Optional[Image.Image] = None) -> None:
         self.style = style
-        self.image = Image.new("RGB", (style.width, style.height))
-        self.draw = ImageDraw.Draw(self.image)
-        self._create_gradient_background()
+        if base_image is not None:
+            # Gradyan ve profil fotoğrafı hazır bir taban katmandan kopyalanır.
+            self.image = base_image.copy()
+            self.draw = ImageDraw.Draw(self.image)
+        else:
+            self.image = Image.new("RGB", (style.width, style.height))
+            self.draw = ImageDraw.Draw(self.image)
+            self._create_gradient_background()
         self.current_title_size = style.base_title_font_size
         self.current_subtitle_size = style.base_subtitle_font_size
         self.current_line_spacing = style.base_line_spacing
@@ -192,29 +364,19 @@ class ThumbnailCanvas:
         self._load_fonts()
 
     def _create_gradient_background(self) -> None:
-        for y in range(self.style.height):
-            ratio = y / self.style.height
-            r = int(self.style.bg_primary[0] * (1 - ratio) + self.style.bg_secondary[0] * ratio)
-            g = int(self.style.bg_primary[1] * (1 - ratio) + self.style.bg_secondary[1] * ratio)
-            b = int(self.style.bg_primary[2] * (1 - ratio) + self.style.bg_secondary[2] * ratio)
-            self.draw.line([(0, y), (self.style.width, y)], fill=(r, g, b))
+        # Gradyan yalnızca dikey yönde değişir: 1 piksel genişliğinde bir sütun hesaplanıp yatayda uzatılır.
+        column = Image.new("RGB", (1, self.style.height))
+        column.putdata([
+            tuple(int(p * (1 - y / self.style.height) + s * (y / self.style.height))
+                  for p, s in zip(self.style.bg_primary, self.style.bg_secondary))
+            for y in range(self.style.height)
+        ])
+        self.image.paste(column.resize((self.style.width, self.style.height), Image.Resampling.NEAREST))
 
     def _load_fonts(self) -> None:
-        font_options = [
-            Path(self.style.font_path), Path("LiberationSans-Bold.ttf"),
-            Path("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"),
-            Path("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
-            Path("Arial.ttf"),
-        ]
-        try:
-            font_path_str = next(str(p) for p in font_options if p.exists())
-            self.font_title = ImageFont.truetype(font_path_str, self.current_title_size)
-            self.font_subtitle = ImageFont.truetype(font_path_str, self.current_subtitle_size)
-            self.font_tag = ImageFont.truetype(font_path_str, self.style.tag_font_size)
-            logger.info(f"✅ Fontlar başarıyla yüklendi: {font_path_str}")
-        except (StopIteration, IOError, OSError):
-            logger.error("❌ Hiçbir TrueType font bulunamadı! Varsayılan font kullanılıyor.")
-            self.font_title = self.font_subtitle = self.font_tag = ImageFont.load_default()
+        self.font_title = load_font(self.current_title_size, self.style.font_path)
+        self.font_subtitle = load_font(self.current_subtitle_size, self.style.font_path)
+        self.font_tag = load_font(self.style.tag_font_size, self.style.font_path)
 
     def _get_text_size(self, text, font):
         if not text: return 0, 0
@@ -225,68 +387,106 @@ class ThumbnailCanvas:
             return self.draw.textsize(text, font=font)
 
     def _wrap_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[str]:
-        if not text: return []
-        lines = []
-        words = text.split()
-        while words:
-            line = ''
-            while words and self._get_text_size(line + words[0], font)[0] <= max_width:
-                line += (words.pop(0) + ' ')
-            lines.append(line.strip())
-        return lines
+        return glyph_table(font).wrap(text, max_width)
 
     def _draw_text_with_outline(self, pos, text, font, fill_color, stroke_color=None, stroke_width=None):
         x, y = pos
         stroke_width = stroke_width or self.style.text_stroke_width
         stroke_color = stroke_color or self.style.text_stroke_color
-        for dx in range(-stroke_width, stroke_width + 1):
-            for dy in range(-stroke_width, stroke_width + 1):
-                if dx*dx + dy*dy >= stroke_width*stroke_width:
-                    continue
-                self.draw.text((x+dx, y+dy), text, font=font, fill=stroke_color)
+        if text.strip():
+            mask, (mask_x, mask_y) = stroke_mask(text, font, stroke_width)
+            if self.style.text_shadow:
+                self._draw_shadow(mask, (x + mask_x, y + mask_y))
+            self.image.paste(stroke_color, (x + mask_x, y + mask_y), mask)
         self.draw.text((x, y), text, font=font, fill=fill_color)
 
+    def _draw_shadow(self, mask, pos) -> None:
+        """Kontur maskesinin bulanıklaştırılmış, kaydırılmış ve saydamlaştırılmış kopyasını gölge olarak çizer."""
+        blur = self.style.text_shadow_blur
+        shadow = Image.new("L", (mask.width + 2 * blur, mask.height + 2 * blur))
+        shadow.paste(mask, (blur, blur))
+        if blur:
+            shadow = shadow.filter(ImageFilter.GaussianBlur(blur / 2))
+        shadow = shadow.point(lambda v: int(v * self.style.text_shadow_opacity))
+        dx, dy = self.style.text_shadow_offset
+        self.image.paste(self.style.text_shadow_color, (pos[0] - blur + dx, pos[1] - blur + dy), shadow)
+
     def _calculate_total_height_needed(self, title_lines: list, subtitle_lines: list) -> int:
         tag_height_with_margin = 60 
         total_height = self.style.top_margin + tag_height_with_margin
         if title_lines:
-            total_height += len(title_lines) * (self._get_text_size("A", self.font_title)[1] + self.current_line_spacing)
+            total_height += len(title_lines) * (glyph_table(self.font_title).height("A") + self.current_line_spacing)
             total_height += self.current_section_spacing
         if subtitle_lines:
-            total_height += len(subtitle_lines) * (self._get_text_size("A", self.font_subtitle)[1] + self.current_line_spacing)
+            total_height += len(subtitle_lines) * (glyph_table(self.font_subtitle).height("A") + self.current_line_spacing)
         total_height += self.style.bottom_margin
         return total_height
-        
-    def _scale_sizes(self, factor: float) -> None:
-        self.current_title_size = int(self.current_title_size * factor)
-        self.current_subtitle_size = int(self.current_subtitle_size * factor)
 
-    def _scale_spacing(self, factor: float) -> None:
-        self.current_line_spacing = int(self.current_line_spacing * factor)
-        self.current_section_spacing = int(self.current_section_spacing * factor)
-        
-    def _clamp_and_reload_fonts(self):
-        self.current_title_size = max(self.style.min_title_font_size, min(self.style.max_title_font_size, self.current_title_size))
-        self.current_subtitle_size = max(self.style.min_subtitle_font_size, min(self.style.max_subtitle_font_size, self.current_subtitle_size))
-        self.current_line_spacing = max(self.style.min_line_spacing, min(self.style.max_line_spacing, self.current_line_spacing))
-        self.current_section_spacing = max(self.style.min_section_spacing, min(self.style.max_section_spacing, self.current_section_spacing))
+    def _apply_title_size(self, title_size: int) -> None:
+        """Başlık boyutunu seçer; alt başlık ve boşluklar temel değerlerine göre aynı oranda ölçeklenip sınırlanır."""
+        style = self.style
+        factor = title_size / style.base_title_font_size
+        clamp = lambda value, low, high: max(low, min(high, int(value)))
+        self.current_title_size = clamp(title_size, style.min_title_font_size, style.max_title_font_size)
+        self.current_subtitle_size = clamp(style.base_subtitle_font_size * factor, style.min_subtitle_font_size, style.max_subtitle_font_size)
+        self.current_line_spacing = clamp(style.base_line_spacing * factor, style.min_line_spacing, style.max_line_spacing)
+        self.current_section_spacing = clamp(style.base_section_spacing * factor, style.min_section_spacing, style.max_section_spacing)
         self._load_fonts()
 
-    def _adjust_for_perfect_fill(self, bold_title: str, intriguing_subtitle: str, text_area_width: int) -> None:
+    def _measure_layout(self, bold_title: str, intriguing_subtitle: str, text_area_width: int, title_size: int) -> tuple:
+        """
+        Verilen başlık boyutundaki yerleşimi (satırlar, satır yükseklikleri, doluluk oranı) ve tek başına
+        satıra sığmayan bir kelime olup olmadığını döndürür.
+        """
+        self._apply_title_size(title_size)
+        title_table, subtitle_table = glyph_table(self.font_title), glyph_table(self.font_subtitle)
+        title_lines = title_table.wrap(bold_title, text_area_width)
+        subtitle_lines = subtitle_table.wrap(intriguing_subtitle, text_area_width)
+        overflow = any(title_table.width(line) > text_area_width for line in title_lines) or \
+            any(subtitle_table.width(line) > text_area_width for line in subtitle_lines)
         target_height = self.style.height - self.style.top_margin - self.style.bottom_margin
-        for _ in range(30):
-            title_lines = self._wrap_text(bold_title, self.font_title, text_area_width)
-            subtitle_lines = self._wrap_text(intriguing_subtitle, self.font_subtitle, text_area_width)
-            current_height = self._calculate_total_height_needed(title_lines, subtitle_lines)
-            height_ratio = current_height / target_height
-            if 0.95 <= height_ratio <= 1.0:
-                logger.info(f"✓ Mükemmel ekran doluluğuna ulaşıldı (Oran: {height_ratio:.2f})")
-                return
-            scaling_factor = 1.025 if height_ratio < 0.95 else 0.975
-            self._scale_sizes(scaling_factor)
-            self._scale_spacing(scaling_factor)
-            self._clamp_and_reload_fonts()
-        logger.warning("⚠️ Mükemmel doluluk oranına ulaşılamadı, en yakın sonuç kullanılıyor.")
+        layout = ThumbnailLayout(
+            title_size=self.current_title_size,
+            subtitle_size=self.current_subtitle_size,
+            line_spacing=self.current_line_spacing,
+            section_spacing=self.current_section_spacing,
+            title_lines=title_lines,
+            subtitle_lines=subtitle_lines,
+            title_line_heights=[title_table.height(line) for line in title_lines],
+            subtitle_line_heights=[subtitle_table.height(line) for line in subtitle_lines],
+            fill_ratio=self._calculate_total_height_needed(title_lines, subtitle_lines) / target_height,
+        )
+        return layout, overflow
+
+    def _adjust_for_perfect_fill(self, bold_title: str, intriguing_subtitle: str, text_area_width: int) -> ThumbnailLayout:
+        """
+        Yüksekliği hedefi aşmayan ve her kelimenin satıra sığdığı en büyük başlık boyutunu ikili aramayla
+        bulur (%95-100 doluluk hedefi).
+        Yükseklik boyutla birlikte arttığından en fazla log2(boyut aralığı) ölçüm yeterlidir.
+        Son başarılı ölçümün yerleşimi yeniden hesaplanmadan döndürülür ve boyutları tuvale uygulanır.
+        """
+        low, high = self.style.min_title_font_size, self.style.max_title_font_size
+        best, best_layout = low, None
+        while low <= high:
+            mid = (low + high) // 2
+            layout, overflow = self._measure_layout(bold_title, intriguing_subtitle, text_area_width, mid)
+            if layout.fill_ratio <= 1.0 and not overflow:
+                best, best_layout, low = mid, layout, mid + 1
+            else:
+                high = mid - 1
+
+        if best_layout is None:
+            # Hiçbir boyut sığmadı; en küçük boyutun yerleşimi kullanılır.
+            best_layout, _ = self._measure_layout(bold_title, intriguing_subtitle, text_area_width, best)
+        elif self.current_title_size != best_layout.title_size:
+            # Son denenen boyut sığmadıysa fontlar seçilen boyuta geri alınır (fontlar önbellekten gelir).
+            self._apply_title_size(best)
+
+        if 0.95 <= best_layout.fill_ratio <= 1.0:
+            logger.info(f"✓ Mükemmel ekran doluluğuna ulaşıldı (Oran: {best_layout.fill_ratio:.2f}, başlık {best}px)")
+        else:
+            logger.warning(f"⚠️ Mükemmel doluluk oranına ulaşılamadı (Oran: {best_layout.fill_ratio:.2f}), en yakın sonuç kullanılıyor.")
+        return best_layout
 
     def _draw_highlighted_title(self, pos, line: str, font):
         x, y = pos
@@ -330,22 +530,81 @@ class ThumbnailCanvas:
     def compose(self, bold_title: str, intriguing_subtitle: str, profile_pic_path: str):
         self._draw_profile_section(profile_pic_path)
         tag_height = self._draw_target_audience_tag()
-        
+        self.compose_text(bold_title, intriguing_subtitle, tag_height)
+
+    def compose_text(self, bold_title: str, intriguing_subtitle: str, tag_height: int):
+        """Başlık ve alt başlığı, profil fotoğrafı ve etiketi zaten çizilmiş tuval üzerine yerleştirir."""
         text_area_width = self.style.width - self.style.left_margin - self.style.right_margin
-        self._adjust_for_perfect_fill(bold_title, intriguing_subtitle, text_area_width)
+        layout = self._adjust_for_perfect_fill(bold_title, intriguing_subtitle, text_area_width)
 
         y = self.style.top_margin + tag_height + 20
-        title_lines = self._wrap_text(bold_title, self.font_title, text_area_width)
-        for line in title_lines:
+        for line, line_height in zip(layout.title_lines, layout.title_line_heights):
             self._draw_highlighted_title((self.style.left_margin, y), line, self.font_title)
-            y += self._get_text_size(line, self.font_title)[1] + self.current_line_spacing
+            y += line_height + layout.line_spacing
             
-        y += self.current_section_spacing
+        y += layout.section_spacing
 
-        subtitle_lines = self._wrap_text(intriguing_subtitle, self.font_subtitle, text_area_width)
-        for line in subtitle_lines:
+        for line, line_height in zip(layout.subtitle_lines, layout.subtitle_line_heights):
             self._draw_text_with_outline((self.style.left_margin, y), line, self.font_subtitle, self.style.text_colour)
-            y += self._get_text_size(line, self.font_subtitle)[1] + self.current_line_spacing
+            y += line_height + layout.line_spacing
+        return layout
+
+# --- Toplu Thumbnail Motoru ---
+class ThumbnailEngine:
+    """
+    Videodan videoya değişmeyen taban katmanı (gradyan, profil fotoğrafı, "FOR CREATIVES" etiketi)
+    bir kez oluşturur; her başlık bu katmanın bir kopyası üzerine yalnızca metin çizilerek üretilir.
+    """
+    def __init__(self, profile_pic_path: str, style: ThumbnailStyle = STYLE) -> None:
+        self.style = style
+        canvas = ThumbnailCanvas(style)
+        canvas._draw_profile_section(profile_pic_path)
+        self.tag_height = canvas._draw_target_audience_tag()
+        self.base_image = canvas.image
+
+    def render(self, bold_title: str, intriguing_subtitle: str) -> Image.Image:
+        canvas = ThumbnailCanvas(self.style, base_image=self.base_image)
+        canvas.compose_text(bold_title, intriguing_subtitle, self.tag_height)
+        return canvas.image
+
+    def render_many(self, pairs: Iterable[tuple]) -> list:
+        """(BOLD_TITLE, INTRIGUING_SUBTITLE) çiftlerinin her biri için bir thumbnail üretir."""
+        return [self.render(bold_title, intriguing_subtitle) for bold_title, intriguing_subtitle in pairs]
+
+_engines = {}
+_engines_lock = threading.Lock()
+MAX_CACHED_ENGINES = 4
+
+def get_engine(profile_pic_path: str, style: ThumbnailStyle = STYLE) -> ThumbnailEngine:
+    """
+    Profil fotoğrafının içeriğine göre önbelleğe alınmış motoru döndürür. Fotoğraf her işte geçici bir
+    dizine yeniden indirildiği için anahtar dosya yolu değil, içeriğin özetidir.
+    """
+    try:
+        with open(profile_pic_path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        digest = None
+    key = (style, digest)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = ThumbnailEngine(profile_pic_path, style)
+            if len(_engines) >= MAX_CACHED_ENGINES:
+                _engines.clear()
+            _engines[key] = engine
+        else:
+            logger.info("♻️ Thumbnail taban katmanı önbellekten kullanılıyor.")
+        return engine
+
+def render_thumbnails(pairs: Iterable[tuple], profile_photo_path: str, output_paths: Iterable[str]) -> list:
+    """Birden çok başlığı aynı taban katmandan üretir ve verilen yollara PNG olarak kaydeder."""
+    engine = get_engine(profile_photo_path)
+    saved = []
+    for image, path in zip(engine.render_many(pairs), output_paths):
+        image.save(path, "PNG", quality=95)
+        saved.append(path)
+    return saved
 
 # --- Ana İş Akışı Fonksiyonu (BULUT VERSİYONU) ---
 def run_thumbnail_generation(story_text: str, profile_photo_path: str, output_dir: str, worker_project_id: str) -> str:
@@ -378,15 +637,13 @@ def run_thumbnail_generation(story_text: str, profile_photo_path: str, output_di
     logger.info("\n🎨 Thumbnail canvas oluşturuluyor...")
     
     try:
-        canvas = ThumbnailCanvas(STYLE)
-        canvas.compose(
-            bold_title=parts.get("BOLD_TITLE", "YOUR BLUEPRINT"),
-            intriguing_subtitle=parts.get("INTRIGUING_SUBTITLE", "Build a sustainable creative career."),
-            profile_pic_path=profile_photo_path,
-        )
-        
         thumbnail_path = os.path.join(output_dir, "kucuk_resim.png")
-        canvas.image.save(thumbnail_path, "PNG", quality=95)
+        render_thumbnails(
+            [(parts.get("BOLD_TITLE", "YOUR BLUEPRINT"),
+              parts.get("INTRIGUING_SUBTITLE", "Build a sustainable creative career."))],
+            profile_photo_path,
+            [thumbnail_path],
+        )
         logger.info(f"💾 Thumbnail başarıyla kaydedildi: {thumbnail_path}")
         
         file_size = os.path.getsize(thumbnail_path)
@@ -397,3 +654,54 @@ def run_thumbnail_generation(story_text: str, profile_photo_path: str, output_di
     except Exception as e:
         logger.error(f"❌ Thumbnail oluşturma/kaydetme aşamasında kritik hata: {e}", exc_info=True)
         raise
+
+def run_thumbnail_variant_generation(story_text: str, profile_photo_path: str, output_dir: str,
+                                     worker_project_id: str, variant_count: int = VARIANT_COUNT) -> tuple:
+    """
+    A/B testi için tek bir Gemini çağrısıyla 'variant_count' başlık çifti alır ve hepsini aynı taban
+    katmandan toplu olarak üretir.
+
+    Returns:
+        (varsayılan küçük resim yolu [kucuk_resim.png, ilk varyantın kopyası],
+         varyant yolları [kucuk_resim_1..K.png], manifest yolu)
+    """
+    logger.info(f"--- Küçük Resim Varyant Üretimi Başlatıldı ({variant_count} varyant) ---")
+
+    if not load_api_keys_from_secret_manager(worker_project_id):
+        raise Exception("Thumbnail üretimi için Gemini API anahtarları yüklenemedi.")
+
+    prompt = build_variants_prompt(story_text, variant_count)
+    try:
+        variants = ask_gemini(prompt, lambda text: parse_variants_json(text, variant_count))
+    except Exception as e:
+        logger.error(f"❌ Tüm denemelere rağmen Gemini ile geçerli varyantlar üretilemedi. Hata: {e}")
+        raise
+
+    for i, variant in enumerate(variants, 1):
+        logger.info(f"  #{i} BOLD_TITLE: {variant['BOLD_TITLE']} | INTRIGUING_SUBTITLE: {variant['INTRIGUING_SUBTITLE']}")
+
+    try:
+        file_names = [f"kucuk_resim_{i}.png" for i in range(1, len(variants) + 1)]
+        thumbnail_paths = render_thumbnails(
+            [(v["BOLD_TITLE"], v["INTRIGUING_SUBTITLE"]) for v in variants],
+            profile_photo_path,
+            [os.path.join(output_dir, name) for name in file_names],
+        )
+        default_path = os.path.join(output_dir, "kucuk_resim.png")
+        shutil.copyfile(thumbnail_paths[0], default_path)
+
+        manifest = {
+            "default": "kucuk_resim.png",
+            "default_variant": file_names[0],
+            "model": MODEL_NAME,
+            "variants": [{"file": name, **variant} for name, variant in zip(file_names, variants)],
+        }
+        manifest_path = os.path.join(output_dir, VARIANT_MANIFEST_NAME)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logger.info(f"💾 {len(thumbnail_paths)} thumbnail varyantı ve manifest kaydedildi: {output_dir}")
+        return default_path, thumbnail_paths, manifest_path
+
+    except Exception as e:
+        logger.error(f"❌ Thumbnail varyantlarını oluşturma/kaydetme aşamasında kritik hata: {e}", exc_info=True)
+        raise
@@ -14,6 +14,9 @@ import googleilesesolustur
 # profilfotoolusturur ve profilfotonunarkasinisiler artık kullanılmıyor
 import videoyapar
 import kucukresimolusturur
+import baslikkuyrugu
+import arkaplanonbellegi
+import yuklemeyoneticisi
 
 # --- TEMEL AYARLAR ---
 logging.basicConfig(
@@ -39,6 +42,8 @@ def video_fabrikasi_baslat():
     logging.info(f"🚀 Yeni üretim süreci başlatıldı. Geçici klasör: {temp_dir}")
     
     story_title = "" 
+    kira = None
+    yuklemeler = None
     
     try:
         # ==============================================================================
@@ -46,21 +51,19 @@ def video_fabrikasi_baslat():
         # ==============================================================================
         storage_client = storage.Client()
         kaynak_bucket = storage_client.bucket(KAYNAK_BUCKET_ADI)
-        titles_blob = kaynak_bucket.blob("creator_blueprint_titles.txt")
-        
-        if not titles_blob.exists():
-            logging.warning("İşlenecek yeni konu bulunamadı (creator_blueprint_titles.txt yok). Üretim bandı durduruldu.")
-            return jsonify({"status": "finished", "message": "No new topics to process."}), 200
+        kuyruk = baslikkuyrugu.BaslikKuyrugu(storage_client, KAYNAK_BUCKET_ADI)
+        kira = kuyruk.al()
+        if not kira and kuyruk.eski_listeyi_aktar():
+            kira = kuyruk.al()
 
-        all_titles = titles_blob.download_as_text(encoding="utf-8").strip().splitlines()
-        if not all_titles:
-            logging.warning("İşlenecek yeni konu bulunamadı (dosya boş). Üretim bandı durduruldu.")
+        if not kira:
+            logging.warning("İşlenecek yeni konu bulunamadı (başlık kuyruğu boş). Üretim bandı durduruldu.")
             return jsonify({"status": "finished", "message": "No new topics to process."}), 200
 
-        story_title = all_titles[0]
-        remaining_titles = "\n".join(all_titles[1:])
-        titles_blob.upload_from_string(remaining_titles, content_type="text/plain; charset=utf-8")
-        logging.info(f"🔹 '{story_title}' başlığı GCS'den alındı.")
+        story_title = kira.baslik
+        safe_folder_name = "".join(c if c.isalnum() or c in " -_" else "_" for c in story_title)
+        # Çıktılar, üretildikleri adım biter bitmez arka planda yüklenmeye başlar.
+        yuklemeler = yuklemeyoneticisi.YuklemeYoneticisi(storage_client.bucket(CIKTI_BUCKET_ADI), safe_folder_name)
 
         # ==============================================================================
         # ADIM 2: HİKAYE ÜRETİMİ
@@ -75,17 +78,20 @@ def video_fabrikasi_baslat():
         with open(hikaye_path, "w", encoding="utf-8") as f:
             f.write(formatted_text)
         logging.info(f"💾 Hikaye geçici olarak kaydedildi.")
+        yuklemeler.ekle("hikaye.txt", hikaye_path)
 
         # ==============================================================================
         # ADIM 3: SESLENDİRME VE ALTYAZI
         # ==============================================================================
         logging.info("[ADIM 3/7] Seslendirme ve altyazı üretimi başlıyor...")
-        audio_file_path, srt_file_path = googleilesesolustur.run_audio_and_srt_process(
+        audio_file_path, srt_file_path, teslim_ses_path = googleilesesolustur.run_audio_and_srt_process(
             story_text=formatted_text,
             output_dir=temp_dir,
             project_id=PROJECT_ID
         )
         logging.info("✅ Ses ve altyazı başarıyla oluşturuldu.")
+        yuklemeler.ekle("altyazi.srt", srt_file_path)
+        yuklemeler.ekle(os.path.basename(teslim_ses_path), teslim_ses_path)
         
         # ==============================================================================
         # ADIM 4: GEREKLİ GÖRSEL VARLIKLARI İNDİRME
@@ -115,6 +121,7 @@ def video_fabrikasi_baslat():
             worker_project_id=PROJECT_ID
         )
         logging.info("✅ YouTube küçük resmi başarıyla oluşturuldu.")
+        yuklemeler.ekle("kucuk_resim.png", final_thumbnail_path)
         
         # ==============================================================================
         # ADIM 6: VİDEO BİRLEŞTİRME
@@ -122,40 +129,29 @@ def video_fabrikasi_baslat():
         logging.info("[ADIM 6/7] Video birleştirme işlemi başlıyor...")
         
         # Arka plan videosu indirme
-        bg_video_path = get_random_background_video(storage_client, temp_dir)
-
-        final_video_path = videoyapar.run_video_creation(
-            bg_video_path=bg_video_path,
-            audio_path=audio_file_path,
-            srt_path=srt_file_path,
-            profile_photo_path=leo_photo_path,
-            output_dir=temp_dir
-        )
+        bg_video_path = get_random_background_video(storage_client)
+
+        try:
+            final_video_path = videoyapar.run_video_creation(
+                bg_video_path=bg_video_path,
+                audio_path=audio_file_path,
+                srt_path=srt_file_path,
+                profile_photo_path=leo_photo_path,
+                output_dir=temp_dir
+            )
+        finally:
+            arkaplanonbellegi.onbellek_al(storage_client, KAYNAK_BUCKET_ADI).birak(bg_video_path)
         logging.info("✅ Video başarıyla birleştirildi.")
 
         # ==============================================================================
         # ADIM 7: PAKETLEME VE TESLİMAT (CLOUD STORAGE'A YÜKLEME)
         # ==============================================================================
         logging.info("[ADIM 7/7] Üretilen dosyalar Cloud Storage'a yükleniyor...")
-        cikti_bucket = storage_client.bucket(CIKTI_BUCKET_ADI)
-        safe_folder_name = "".join(c if c.isalnum() or c in " -_" else "_" for c in story_title)
-
-        files_to_upload = {
-            "nihai_video.mp4": final_video_path,
-            "kucuk_resim.png": final_thumbnail_path,
-            "altyazi.srt": srt_file_path,
-            "ses.wav": audio_file_path,
-            "hikaye.txt": hikaye_path
-        }
-
-        for filename, local_path in files_to_upload.items():
-            if os.path.exists(local_path):
-                blob_path = f"{safe_folder_name}/{filename}"
-                blob = cikti_bucket.blob(blob_path)
-                blob.upload_from_filename(local_path)
-                logging.info(f"  -> Yüklendi: {blob_path}")
+        yuklemeler.ekle("nihai_video.mp4", final_video_path)
+        yuklemeler.bekle()
         
         logging.info("✅ Tüm dosyalar başarıyla Cloud Storage'a yüklendi.")
+        kira.tamamla()
 
         logging.info("🎉🎉🎉 ÜRETİM BANDI BAŞARIYLA TAMAMLANDI! 🎉🎉🎉")
         return jsonify({
@@ -167,6 +163,10 @@ def video_fabrikasi_baslat():
     except Exception as e:
         error_message = f"Üretim bandında '{story_title}' işlenirken hata oluştu: {e}"
         logging.error(error_message, exc_info=True)
+        if yuklemeler:
+            yuklemeler.iptal()
+        if kira:
+            kira.birak()
         return jsonify({
             "status": "error",
             "message": error_message,
@@ -178,17 +178,9 @@ def video_fabrikasi_baslat():
             shutil.rmtree(temp_dir)
             logging.info(f"🧹 Geçici klasör temizlendi: {temp_dir}")
 
-def get_random_background_video(storage_client, temp_dir):
+def get_random_background_video(storage_client):
     try:
-        bucket = storage_client.bucket(KAYNAK_BUCKET_ADI)
-        blobs = list(bucket.list_blobs(prefix="arkaplan_videolari/"))
-        video_blobs = [b for b in blobs if b.name.endswith(".mp4") and b.size > 0]
-        if not video_blobs:
-            raise FileNotFoundError("'arkaplan_videolari' klasöründe video bulunamadı.")
-        random_blob = random.choice(video_blobs)
-        bg_video_path = os.path.join(temp_dir, os.path.basename(random_blob.name))
-        random_blob.download_to_filename(bg_video_path)
-        return bg_video_path
+        return arkaplanonbellegi.onbellek_al(storage_client, KAYNAK_BUCKET_ADI).rastgele_al()
     except Exception as e:
         logging.error(f"❌ Arka plan videosu indirilirken hata: {e}")
         raise
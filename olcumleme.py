@@ -0,0 +1,218 @@
+# olcumleme.py (v1 - Aşama Bazlı Süre ve Kaynak Ölçümü)
+
+import os
+import json
+import time
+import socket
+import logging
+import resource
+import tempfile
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+# --- AYARLAR ---
+# Varsayılan, root olmayan konteynerlerde de yazılabilen geçici dizindir.
+OLCUM_DOSYASI = os.environ.get("OLCUM_DOSYASI", os.path.join(tempfile.gettempdir(), "video_fabrikasi_olcumler.jsonl"))
+RSS_ORNEKLEME_ARALIGI = float(os.environ.get("RSS_ORNEKLEME_ARALIGI", "0.1"))  # saniye
+
+# O an ölçülen iş; aşama bloğuna girildiğinde ayarlanır. Modüller API çağrılarını ve aktarılan
+# baytları, işi parametre olarak taşımadan bu değişken üzerinden kaydeder.
+_aktif_olcum = contextvars.ContextVar("aktif_olcum", default=None)
+
+
+def _rss_mb():
+    """Sürecin o anki bellek kullanımı (MB)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _alt_surec_cpu():
+    kullanim = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return kullanim.ru_utime + kullanim.ru_stime
+
+
+class _RssOrnekleyici:
+    """
+    Bir işin RSS'ini tek bir arka plan iş parçacığında örnekler. Her aşama bir pencere açar; örnekleyici
+    açık tüm pencerelerin tepe değerini günceller. İş parçacığı yalnızca en az bir pencere açıkken çalışır.
+    """
+
+    def __init__(self, aralik: float = RSS_ORNEKLEME_ARALIGI):
+        self.aralik = aralik
+        self._pencereler = {}
+        self._sayac = 0
+        self._kilit = threading.Lock()
+        self._durdur = None
+        self._is = None
+
+    def _dongu(self, durdur: threading.Event):
+        while not durdur.wait(self.aralik):
+            rss = _rss_mb()
+            if rss is None:
+                continue
+            with self._kilit:
+                for pencere, tepe in self._pencereler.items():
+                    if rss > tepe:
+                        self._pencereler[pencere] = rss
+
+    def ac(self) -> tuple:
+        """Yeni bir pencere açar; (pencere, başlangıç RSS'i) döndürür."""
+        rss = _rss_mb() or 0.0
+        with self._kilit:
+            self._sayac += 1
+            pencere = self._sayac
+            self._pencereler[pencere] = rss
+            if self._is is None:
+                self._durdur = threading.Event()
+                self._is = threading.Thread(target=self._dongu, args=(self._durdur,), name="rss-ornekleme", daemon=True)
+                self._is.start()
+        return pencere, rss
+
+    def kapat(self, pencere) -> float:
+        """Pencereyi kapatır ve pencere boyunca görülen tepe RSS'i döndürür."""
+        rss = _rss_mb() or 0.0
+        durdurulacak = None
+        with self._kilit:
+            tepe = max(self._pencereler.pop(pencere), rss)
+            if not self._pencereler:
+                durdurulacak, self._is = self._is, None
+                self._durdur.set()
+        if durdurulacak is not None:
+            durdurulacak.join()
+        return tepe
+
+
+class IsOlcumu:
+    """
+    Bir başlığın üretimi boyunca aşama sürelerini, kaynak kullanımını ve API çağrılarını toplar.
+    Aşama başına yalnızca o iş parçacığının CPU'su kaydedilir; süreç ve alt süreç (ffmpeg) CPU'su
+    iş başına bir kez raporlanır. 'surec_paylasimli' True ise (pipeline modunda başka bir başlık aynı
+    süreçte eşzamanlı işlenir) süreç genelindeki değerler bu işe atfedilemez olarak işaretlenir.
+    """
+
+    def __init__(self, baslik: str, surec_paylasimli: bool = False):
+        self.baslik = baslik
+        self.surec_paylasimli = surec_paylasimli
+        self.baslangic = time.time()
+        self._islem0, self._alt0 = time.process_time(), _alt_surec_cpu()
+        self.asamalar = {}
+        self.api_cagrilari = {}
+        self.baytlar = {"indirilen": 0, "yuklenen": 0}
+        self.ekstra = {}
+        self.durum = "devam ediyor"
+        self.hata = None
+        self._kilit = threading.Lock()
+        self._rss = _RssOrnekleyici()
+
+    @contextmanager
+    def asama(self, ad: str):
+        """
+        Bloğun duvar süresini, iş parçacığının CPU süresini ve bellek kullanımını 'ad' aşaması olarak kaydeder.
+        Tepe RSS, işin tek örnekleyicisinin aşama boyunca gördüğü en yüksek değerdir; 'tepe_artis_mb' bunun aşama
+        başındaki RSS'in ne kadar üzerine çıktığını gösterir. RSS süreç geneli olduğundan pipeline modunda
+        eşzamanlı işin belleğini de içerir.
+        """
+        token = _aktif_olcum.set(self)
+        duvar0, parcacik0 = time.perf_counter(), time.thread_time()
+        pencere, rss_baslangic = self._rss.ac()
+        hata = None
+        try:
+            yield self
+        except Exception as e:
+            hata = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _aktif_olcum.reset(token)
+            tepe = self._rss.kapat(pencere)
+            kayit = {
+                "duvar_s": round(time.perf_counter() - duvar0, 3),
+                "cpu_is_parcacigi_s": round(time.thread_time() - parcacik0, 3),
+                "rss_mb": round(_rss_mb() or 0, 1),
+                "tepe_rss_mb": round(tepe, 1),
+                "tepe_artis_mb": round(tepe - rss_baslangic, 1),
+            }
+            if hata:
+                kayit["hata"] = hata
+            with self._kilit:
+                self.asamalar[ad] = kayit
+            logging.info(f"⏱️ [{self.baslik}] '{ad}' aşaması {kayit['duvar_s']:.1f}s sürdü (CPU: {kayit['cpu_is_parcacigi_s']:.1f}s, tepe RSS artışı: {kayit['tepe_artis_mb']:.0f} MB).")
+
+    def api_cagrisi(self, ad: str, sure: float, basarili: bool = True):
+        with self._kilit:
+            kayit = self.api_cagrilari.setdefault(ad, {"sayi": 0, "basarisiz": 0, "toplam_s": 0.0, "en_uzun_s": 0.0})
+            kayit["sayi"] += 1
+            kayit["basarisiz"] += 0 if basarili else 1
+            kayit["toplam_s"] = round(kayit["toplam_s"] + sure, 3)
+            kayit["en_uzun_s"] = round(max(kayit["en_uzun_s"], sure), 3)
+
+    def bayt(self, yon: str, sayi: int):
+        with self._kilit:
+            self.baytlar[yon] = self.baytlar.get(yon, 0) + int(sayi)
+
+    def bitir(self, durum: str, hata: Optional[str] = None):
+        self.durum = durum
+        self.hata = hata
+
+    def kayit(self) -> dict:
+        with self._kilit:
+            return {
+                "baslik": self.baslik,
+                "makine": socket.gethostname(),
+                "baslangic": datetime.fromtimestamp(self.baslangic, timezone.utc).isoformat(),
+                "toplam_s": round(time.time() - self.baslangic, 3),
+                "durum": self.durum,
+                "hata": self.hata,
+                "asamalar": dict(self.asamalar),
+                "api_cagrilari": {ad: dict(k) for ad, k in self.api_cagrilari.items()},
+                "baytlar": dict(self.baytlar),
+                "surec_cpu": {
+                    "surec_s": round(time.process_time() - self._islem0, 3),
+                    "alt_surec_s": round(_alt_surec_cpu() - self._alt0, 3),
+                    "atfedilebilir": not self.surec_paylasimli,
+                },
+                **self.ekstra,
+            }
+
+    def yaz(self, bucket=None, blob_adi: Optional[str] = None):
+        """Kaydı yerel JSONL dosyasına ekler; bucket verilirse ayrıca 'blob_adi' olarak yükler."""
+        satir = json.dumps(self.kayit(), ensure_ascii=False)
+        try:
+            os.makedirs(os.path.dirname(OLCUM_DOSYASI) or ".", exist_ok=True)
+            with open(OLCUM_DOSYASI, "a", encoding="utf-8") as f:
+                f.write(satir + "\n")
+        except OSError as e:
+            logging.warning(f"⚠️ Ölçüm kaydı yerel dosyaya yazılamadı ({OLCUM_DOSYASI}): {e}")
+        if bucket is not None and blob_adi:
+            try:
+                bucket.blob(blob_adi).upload_from_string(satir, content_type="application/json; charset=utf-8")
+            except Exception as e:
+                logging.warning(f"⚠️ Ölçüm kaydı GCS'e yüklenemedi: {e}")
+
+
+# --- MODÜLLERİN KULLANDIĞI KISAYOLLAR ---
+# Etkin bir iş ölçümü yoksa hiçbir şey yapmazlar.
+
+@contextmanager
+def asama(ad: str):
+    """Etkin işin altında bir alt aşama ölçer."""
+    olcum = _aktif_olcum.get()
+    if olcum is None:
+        yield None
+    else:
+        with olcum.asama(ad):
+            yield olcum
+
+def api_cagrisi(ad: str, sure: float, basarili: bool = True):
+    olcum = _aktif_olcum.get()
+    if olcum is not None:
+        olcum.api_cagrisi(ad, sure, basarili)
+
+def bayt(yon: str, sayi: int):
+    olcum = _aktif_olcum.get()
+    if olcum is not None:
+        olcum.bayt(yon, sayi)
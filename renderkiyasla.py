@@ -0,0 +1,153 @@
+# renderkiyasla.py (v1 - Kodlayıcı Profili Kıyaslaması)
+
+# Sabit bir test videosunu her kodlayıcı profiliyle render eder ve render hızı (fps),
+# dosya boyutu ile kayıpsız referansa göre kalite (PSNR / SSIM) raporlar.
+#
+# Kullanım:
+#   python renderkiyasla.py                       # sentetik 20 sn'lik fikstür, tüm profiller
+#   python renderkiyasla.py --motor ffmpeg --sure 60 --profil taslak --profil uretim
+#   python renderkiyasla.py --arkaplan bg.mp4 --ses ses.wav --altyazi altyazi.srt --foto leo_final.png
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+
+from PIL import Image, ImageDraw
+
+import videoyapar
+import ffmpegmotoru
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - [%(module)s.%(funcName)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# Kalite ölçümü için referans: aynı sahnenin kayıpsız (CRF 0) render'ı
+REFERANS_PROFILI = {"preset": "ultrafast", "crf": 0, "tune": None, "gop": None, "ses_bitrate": "192k"}
+
+
+# --- FİKSTÜR ---
+
+def fikstur_olustur(hedef_dizin, sure):
+    """
+    Tekrarlanabilir bir test seti üretir: hareketli 1080p arka plan (testsrc2), sinüs sesi,
+    iki saniyede bir değişen altyazılar ve düz renkli bir profil fotoğrafı.
+    """
+    arkaplan = os.path.join(hedef_dizin, "arkaplan.mp4")
+    subprocess.run([
+        ffmpegmotoru.FFMPEG, "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", "testsrc2=size=1920x1080:rate=30", "-t", "10",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p", arkaplan
+    ], check=True)
+
+    ses = os.path.join(hedef_dizin, "ses.wav")
+    subprocess.run([
+        ffmpegmotoru.FFMPEG, "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", "sine=frequency=220:sample_rate=24000", "-t", str(sure), "-ac", "1", ses
+    ], check=True)
+
+    altyazi = os.path.join(hedef_dizin, "altyazi.srt")
+    with open(altyazi, "w", encoding="utf-8") as f:
+        for i, baslangic in enumerate(range(0, int(sure), 2), start=1):
+            bitis = min(baslangic + 2, sure)
+            f.write(f"{i}\n00:{baslangic // 60:02d}:{baslangic % 60:02d},000 --> "
+                    f"00:{int(bitis) // 60:02d}:{int(bitis) % 60:02d},000\n"
+                    f"Benchmark caption number {i} with a few more words to wrap\n\n")
+
+    foto = os.path.join(hedef_dizin, "foto.png")
+    resim = Image.new("RGBA", (400, 400), (0, 0, 0, 0))
+    ImageDraw.Draw(resim).ellipse((0, 0, 399, 399), fill=(200, 160, 120, 255))
+    resim.save(foto)
+    return arkaplan, ses, altyazi, foto
+
+
+# --- ÖLÇÜMLER ---
+
+def kare_sayisi(video_yolu):
+    akis = next(s for s in ffmpegmotoru.ffprobe(video_yolu)["streams"] if s.get("codec_type") == "video")
+    if akis.get("nb_frames", "").isdigit():
+        return int(akis["nb_frames"])
+    return round(float(akis.get("duration", 0)) * videoyapar.VIDEO_FPS)
+
+def kalite_olc(video_yolu, referans_yolu):
+    """Videonun referansa göre ortalama PSNR (dB) ve SSIM değerini ffmpeg filtreleriyle ölçer."""
+    sonuc = subprocess.run([
+        ffmpegmotoru.FFMPEG, "-hide_banner", "-nostats", "-i", video_yolu, "-i", referans_yolu,
+        "-lavfi", "[0:v]split[a0][a1];[1:v]split[b0][b1];[a0][b0]psnr;[a1][b1]ssim",
+        "-f", "null", "-"
+    ], capture_output=True, text=True, check=True)
+    psnr = re.search(r"PSNR .*?average:([\d.]+|inf)", sonuc.stderr)
+    ssim = re.search(r"SSIM .*?All:([\d.]+)", sonuc.stderr)
+    return (float(psnr.group(1)) if psnr else None, float(ssim.group(1)) if ssim else None)
+
+def profili_olc(ad, ayarlar, girdiler, calisma_dizini, motor):
+    profil_dizini = os.path.join(calisma_dizini, ad)
+    os.makedirs(profil_dizini, exist_ok=True)
+    baslangic = time.perf_counter()
+    video_yolu = videoyapar.run_video_creation(*girdiler, profil_dizini, kodlayici_profili=ayarlar, render_motoru=motor)
+    sure = time.perf_counter() - baslangic
+    kareler = kare_sayisi(video_yolu)
+    return {
+        "profil": ad,
+        "sure_s": round(sure, 2),
+        "fps": round(kareler / sure, 1) if sure else None,
+        "boyut_mb": round(os.path.getsize(video_yolu) / 1024 / 1024, 2),
+        "video_yolu": video_yolu,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kodlayıcı profillerini render hızı, dosya boyutu ve kaliteye göre kıyaslar.")
+    parser.add_argument("--profil", action="append", choices=list(videoyapar.KODLAYICI_PROFILLERI),
+                        help="Kıyaslanacak profil (tekrarlanabilir; varsayılan: hepsi)")
+    parser.add_argument("--motor", default=videoyapar.RENDER_MOTORU, choices=list(videoyapar.RENDER_MOTORLARI))
+    parser.add_argument("--sure", type=float, default=20.0, help="Sentetik fikstürün süresi (saniye)")
+    parser.add_argument("--arkaplan", help="Sentetik arka plan yerine kullanılacak video")
+    parser.add_argument("--ses", help="Sentetik ses yerine kullanılacak WAV dosyası")
+    parser.add_argument("--altyazi", help="Sentetik altyazı yerine kullanılacak SRT dosyası")
+    parser.add_argument("--foto", help="Sentetik profil fotoğrafı yerine kullanılacak resim")
+    parser.add_argument("--json", help="Sonuçların ayrıca yazılacağı JSON dosyası")
+    parser.add_argument("--sakla", action="store_true", help="Render edilen videoları silme")
+    args = parser.parse_args()
+
+    calisma_dizini = tempfile.mkdtemp(prefix="renderkiyasla_", dir="/tmp")
+    try:
+        girdiler = fikstur_olustur(calisma_dizini, args.sure)
+        girdiler = (args.arkaplan or girdiler[0], args.ses or girdiler[1], args.altyazi or girdiler[2], args.foto or girdiler[3])
+
+        logging.info("📏 Kayıpsız referans render ediliyor...")
+        referans = profili_olc("referans", REFERANS_PROFILI, girdiler, calisma_dizini, args.motor)
+
+        sonuclar = []
+        for ad in args.profil or list(videoyapar.KODLAYICI_PROFILLERI):
+            logging.info(f"⏱️ '{ad}' profili render ediliyor...")
+            sonuc = profili_olc(ad, videoyapar.KODLAYICI_PROFILLERI[ad], girdiler, calisma_dizini, args.motor)
+            sonuc["psnr_db"], sonuc["ssim"] = kalite_olc(sonuc["video_yolu"], referans["video_yolu"])
+            sonuclar.append(sonuc)
+
+        print(f"\nMotor: {args.motor} | Referans (kayıpsız) render: {referans['sure_s']}s, {referans['fps']} fps\n")
+        print(f"{'PROFİL':<10} {'SÜRE (s)':>9} {'FPS':>7} {'BOYUT (MB)':>11} {'PSNR (dB)':>10} {'SSIM':>7}")
+        for s in sonuclar:
+            psnr = f"{s['psnr_db']:.2f}" if s["psnr_db"] is not None else "-"
+            ssim = f"{s['ssim']:.4f}" if s["ssim"] is not None else "-"
+            print(f"{s['profil']:<10} {s['sure_s']:>9} {s['fps']:>7} {s['boyut_mb']:>11} {psnr:>10} {ssim:>7}")
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"motor": args.motor, "referans": referans, "profiller": sonuclar}, f, ensure_ascii=False, indent=2)
+    finally:
+        if args.sakla:
+            logging.info(f"📁 Render çıktıları saklandı: {calisma_dizini}")
+        else:
+            shutil.rmtree(calisma_dizini, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# sesefektleri.py (v1 - NumPy Tabanlı PCM Efektleri)
+
+# Tüm fonksiyonlar 16-bit little-endian mono PCM ile çalışır. Yazılabilir tamponlar
+# (bytearray/memoryview) üzerinde efektler np.frombuffer görünümüyle yerinde uygulanır;
+# ses verisi kopyalanmaz ve örnek başına Python döngüsü yoktur.
+
+import numpy as np
+
+SAMPLE_RATE = 24000
+INT16_MIN = -32768
+INT16_MAX = 32767
+
+
+def pcm_view(buffer) -> np.ndarray:
+    """Tamponu kopyalamadan int16 örnek dizisi olarak döndürür."""
+    return np.frombuffer(buffer, dtype='<i2')
+
+def _ms_to_samples(duration_ms, sample_rate, total):
+    return min(int(sample_rate * (duration_ms / 1000.0)), total)
+
+def _write_clipped(target, values):
+    np.clip(values, INT16_MIN, INT16_MAX, out=values)
+    target[:] = values.astype(np.int16)
+
+def fade_out(buffer, duration_ms=500, sample_rate=SAMPLE_RATE):
+    """Tamponun sonuna doğrusal fade-out uygular (yerinde). Uygulanan örnek sayısını döner."""
+    samples = pcm_view(buffer)
+    n = _ms_to_samples(duration_ms, sample_rate, len(samples))
+    if n:
+        tail = samples[len(samples) - n:]
+        tail[:] = (tail * (1.0 - np.arange(n, dtype=np.float64) / n)).astype(np.int16)
+    return n
+
+def _apply_gain(buffer, gain_db):
+    """Tampona dB cinsinden kazanç uygular; taşan örnekler kırpılır (yerinde)."""
+    samples = pcm_view(buffer)
+    if len(samples) and gain_db:
+        _write_clipped(samples, samples * np.float32(10 ** (gain_db / 20.0)))
+
+def peak_dbfs(buffer):
+    """Tepe seviyesini dBFS olarak döner; sessiz tampon için -inf."""
+    samples = pcm_view(buffer)
+    peak = int(np.abs(samples.astype(np.int32)).max()) if len(samples) else 0
+    return 20 * np.log10(peak / 32768.0) if peak else float("-inf")
+
+def rms_dbfs(buffer):
+    """RMS seviyesini dBFS olarak döner; sessiz tampon için -inf."""
+    samples = pcm_view(buffer)
+    if not len(samples):
+        return float("-inf")
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    return 20 * np.log10(rms / 32768.0) if rms else float("-inf")
+
+def normalize_rms(buffer, target_dbfs=-20.0, max_gain_db=12.0):
+    """
+    RMS seviyesini hedef dBFS'e getirir (yerinde). Kazanç 'max_gain_db' ile sınırlanır
+    ve tepe 0 dBFS'i aşmayacak şekilde kısılır. Uygulanan kazancı dB olarak döner.
+    """
+    current = rms_dbfs(buffer)
+    if current == float("-inf"):
+        return 0.0
+    gain_db = min(target_dbfs - current, max_gain_db, -peak_dbfs(buffer))
+    _apply_gain(buffer, gain_db)
+    return gain_db
@@ -1,18 +1,42 @@
-﻿# videoyapar.py (v4 - Sabit "LEO" İsim Etiketi)
+﻿# videoyapar.py (v9 - Segmentli Çok Süreçli Render)
 
 import os
 import re
+import math
+import shutil
 import numpy as np
 import logging
 import traceback
-from moviepy.editor import (
-    VideoFileClip, AudioFileClip, CompositeVideoClip,
-    ImageClip, TextClip, ColorClip, concatenate_audioclips
-)
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw
+from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_audioclips
 from moviepy.audio.AudioClip import AudioArrayClip
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+import altyazicizici
+import ffmpegmotoru
+import katmanbirlestirici
 
 # --- AYARLAR ---
 TEST_MODE = False
+# "moviepy": kareler Python'da harmanlanır; "ffmpeg": tek filtre grafiğiyle tamamen ffmpeg içinde render edilir.
+RENDER_MOTORU = os.environ.get("RENDER_MOTORU", "moviepy").lower()
+VIDEO_YUKSEKLIK = 720
+VIDEO_FPS = 24
+# moviepy motorunda zaman çizelgesi bu kadar parçaya bölünüp ayrı süreçlerde render edilir (0: çekirdek sayısı kadar).
+RENDER_SEGMENT_SAYISI = int(os.environ.get("RENDER_SEGMENT_SAYISI", "1"))
+SEGMENT_MIN_SURE = 20  # Saniye; bundan kısa segmentlere bölünmez (süreç başına sahne kurulum maliyeti)
+
+# x264 kodlayıcı profilleri. 'crf' verilirse kalite hedefli, yoksa 'bitrate' ile ortalama bit hızı hedefli
+# kodlanır. 'gop' anahtar kare aralığıdır (kare). 'uretim' eski sabit ayarlarla (slow, 4000k) aynıdır.
+# Seçim verisi için: python renderkiyasla.py
+KODLAYICI_PROFILLERI = {
+    "taslak": {"preset": "veryfast", "crf": 28, "tune": "stillimage", "gop": 240, "ses_bitrate": "96k"},
+    "uretim": {"preset": "slow", "bitrate": "4000k", "tune": None, "gop": None, "ses_bitrate": "128k"},
+    "arsiv": {"preset": "slower", "crf": 18, "tune": "film", "gop": 48, "ses_bitrate": "192k"},
+}
+KODLAYICI_PROFILI = os.environ.get("KODLAYICI_PROFILI", "uretim")
 PROFIL_FOTO_KONUM_X = 0.5
 PROFIL_FOTO_KONUM_Y = 0.12
 PROFIL_FOTO_BOYUT = 350
@@ -21,6 +45,8 @@ ALTYAZI_FONT_SIZE = 36
 ALTYAZI_MAX_GENISLIK_ORANI = 0.9
 ISIM_FONT_SIZE = 40
 ALTYAZI_ASAGI_KAYDIR = -1.6
+ALTYAZI_ARKA_PLAN_OPAKLIK = 0.7
+ISIM_ETIKET_YUKSEKLIK = 60
 
 # --- Yardımcı Fonksiyonlar ---
 
@@ -53,49 +79,129 @@ def altyazi_parse(altyazi_dosyasi):
         logging.error(f"❌ Altyazı parse hatası: {e}")
         return []
 
-def altyazi_stili(txt, video_genislik):
-    txt = txt.upper()
+def kodlayici_profili_al(profil=None):
+    """Profil adını (veya doğrudan verilmiş ayar sözlüğünü) ayar sözlüğüne çevirir."""
+    profil = profil or KODLAYICI_PROFILI
+    if isinstance(profil, dict):
+        return profil
+    if profil not in KODLAYICI_PROFILLERI:
+        raise ValueError(f"Bilinmeyen kodlayıcı profili: '{profil}' (seçenekler: {', '.join(KODLAYICI_PROFILLERI)})")
+    return KODLAYICI_PROFILLERI[profil]
+
+def x264_parametreleri(ayarlar):
+    """Profildeki CRF / tune / GOP ayarlarını ffmpeg argümanlarına çevirir (preset ve bit hızı hariç)."""
+    parametreler = []
+    if ayarlar.get("crf") is not None:
+        parametreler += ["-crf", str(ayarlar["crf"])]
+    if ayarlar.get("tune"):
+        parametreler += ["-tune", ayarlar["tune"]]
+    if ayarlar.get("gop"):
+        parametreler += ["-g", str(ayarlar["gop"])]
+    return parametreler
+
+def ffmpeg_kodlayici_argumanlari(ayarlar):
+    """Profilin ffmpeg komut satırı için tam kodlayıcı argümanları."""
+    argumanlar = ["-c:v", "libx264", "-preset", ayarlar["preset"]]
+    if ayarlar.get("crf") is None:
+        argumanlar += ["-b:v", ayarlar["bitrate"]]
+    argumanlar += x264_parametreleri(ayarlar)
+    return argumanlar + ["-pix_fmt", "yuv420p", "-c:a", "aac", "-b:a", ayarlar["ses_bitrate"]]
+
+def altyazi_atlasi_olustur(altyazilar, video_genislik, video_suresi):
+    """Tüm altyazıları tek bir atlasa çizer."""
     altyazi_max_genislik = int(video_genislik * ALTYAZI_MAX_GENISLIK_ORANI)
-    return TextClip(
-        txt, fontsize=ALTYAZI_FONT_SIZE, color='white', font='Liberation-Sans-Bold',
-        method='caption', align='center', size=(altyazi_max_genislik, None)
-    )
+    return altyazicizici.AltyaziAtlasi(altyazilar, altyazi_max_genislik, ALTYAZI_FONT_SIZE, video_suresi)
 
-def altyazi_clipleri_olustur(altyazilar, video_genislik, altyazi_y_konum, video_suresi):
-    """Her altyazı için ayrı TextClip oluşturur."""
-    altyazi_clips = []
-    for altyazi in altyazilar:
-        if altyazi['baslangic'] >= video_suresi: continue
-        try:
-            clip = altyazi_stili(altyazi['metin'], video_genislik)
-            sure = min(altyazi['sure'], video_suresi - altyazi['baslangic'])
-            clip = clip.set_start(altyazi['baslangic']).set_duration(sure)
-            clip = clip.set_position(('center', altyazi_y_konum), relative=True)
-            altyazi_clips.append(clip)
-        except Exception as e:
-            logging.warning(f"⚠️  Altyazı oluşturulamadı: {e}")
-            continue
-    logging.info(f"📝 Toplam {len(altyazi_clips)} altyazı clip'i oluşturuldu")
-    return altyazi_clips
-
-def gradyan_arka_plan_olustur(genislik, yukseklik, ses_suresi):
+def gradyan_arka_plan_olustur(genislik, yukseklik):
+    """Soldan sağa koyulaşan mavi gradyanı (isim etiketi zemini) RGB dizi olarak döndürür."""
     gradyan = np.zeros((int(yukseklik), int(genislik), 3), dtype=np.uint8)
-    for x in range(int(genislik)):
-        ratio = x / genislik
-        b = int(10 + ratio * 245)
-        gradyan[:, x] = [0, 0, b]
-    return ImageClip(gradyan, duration=ses_suresi)
+    gradyan[:, :, 2] = (10 + np.arange(int(genislik)) / genislik * 245).astype(np.uint8)
+    return gradyan
 
-# --- ANA VİDEO OLUŞTURMA FONKSİYONU ---
-def run_video_creation(bg_video_path, audio_path, srt_path, profile_photo_path, output_dir):
-    logging.info("--- Video Birleştirme Modülü Başlatıldı (720p) ---")
-    
-    # --- GÜNCELLEME: İsim artık sabit olarak "LEO" ---
-    kahraman_adi = "LEO"
-    logging.info(f"✅ Karakter ismi sabit olarak ayarlandı: {kahraman_adi}")
+def sahne_duzeni(video_genislik, video_yukseklik, profile_photo_path):
+    """
+    Sabit katmanların piksel konumlarını hesaplar. Profil fotoğrafı burada bir kez
+    PROFIL_FOTO_BOYUT yüksekliğine ölçeklenir.
+    """
+    profil = Image.open(profile_photo_path).convert("RGBA")
+    profil_genislik = int(profil.width * PROFIL_FOTO_BOYUT / profil.height)
+    profil = profil.resize((profil_genislik, PROFIL_FOTO_BOYUT), Image.LANCZOS)
+    profil_x = int(video_genislik * (PROFIL_FOTO_KONUM_X - profil_genislik / (2 * video_genislik)))
 
-    altyazilar = altyazi_parse(srt_path)
-    if not altyazilar: raise Exception("Altyazı dosyası okunamadı veya boş.")
+    altyazi_arka_plan_yukseklik = int(video_yukseklik * 0.3)
+    altyazi_arka_plan_y = video_yukseklik - altyazi_arka_plan_yukseklik - 50
+
+    altyazi_asagi_kaydir_piksel = altyazi_arka_plan_yukseklik * ALTYAZI_ASAGI_KAYDIR / 10
+    altyazi_y_konum = ALTYAZI_KONUM_Y + (altyazi_asagi_kaydir_piksel / video_yukseklik)
+    altyazi_genislik = int(video_genislik * ALTYAZI_MAX_GENISLIK_ORANI)
+
+    return {
+        'profil': profil,
+        'profil_konum': (profil_x, int(video_yukseklik * PROFIL_FOTO_KONUM_Y)),
+        'altyazi_arka_plan': (0, altyazi_arka_plan_y, video_genislik, altyazi_arka_plan_yukseklik),
+        'isim_etiket': (profil_x, altyazi_arka_plan_y - ISIM_ETIKET_YUKSEKLIK, profil_genislik, ISIM_ETIKET_YUKSEKLIK),
+        'altyazi_konum': ((video_genislik - altyazi_genislik) // 2, int(video_yukseklik * altyazi_y_konum)),
+    }
+
+def isim_etiketi_olustur(kahraman_adi, genislik, yukseklik):
+    """Gradyan zemin üzerine ortalanmış isim yazısı (RGB dizi)."""
+    etiket = Image.fromarray(gradyan_arka_plan_olustur(genislik, yukseklik))
+    ImageDraw.Draw(etiket).text(
+        (genislik / 2, yukseklik / 2), kahraman_adi, fill="white",
+        font=altyazicizici.font_yukle(ISIM_FONT_SIZE), anchor="mm"
+    )
+    return np.asarray(etiket)
+
+def statik_katman_olustur(duzen, video_genislik, video_yukseklik, kahraman_adi):
+    """Altyazı arka planı, profil fotoğrafı ve isim etiketini tek bir katmana düzleştirir."""
+    katman = katmanbirlestirici.StatikKatman(video_genislik, video_yukseklik)
+    katman.dikdortgen_ekle(*duzen['altyazi_arka_plan'], renk=(0, 0, 0), opaklik=ALTYAZI_ARKA_PLAN_OPAKLIK)
+    katman.resim_ekle(np.asarray(duzen['profil']), *duzen['profil_konum'])
+    etiket_x, etiket_y, etiket_w, etiket_h = duzen['isim_etiket']
+    katman.resim_ekle(isim_etiketi_olustur(kahraman_adi, etiket_w, etiket_h), etiket_x, etiket_y)
+    return katman.tamamla()
+
+# --- RENDER MOTORLARI ---
+def moviepy_sahnesi_olustur(bg_video_path, altyazilar, profile_photo_path, kahraman_adi, video_suresi):
+    """
+    Arka plan + statik katman + altyazıdan oluşan sessiz sahneyi kurar.
+    Dönüş: (sahne clip'i, iş bitince kapatılması gereken kaynak clip).
+    """
+    arkaplan_video = VideoFileClip(bg_video_path, audio=False)
+    if video_suresi > arkaplan_video.duration:
+        arkaplan = arkaplan_video.loop(duration=video_suresi)
+    else:
+        arkaplan = arkaplan_video.set_duration(video_suresi)
+
+    # Önbellekteki arka planlar zaten çıktı yüksekliğindedir; kare başına yeniden ölçekleme atlanır.
+    if arkaplan.h != VIDEO_YUKSEKLIK:
+        arkaplan = arkaplan.resize(height=VIDEO_YUKSEKLIK)
+
+    video_genislik, video_yukseklik = arkaplan.size
+
+    # Sabit katmanlar bir kez düzleştirilir; her karede yalnızca arka plan, bu katman
+    # ve o anki altyazı harmanlanır.
+    duzen = sahne_duzeni(video_genislik, video_yukseklik, profile_photo_path)
+    statik_katman = statik_katman_olustur(duzen, video_genislik, video_yukseklik, kahraman_adi)
+    altyazi_atlasi = altyazi_atlasi_olustur(altyazilar, video_genislik, video_suresi)
+    birlestirici = katmanbirlestirici.KareBirlestirici(statik_katman, altyazi_atlasi, *duzen['altyazi_konum'])
+    return arkaplan.fl(birlestirici), arkaplan_video
+
+def moviepy_yazma_ayarlari(ayarlar, threads):
+    return dict(
+        codec="libx264",
+        bitrate=None if ayarlar.get("crf") is not None else ayarlar["bitrate"],
+        fps=VIDEO_FPS,
+        threads=threads,
+        preset=ayarlar["preset"],
+        ffmpeg_params=x264_parametreleri(ayarlar),
+    )
+
+def moviepy_ile_render(bg_video_path, audio_path, altyazilar, profile_photo_path, output_dir, kahraman_adi, ayarlar):
+    segment_sayisi = segment_sayisi_belirle(ffmpegmotoru.sure_al(audio_path)) if RENDER_SEGMENT_SAYISI != 1 else 1
+    if segment_sayisi > 1:
+        return moviepy_segmentli_render(bg_video_path, audio_path, altyazilar, profile_photo_path,
+                                        output_dir, kahraman_adi, ayarlar, segment_sayisi)
 
     ses_clip = None
     arkaplan_video = None
@@ -112,55 +218,14 @@ def run_video_creation(bg_video_path, audio_path, srt_path, profile_photo_path,
 
         logging.info(f"🎬 Final video süresi: {video_suresi:.2f} saniye")
 
-        arkaplan_video = VideoFileClip(bg_video_path)
-        if video_suresi > arkaplan_video.duration:
-            arkaplan = arkaplan_video.loop(duration=video_suresi)
-        else:
-            arkaplan = arkaplan_video.set_duration(video_suresi)
-
-        arkaplan = arkaplan.resize(height=720)
-
         if ses_clip.duration < video_suresi:
             logging.info(f"🔇 Ses süresi {video_suresi - ses_clip.duration:.2f} saniye uzatılıyor")
             sessizlik = AudioArrayClip(np.zeros((int((video_suresi - ses_clip.duration) * ses_clip.fps), ses_clip.nchannels)), fps=ses_clip.fps)
             ses_clip = concatenate_audioclips([ses_clip, sessizlik])
 
-        arkaplan = arkaplan.set_audio(ses_clip)
-        
-        video_genislik, video_yukseklik = arkaplan.size
-        logging.info(f"📐 Video boyutları: {video_genislik}x{video_yukseklik}")
-
-        altyazi_arka_plan_yukseklik = int(video_yukseklik * 0.3)
-        altyazi_arka_plan_y = video_yukseklik - altyazi_arka_plan_yukseklik - 50
-        altyazi_arka_plan = ColorClip(
-            size=(video_genislik, altyazi_arka_plan_yukseklik),
-            color=(0, 0, 0), duration=video_suresi
-        ).set_opacity(0.7).set_position(('center', altyazi_arka_plan_y))
-
-        profil_clip = ImageClip(profile_photo_path, duration=video_suresi).resize(height=PROFIL_FOTO_BOYUT)
-        profil_genislik = profil_clip.w
-        profil_clip = profil_clip.set_position((PROFIL_FOTO_KONUM_X - profil_genislik / (2 * video_genislik), PROFIL_FOTO_KONUM_Y), relative=True)
-        
-        isim_etiket_yukseklik = 60
-        isim_text = TextClip(kahraman_adi, fontsize=ISIM_FONT_SIZE, color='white', font='Liberation-Sans-Bold').set_duration(video_suresi)
-        isim_gradyan = gradyan_arka_plan_olustur(profil_genislik, isim_etiket_yukseklik, video_suresi)
-        isim_etiket = CompositeVideoClip([isim_gradyan, isim_text.set_position('center')])
-        
-        isim_y_relatif = (altyazi_arka_plan_y - isim_etiket_yukseklik) / video_yukseklik
-        isim_etiket = isim_etiket.set_position((PROFIL_FOTO_KONUM_X - isim_etiket.w / (2 * video_genislik), isim_y_relatif), relative=True)
-
-        altyazi_asagi_kaydir_piksel = altyazi_arka_plan_yukseklik * ALTYAZI_ASAGI_KAYDIR / 10
-        altyazi_y_konum = ALTYAZI_KONUM_Y + (altyazi_asagi_kaydir_piksel / video_yukseklik)
-        
-        altyazi_clips = altyazi_clipleri_olustur(altyazilar, video_genislik, altyazi_y_konum, video_suresi)
-
-        final_clip = CompositeVideoClip([
-            arkaplan,
-            altyazi_arka_plan,
-            profil_clip,
-            isim_etiket,
-            *altyazi_clips
-        ])
+        sahne, arkaplan_video = moviepy_sahnesi_olustur(bg_video_path, altyazilar, profile_photo_path, kahraman_adi, video_suresi)
+        logging.info(f"📐 Video boyutları: {sahne.w}x{sahne.h}")
+        final_clip = sahne.set_audio(ses_clip)
         
         output_video_path = os.path.join(output_dir, "final_video.mp4")
         
@@ -169,15 +234,167 @@ def run_video_creation(bg_video_path, audio_path, srt_path, profile_photo_path,
         
         final_clip.write_videofile(
             output_video_path,
-            codec="libx264",
             audio_codec="aac",
-            bitrate="4000k",
-            fps=24,
-            threads=available_threads,
-            preset="slow",
-            logger='bar'
+            audio_bitrate=ayarlar["ses_bitrate"],
+            logger='bar',
+            **moviepy_yazma_ayarlari(ayarlar, available_threads)
         )
-        
+        return output_video_path
+    finally:
+        if ses_clip: ses_clip.close()
+        if arkaplan_video: arkaplan_video.close()
+        if final_clip: final_clip.close()
+        logging.info("🧹 Video kaynakları temizlendi.")
+
+# --- SEGMENTLİ (ÇOK SÜREÇLİ) RENDER ---
+def segment_sayisi_belirle(video_suresi):
+    """RENDER_SEGMENT_SAYISI'nı (0 = çekirdek sayısı) videonun süresine göre sınırlar."""
+    istenen = RENDER_SEGMENT_SAYISI or (os.cpu_count() or 1)
+    return max(1, min(istenen, int(video_suresi // SEGMENT_MIN_SURE)))
+
+def segment_sinirlari(altyazilar, video_suresi, segment_sayisi):
+    """
+    Zaman çizelgesini eşit uzunluğa yakın 'segment_sayisi' parçaya böler ve her parçayı
+    [başlangıç karesi, bitiş karesi) tamsayı kare aralığı olarak döndürür. Kesim noktaları en yakın
+    altyazı başlangıcına/bitişine oturtulup kare indeksine çevrilir; böylece bir altyazı iki segment
+    arasında bölünmez ve aralıklar kayan nokta yuvarlaması olmadan uç uca eklenir.
+    """
+    toplam_kare = math.ceil(video_suresi * VIDEO_FPS)
+    adaylar = sorted({t for a in altyazilar for t in (a['baslangic'], a['bitis']) if 0 < t < video_suresi})
+    sinirlar = [0]
+    for k in range(1, segment_sayisi):
+        hedef = video_suresi * k / segment_sayisi
+        sinir = min(adaylar, key=lambda t: abs(t - hedef)) if adaylar else hedef
+        kare = round(sinir * VIDEO_FPS)
+        if sinirlar[-1] < kare < toplam_kare:
+            sinirlar.append(kare)
+    sinirlar.append(toplam_kare)
+    return list(zip(sinirlar, sinirlar[1:]))
+
+def _segment_render(bg_video_path, altyazilar, profile_photo_path, kahraman_adi, video_suresi,
+                    baslangic_kare, bitis_kare, segment_yolu, ayarlar, threads):
+    """
+    Ayrı bir süreçte çalışır: sahneyi kurar ve yalnızca [baslangic_kare, bitis_kare) karelerini sessiz olarak kodlar.
+    Kareler süre üzerinden örneklenmez; her kare indeksinden zamanı hesaplanıp kodlayıcıya tek tek yazılır,
+    ffmpeg'e de tam kare sayısı (-frames:v) verilir. Böylece segment sınırlarında kare tekrarlanmaz ya da atlanmaz.
+    """
+    sahne, arkaplan_video = moviepy_sahnesi_olustur(bg_video_path, altyazilar, profile_photo_path, kahraman_adi, video_suresi)
+    yazma_ayarlari = moviepy_yazma_ayarlari(ayarlar, threads)
+    yazma_ayarlari["ffmpeg_params"] = [*yazma_ayarlari["ffmpeg_params"], "-frames:v", str(bitis_kare - baslangic_kare)]
+    try:
+        with FFMPEG_VideoWriter(segment_yolu, sahne.size, **yazma_ayarlari) as yazici:
+            for kare in range(baslangic_kare, bitis_kare):
+                goruntu = sahne.get_frame(kare / VIDEO_FPS)
+                yazici.write_frame(goruntu if goruntu.dtype == np.uint8 else goruntu.astype(np.uint8))
+    finally:
+        arkaplan_video.close()
+    return segment_yolu
+
+def moviepy_segmentli_render(bg_video_path, audio_path, altyazilar, profile_photo_path, output_dir,
+                             kahraman_adi, ayarlar, segment_sayisi):
+    """
+    Zaman çizelgesini altyazı sınırlarında parçalara böler, her parçayı ayrı bir süreçte render eder
+    ve parçaları ffmpeg concat demuxer ile yeniden kodlamadan birleştirip sesi ekler.
+    """
+    video_suresi = max(ffmpegmotoru.sure_al(audio_path), altyazilar[-1]['bitis'] if altyazilar else 0)
+    if TEST_MODE:
+        video_suresi = min(10, video_suresi)
+    araliklar = segment_sinirlari(altyazilar, video_suresi, segment_sayisi)
+    threads = max(1, (os.cpu_count() or 1) // len(araliklar))
+    logging.info(f"🧩 Segmentli render: {video_suresi:.2f} saniye, {len(araliklar)} süreç × {threads} x264 iş parçacığı.")
+
+    segment_dizini = os.path.join(output_dir, "segmentler")
+    os.makedirs(segment_dizini, exist_ok=True)
+    segment_yollari = [os.path.join(segment_dizini, f"segment_{i:03d}.mp4") for i in range(len(araliklar))]
+
+    # 'spawn': işçi sürecinde çalışan kira/üretim iş parçacıkları çocuk süreçlere kopyalanmaz.
+    with ProcessPoolExecutor(max_workers=len(araliklar), mp_context=multiprocessing.get_context("spawn")) as havuz:
+        gorevler = [
+            havuz.submit(_segment_render, bg_video_path, altyazilar, profile_photo_path, kahraman_adi,
+                         video_suresi, baslangic_kare, bitis_kare, yol, ayarlar, threads)
+            for (baslangic_kare, bitis_kare), yol in zip(araliklar, segment_yollari)
+        ]
+        for gorev in gorevler:
+            gorev.result()
+
+    output_video_path = os.path.join(output_dir, "final_video.mp4")
+    try:
+        # Birleştirme yeniden kodlamadan yapılır; eksik/fazla kare her eklemde kayma olarak kalacağından önce doğrulanır.
+        for (baslangic_kare, bitis_kare), yol in zip(araliklar, segment_yollari):
+            kare_sayisi = ffmpegmotoru.kare_sayisi_al(yol)
+            if kare_sayisi != bitis_kare - baslangic_kare:
+                raise RuntimeError(f"{os.path.basename(yol)} {bitis_kare - baslangic_kare} kare yerine {kare_sayisi} kare içeriyor.")
+        return ffmpegmotoru.birlestir(
+            segment_yollari, audio_path, output_video_path, video_suresi,
+            ["-c:a", "aac", "-b:a", ayarlar["ses_bitrate"]]
+        )
+    finally:
+        shutil.rmtree(segment_dizini, ignore_errors=True)
+
+def ffmpeg_ile_render(bg_video_path, audio_path, altyazilar, profile_photo_path, output_dir, kahraman_adi, ayarlar):
+    """
+    moviepy yoluyla aynı yerleşimi tek bir ffmpeg komutuyla üretir. Statik katman PNG olarak,
+    altyazılar aynı font ve konumla ASS olarak yazılır; kareler Python'a hiç gelmez.
+    """
+    ses_suresi = ffmpegmotoru.sure_al(audio_path)
+    video_suresi = max(ses_suresi, altyazilar[-1]['bitis'] if altyazilar else 0)
+    if TEST_MODE:
+        video_suresi = min(10, video_suresi)
+    logging.info(f"🎬 Final video süresi: {video_suresi:.2f} saniye")
+
+    kaynak_genislik, kaynak_yukseklik = ffmpegmotoru.video_boyutu_al(bg_video_path)
+    # x264/yuv420p çift boyut ister
+    video_genislik = int(kaynak_genislik * VIDEO_YUKSEKLIK / kaynak_yukseklik) // 2 * 2
+    video_yukseklik = VIDEO_YUKSEKLIK
+    logging.info(f"📐 Video boyutları: {video_genislik}x{video_yukseklik}")
+
+    duzen = sahne_duzeni(video_genislik, video_yukseklik, profile_photo_path)
+    statik_katman = statik_katman_olustur(duzen, video_genislik, video_yukseklik, kahraman_adi)
+    overlay_png = statik_katman.png_kaydet(os.path.join(output_dir, "statik_katman.png"))
+
+    font = altyazicizici.font_yukle(ALTYAZI_FONT_SIZE)
+    font_adi, font_stili = font.getname()
+    altyazi_x, altyazi_y = duzen['altyazi_konum']
+    altyazi_genislik = int(video_genislik * ALTYAZI_MAX_GENISLIK_ORANI)  # altyazi_atlasi_olustur ile aynı genişlik
+    ass_path = ffmpegmotoru.ass_yaz(
+        altyazilar, os.path.join(output_dir, "altyazi.ass"), video_genislik, video_yukseklik,
+        font_adi, sum(font.getmetrics()), "Bold" in font_stili, altyazi_x, altyazi_y, video_suresi,
+        lambda metin: altyazicizici.satirlara_bol(metin, font, altyazi_genislik)
+    )
+
+    output_video_path = os.path.join(output_dir, "final_video.mp4")
+    return ffmpegmotoru.render(
+        bg_video_path, audio_path, overlay_png, ass_path, os.path.dirname(os.path.abspath(font.path)),
+        output_video_path, video_genislik, video_yukseklik, video_suresi, VIDEO_FPS,
+        ffmpeg_kodlayici_argumanlari(ayarlar)
+    )
+
+RENDER_MOTORLARI = {
+    "moviepy": moviepy_ile_render,
+    "ffmpeg": ffmpeg_ile_render,
+}
+
+# --- ANA VİDEO OLUŞTURMA FONKSİYONU ---
+def run_video_creation(bg_video_path, audio_path, srt_path, profile_photo_path, output_dir,
+                       kodlayici_profili=None, render_motoru=None):
+    render_motoru_adi = (render_motoru or RENDER_MOTORU).lower()
+    ayarlar = kodlayici_profili_al(kodlayici_profili)
+    profil_adi = "özel" if isinstance(kodlayici_profili, dict) else (kodlayici_profili or KODLAYICI_PROFILI)
+    logging.info(f"--- Video Birleştirme Modülü Başlatıldı (720p, motor: {render_motoru_adi}, kodlayıcı: {profil_adi}) ---")
+    
+    # --- GÜNCELLEME: İsim artık sabit olarak "LEO" ---
+    kahraman_adi = "LEO"
+    logging.info(f"✅ Karakter ismi sabit olarak ayarlandı: {kahraman_adi}")
+
+    altyazilar = altyazi_parse(srt_path)
+    if not altyazilar: raise Exception("Altyazı dosyası okunamadı veya boş.")
+
+    render_fonksiyonu = RENDER_MOTORLARI.get(render_motoru_adi)
+    if render_fonksiyonu is None:
+        raise ValueError(f"Bilinmeyen render motoru: '{render_motoru_adi}' (seçenekler: {', '.join(RENDER_MOTORLARI)})")
+
+    try:
+        output_video_path = render_fonksiyonu(bg_video_path, audio_path, altyazilar, profile_photo_path, output_dir, kahraman_adi, ayarlar)
         logging.info(f"✅ Video başarıyla oluşturuldu (720p): {output_video_path}")
         return output_video_path
 
@@ -185,8 +402,3 @@ def run_video_creation(bg_video_path, audio_path, srt_path, profile_photo_path,
         logging.error(f"❌ Video oluşturulurken kritik bir hata oluştu: {e}")
         traceback.print_exc()
         raise Exception("Video oluşturulamadı.")
-    finally:
-        if ses_clip: ses_clip.close()
-        if arkaplan_video: arkaplan_video.close()
-        if final_clip: final_clip.close()
-        logging.info("🧹 Video kaynakları temizlendi.")
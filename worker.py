@@ -8,14 +8,21 @@ import shutil
 import time
 import requests
 import subprocess
-import random
+import queue
+import threading
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 
 # Projenizdeki güncellenmiş modülleri import ediyoruz
 import hikayeuretir
 import googleilesesolustur
 import videoyapar
 import kucukresimolusturur
+import baslikkuyrugu
+import arkaplanonbellegi
+import yuklemeyoneticisi
+import olcumleme
 
 from google.cloud import storage
 from google.api_core import exceptions
@@ -33,6 +40,13 @@ CIKTI_BUCKET_ADI = "video-fabrikasi-ciktilar"
 HATA_BUCKET_ADI = "video-fabrikasi-hatalar"
 IDLE_SHUTDOWN_SECONDS = 600  # 10 dakika
 PROJECT_ID = "video-fabrikasi" # Proje ID'niz buraya sabitlendi
+# Pipeline modu (isteğe bağlı): >0 ise başlık N render edilirken sonraki başlıkların metin/ses/küçük
+# resim üretimi bu kadar iş önde yürütülür. Varsayılan 0: her başlık uçtan uca sırayla işlenir.
+PIPELINE_DERINLIGI = int(os.environ.get("PIPELINE_DERINLIGI", "0"))
+# Akışlı ses (isteğe bağlı): "1" verilirse metnin her bölümü üretilir üretilmez seslendirilmeye başlanır
+# (TTS, Gemini gecikmesiyle örtüşür). Varsayılan 0: ses, metin tamamlandıktan sonra üretilir.
+METIN_SES_AKISI = os.environ.get("METIN_SES_AKISI", "0") == "1"
+WHISPER_ON_ISITMA = os.environ.get("WHISPER_ON_ISITMA", "0") == "1"  # "1" verilirse Whisper modeli işçi başlarken yüklenir
 
 # --- YARDIMCI FONKSİYONLAR ---
 
@@ -72,24 +86,21 @@ def shutdown_instance_group():
     except Exception as e:
         logging.error(f"❌ Instance grubunu kapatırken hata oluştu: {e}", exc_info=True)
 
-def get_random_background_video(storage_client, temp_dir):
-    """Cloud Storage'dan rastgele bir arka plan videosu seçer ve indirir."""
+def get_random_background_video(storage_client):
+    """
+    Rastgele bir arka plan videosu seçer ve yerel önbellekteki (çıktı çözünürlüğüne önceden
+    dönüştürülmüş) kopyasının yolunu döndürür. Kayıt kullanımda işaretlenir; render bitince
+    arkaplan_videosunu_birak() çağrılmalıdır.
+    """
     try:
-        bucket = storage_client.bucket(KAYNAK_BUCKET_ADI)
-        blobs = list(bucket.list_blobs(prefix="arkaplan_videolari/"))
-        video_blobs = [b for b in blobs if b.name.lower().endswith((".mp4", ".mov")) and b.size > 0]
-        if not video_blobs:
-            raise FileNotFoundError(f"'{KAYNAK_BUCKET_ADI}/arkaplan_videolari/' klasöründe video bulunamadı.")
-        random_blob = random.choice(video_blobs)
-        logging.info(f"📹 Rastgele arka plan videosu seçildi: {random_blob.name}")
-        bg_video_path = os.path.join(temp_dir, os.path.basename(random_blob.name))
-        random_blob.download_to_filename(bg_video_path)
-        logging.info(f"✅ Arka plan videosu indirildi: {bg_video_path}")
-        return bg_video_path
+        return arkaplanonbellegi.onbellek_al(storage_client, KAYNAK_BUCKET_ADI).rastgele_al()
     except Exception as e:
         logging.error(f"❌ Arka plan videosu seçilirken/indirilirken hata oluştu: {e}")
         raise
 
+def arkaplan_videosunu_birak(storage_client, bg_video_path):
+    arkaplanonbellegi.onbellek_al(storage_client, KAYNAK_BUCKET_ADI).birak(bg_video_path)
+
 def log_error_to_gcs(storage_client, bucket_name, title, error_details):
     """Hata detaylarını GCS'e loglar."""
     instance_name = get_metadata("instance/name") or "unknown-instance"
@@ -110,131 +121,313 @@ def log_error_to_gcs(storage_client, bucket_name, title, error_details):
     except Exception as e:
         logging.error(f"🚨 GCS'e HATA LOGU YAZILIRKEN KRİTİK HATA OLUŞTU: {e}")
 
+# --- ÜRETİM AŞAMALARI ---
+
+@dataclass
+class VideoIsi:
+    """Ön üretim aşamasından render aşamasına aktarılan bir başlığın ara çıktıları."""
+    kira: baslikkuyrugu.BaslikKirasi
+    olcum: olcumleme.IsOlcumu
+    temp_dir: str
+    hikaye_path: Optional[str] = None
+    audio_file_path: Optional[str] = None
+    srt_file_path: Optional[str] = None
+    leo_photo_path: Optional[str] = None
+    final_thumbnail_path: Optional[str] = None
+    kuyruga_giris: Optional[float] = None
+    yuklemeler: Optional[yuklemeyoneticisi.YuklemeYoneticisi] = None
+
+    @property
+    def story_title(self):
+        return self.kira.baslik
+
+def guvenli_klasor_adi(baslik):
+    """Başlıktan çıktı bucket'ında klasör adı olarak kullanılabilecek bir ad üretir."""
+    return "".join(c for c in baslik if c.isalnum() or c in " -_").rstrip()
+
+def blob_indir(blob, local_path):
+    """Blob'u indirir ve indirilen bayt sayısını etkin iş ölçümüne ekler."""
+    blob.download_to_filename(local_path)
+    olcumleme.bayt("indirilen", os.path.getsize(local_path))
+
+def on_uretim_asamasi(storage_client, kira, olcum):
+    """
+    ADIM 2-5: Metin, ses/altyazı ve küçük resmi üretir.
+    Bu aşama büyük ölçüde ağ beklemesidir (Gemini, TTS, GCS).
+    """
+    story_title = kira.baslik
+    logging.info(f"🎯 YENİ VİDEO BAŞLADI: '{story_title}'")
+    logging.info("=" * 80)
+
+    # ADIM 2: HİKAYE METNİNİ ÜRET (akışlı modda bölümler üretildikçe seslendirme kuyruğuna girer)
+    seslendirici = googleilesesolustur.start_streaming_synthesis(PROJECT_ID) if METIN_SES_AKISI else None
+    try:
+        with olcum.asama("metin"):
+            formatted_text = hikayeuretir.run_script_generation_process(
+                PROJECT_ID, story_title, seslendirici.submit_section if seslendirici else None
+            )
+        if not formatted_text:
+            raise Exception(f"'{story_title}' için metin üretilemedi.")
+    except Exception:
+        if seslendirici:
+            seslendirici.cancel()
+        raise
+
+    temp_dir = tempfile.mkdtemp(dir="/tmp")
+    logging.info(f"📁 Geçici dizin oluşturuldu: {temp_dir}")
+    is_ = VideoIsi(kira=kira, olcum=olcum, temp_dir=temp_dir)
+    # Çıktılar, üretildikleri aşama biter bitmez arka planda yüklenmeye başlar.
+    is_.yuklemeler = yuklemeyoneticisi.YuklemeYoneticisi(
+        storage_client.bucket(CIKTI_BUCKET_ADI), guvenli_klasor_adi(story_title), olcum
+    )
+    try:
+        is_.hikaye_path = os.path.join(temp_dir, "hikaye.txt")
+        with open(is_.hikaye_path, "w", encoding="utf-8") as f: f.write(formatted_text)
+        is_.yuklemeler.ekle("hikaye.txt", is_.hikaye_path)
+
+        # ADIM 3: SES VE ALTYAZI ÜRET
+        with olcum.asama("ses_ve_altyazi"):
+            is_.audio_file_path, is_.srt_file_path, teslim_ses_path = googleilesesolustur.run_audio_and_srt_process(
+                formatted_text, temp_dir, PROJECT_ID, seslendirici
+            )
+        is_.yuklemeler.ekle("altyazi.srt", is_.srt_file_path)
+        is_.yuklemeler.ekle(os.path.basename(teslim_ses_path), teslim_ses_path)
+
+        # ADIM 4: GEREKLİ GÖRSEL VARLIKLARI İNDİR
+        with olcum.asama("varliklar"):
+            kaynak_bucket = storage_client.bucket(KAYNAK_BUCKET_ADI)
+            is_.leo_photo_path = os.path.join(temp_dir, "leo_final.png")
+            blob_indir(kaynak_bucket.blob("leo_final.png"), is_.leo_photo_path)
+            logging.info("✅ 'leo_final.png' (profil fotoğrafı) indirildi.")
+
+            thumbnail_photo_path = os.path.join(temp_dir, "kucukresimicinfoto.png")
+            blob_indir(kaynak_bucket.blob("kucukresimicinfoto.png"), thumbnail_photo_path)
+            logging.info("✅ 'kucukresimicinfoto.png' (thumbnail için) indirildi.")
+
+        # ADIM 5: KÜÇÜK RESİM ÜRET
+        with olcum.asama("kucuk_resim"):
+            if kucukresimolusturur.VARIANT_COUNT > 1:
+                # A/B varyantları: tek Gemini çağrısı, aynı taban katmandan toplu render.
+                is_.final_thumbnail_path, varyant_yollari, manifest_path = kucukresimolusturur.run_thumbnail_variant_generation(
+                    story_text=formatted_text,
+                    profile_photo_path=thumbnail_photo_path,
+                    output_dir=temp_dir,
+                    worker_project_id=PROJECT_ID
+                )
+            else:
+                is_.final_thumbnail_path = kucukresimolusturur.run_thumbnail_generation(
+                    story_text=formatted_text,
+                    profile_photo_path=thumbnail_photo_path,
+                    output_dir=temp_dir,
+                    worker_project_id=PROJECT_ID
+                )
+                varyant_yollari, manifest_path = [], None
+        is_.yuklemeler.ekle("kucuk_resim.png", is_.final_thumbnail_path)
+        for varyant_path in varyant_yollari:
+            is_.yuklemeler.ekle(os.path.basename(varyant_path), varyant_path)
+        if manifest_path:
+            is_.yuklemeler.ekle(os.path.basename(manifest_path), manifest_path, "application/json")
+    except Exception:
+        if seslendirici:
+            seslendirici.cancel()
+        is_.yuklemeler.iptal()
+        gecici_dizini_temizle(temp_dir)
+        raise
+    return is_
+
+def render_ve_yukleme_asamasi(storage_client, is_):
+    """
+    ADIM 6-8: Arka plan videosunu indirir, videoyu render eder ve çıktıları yükler.
+    Bu aşama CPU ağırlıklıdır (moviepy/ffmpeg).
+    """
+    olcum = is_.olcum
+    if is_.kuyruga_giris:
+        olcum.ekstra["render_kuyrugu_bekleme_s"] = round(time.time() - is_.kuyruga_giris, 3)
+
+    # ADIM 6: RASTGELE ARKAPLAN VİDEOSU SEÇ
+    with olcum.asama("arkaplan"):
+        bg_video_path = get_random_background_video(storage_client)
+
+    # ADIM 7: VİDEOYU OLUŞTUR
+    try:
+        with olcum.asama("render"):
+            final_video_path = videoyapar.run_video_creation(
+                bg_video_path=bg_video_path,
+                audio_path=is_.audio_file_path,
+                srt_path=is_.srt_file_path,
+                profile_photo_path=is_.leo_photo_path,
+                output_dir=is_.temp_dir
+            )
+    finally:
+        arkaplan_videosunu_birak(storage_client, bg_video_path)
+
+    # ADIM 8: ÜRETİLEN DOSYALARI YÜKLE
+    # Metin, ses, altyazı ve küçük resim render sürerken yüklendi; burada video eklenir ve kalanlar beklenir.
+    is_.yuklemeler.ekle("nihai_video.mp4", final_video_path)
+    with olcum.asama("yukleme"):
+        is_.yuklemeler.bekle()
+
+    is_.kira.tamamla()
+    olcum.bitir("basarili")
+    olcum.yaz(storage_client.bucket(CIKTI_BUCKET_ADI), f"{is_.yuklemeler.klasor}/olcum.json")
+    logging.info("=" * 80)
+    logging.info(f"🎉🎉🎉 ÜRETİM BAŞARIYLA TAMAMLANDI: '{is_.story_title}' 🎉🎉🎉")
+
+def hatayi_kaydet(storage_client, kira, e, olcum=None):
+    """Yakalanan hatayı loglar, GCS'deki hata bloguna yazar ve başlığın kirasını bırakır."""
+    story_title = kira.baslik if kira else None
+    error_details = traceback.format_exc()
+    logging.error("=" * 80)
+    logging.error(f"❌❌❌ HATA OLUŞTU: '{story_title}' başlıklı video üretilemedi ❌❌❌")
+    logging.error(f"Hata detayı: {str(e)}")
+    logging.error("=" * 80)
+    log_error_to_gcs(storage_client, HATA_BUCKET_ADI, story_title, error_details)
+    if olcum:
+        olcum.bitir("hata", str(e))
+        olcum.yaz()
+    if kira:
+        kira.birak()
+
+def gecici_dizini_temizle(temp_dir):
+    if temp_dir and os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+        logging.info(f"🗑️ Geçici dizin temizlendi.")
+
+def bosta_kapanmali_mi(idle_start_time):
+    """Boşta geçen süreyi loglar; kapatma zamanı geldiyse True döner."""
+    if (time.time() - idle_start_time) > IDLE_SHUTDOWN_SECONDS:
+        return True
+    logging.info(f"😴 İşlenecek yeni konu bulunamadı. Kapanmadan önce {int(IDLE_SHUTDOWN_SECONDS - (time.time() - idle_start_time))} saniye beklenecek.")
+    return False
+
 # --- ANA İŞ AKIŞI ---
-def main_loop():
-    storage_client = storage.Client()
+def sirali_dongu(storage_client, kuyruk):
+    """Her başlığı uçtan uca, bir sonrakine geçmeden işler."""
     idle_start_time = None
-    
-    logging.info("🚀 'The Creator's Blueprint' Video Fabrikası İşçisi başlatıldı. Görev bekleniyor...")
-    logging.info("=" * 80)
-    
+
     while True:
-        story_title = None
-        temp_dir = None
+        kira = None
+        olcum = None
+        is_ = None
         try:
             logging.info("\n🔍 Yeni video konusu aranıyor...")
-            
-            # ADIM 1: GCS'den işlenecek konuyu al
-            kaynak_bucket = storage_client.bucket(KAYNAK_BUCKET_ADI)
-            titles_blob = kaynak_bucket.blob("creator_blueprint_titles.txt")
-            if not titles_blob.exists():
-                logging.warning(f"{KAYNAK_BUCKET_ADI}/creator_blueprint_titles.txt bulunamadı. Boşta bekleniyor.")
-                all_titles = []
-            else:
-                all_titles = titles_blob.download_as_text(encoding="utf-8").strip().splitlines()
 
-            if not all_titles:
-                story_title = None
-            else:
-                story_title = all_titles[0]
-                remaining_titles = "\n".join(all_titles[1:])
-                titles_blob.upload_from_string(remaining_titles, content_type="text/plain; charset=utf-8")
-                logging.info(f"🔹 '{story_title}' başlığı GCS'den alındı. Kalan başlık sayısı: {len(all_titles) - 1}")
+            # ADIM 1: GCS kuyruğundan işlenecek konuyu kirala
+            kira = kuyruk.al()
 
-            if not story_title:
+            if not kira and kuyruk.eski_listeyi_aktar():
+                kira = kuyruk.al()
+
+            if not kira:
                 if idle_start_time is None:
                     idle_start_time = time.time()
-                if (time.time() - idle_start_time) > IDLE_SHUTDOWN_SECONDS:
+                if bosta_kapanmali_mi(idle_start_time):
                     shutdown_instance_group()
                     break
-                logging.info(f"😴 İşlenecek yeni konu bulunamadı. Kapanmadan önce {int(IDLE_SHUTDOWN_SECONDS - (time.time() - idle_start_time))} saniye beklenecek.")
                 time.sleep(60)
                 continue
-            
+
             idle_start_time = None # İş bulunduğu için sayacı sıfırla
-            logging.info(f"🎯 YENİ VİDEO BAŞLADI: '{story_title}'")
-            logging.info("=" * 80)
-
-            # ADIM 2: HİKAYE METNİNİ ÜRET
-            formatted_text = hikayeuretir.run_script_generation_process(PROJECT_ID, story_title)
-            if not formatted_text:
-                 raise Exception(f"'{story_title}' için metin üretilemedi.")
-            
-            temp_dir = tempfile.mkdtemp(dir="/tmp")
-            logging.info(f"📁 Geçici dizin oluşturuldu: {temp_dir}")
-            hikaye_path = os.path.join(temp_dir, "hikaye.txt")
-            with open(hikaye_path, "w", encoding="utf-8") as f: f.write(formatted_text)
-            
-            # ADIM 3: SES VE ALTYAZI ÜRET
-            audio_file_path, srt_file_path = googleilesesolustur.run_audio_and_srt_process(formatted_text, temp_dir, PROJECT_ID)
-
-            # ADIM 4: GEREKLİ GÖRSEL VARLIKLARI İNDİR
-            leo_photo_blob = kaynak_bucket.blob("leo_final.png")
-            leo_photo_path = os.path.join(temp_dir, "leo_final.png")
-            leo_photo_blob.download_to_filename(leo_photo_path)
-            logging.info("✅ 'leo_final.png' (profil fotoğrafı) indirildi.")
+            olcum = olcumleme.IsOlcumu(kira.baslik)
+            is_ = on_uretim_asamasi(storage_client, kira, olcum)
+            render_ve_yukleme_asamasi(storage_client, is_)
 
-            thumbnail_photo_blob = kaynak_bucket.blob("kucukresimicinfoto.png")
-            thumbnail_photo_path = os.path.join(temp_dir, "kucukresimicinfoto.png")
-            thumbnail_photo_blob.download_to_filename(thumbnail_photo_path)
-            logging.info("✅ 'kucukresimicinfoto.png' (thumbnail için) indirildi.")
+        except Exception as e:
+            if is_:
+                is_.yuklemeler.iptal()
+            hatayi_kaydet(storage_client, kira, e, olcum)
+        finally:
+            if is_:
+                gecici_dizini_temizle(is_.temp_dir)
+            logging.info("-" * 80)
+            time.sleep(5)
 
-            # ADIM 5: KÜÇÜK RESİM ÜRET
-            final_thumbnail_path = kucukresimolusturur.run_thumbnail_generation(
-                story_text=formatted_text,
-                profile_photo_path=thumbnail_photo_path,
-                output_dir=temp_dir,
-                worker_project_id=PROJECT_ID
-            )
+def on_uretim_dongusu(is_kuyrugu, isci_adi):
+    """
+    Pipeline modunun üretici tarafı: başlık alır, metin/ses/küçük resim üretir ve
+    hazır işi render kuyruğuna koyar. Kuyruk doluysa render aşaması yer açana kadar bekler.
+    Boşta kalma süresi dolduğunda kuyruğa bitiş işareti (None) koyar ve çıkar.
+    """
+    storage_client = storage.Client()
+    kuyruk = baslikkuyrugu.BaslikKuyrugu(storage_client, KAYNAK_BUCKET_ADI, isci_adi=isci_adi)
+    kuyruk.eski_listeyi_aktar()
+    idle_start_time = None
 
-            # ADIM 6: RASTGELE ARKAPLAN VİDEOSU SEÇ
-            bg_video_path = get_random_background_video(storage_client, temp_dir)
+    while True:
+        kira = None
+        olcum = None
+        try:
+            logging.info("\n🔍 Yeni video konusu aranıyor...")
+            kira = kuyruk.al()
 
-            # ADIM 7: VİDEOYU OLUŞTUR
-            final_video_path = videoyapar.run_video_creation(
-                bg_video_path=bg_video_path, 
-                audio_path=audio_file_path, 
-                srt_path=srt_file_path, 
-                profile_photo_path=leo_photo_path,
-                output_dir=temp_dir
-            )
+            if not kira and kuyruk.eski_listeyi_aktar():
+                kira = kuyruk.al()
 
-            # ADIM 8: ÜRETİLEN DOSYALARI YÜKLE
-            cikti_bucket = storage_client.bucket(CIKTI_BUCKET_ADI)
-            safe_folder_name = "".join(c for c in story_title if c.isalnum() or c in " -_").rstrip()
-            
-            files_to_upload = {
-                "nihai_video.mp4": final_video_path,
-                "kucuk_resim.png": final_thumbnail_path,
-                "altyazi.srt": srt_file_path,
-                "ses.wav": audio_file_path,
-                "hikaye.txt": hikaye_path
-            }
-            
-            for filename, local_path in files_to_upload.items():
-                if local_path and os.path.exists(local_path):
-                    logging.info(f"📤 Yükleniyor: {filename}")
-                    blob = cikti_bucket.blob(f"{safe_folder_name}/{filename}")
-                    blob.upload_from_filename(local_path)
-                    logging.info(f"✅ Yüklendi: {filename}")
-            
-            logging.info("=" * 80)
-            logging.info(f"🎉🎉🎉 ÜRETİM BAŞARIYLA TAMAMLANDI: '{story_title}' 🎉🎉🎉")
+            if not kira:
+                if idle_start_time is None:
+                    idle_start_time = time.time()
+                if bosta_kapanmali_mi(idle_start_time):
+                    is_kuyrugu.put(None)
+                    return
+                time.sleep(60)
+                continue
+
+            idle_start_time = None
+            # Render aşaması önceki başlıkla aynı süreçte eşzamanlı çalıştığından süreç CPU'su bu işe atfedilemez.
+            olcum = olcumleme.IsOlcumu(kira.baslik, surec_paylasimli=True)
+            is_ = on_uretim_asamasi(storage_client, kira, olcum)
+            logging.info(f"📦 '{kira.baslik}' render kuyruğuna alındı (kuyrukta bekleyen: {is_kuyrugu.qsize()}).")
+            is_.kuyruga_giris = time.time()
+            is_kuyrugu.put(is_)
 
         except Exception as e:
-            error_details = traceback.format_exc()
-            logging.error("=" * 80)
-            logging.error(f"❌❌❌ HATA OLUŞTU: '{story_title}' başlıklı video üretilemedi ❌❌❌")
-            logging.error(f"Hata detayı: {str(e)}")
-            logging.error("=" * 80)
-            log_error_to_gcs(storage_client, HATA_BUCKET_ADI, story_title, error_details)
+            hatayi_kaydet(storage_client, kira, e, olcum)
         finally:
-            if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-                logging.info(f"🗑️ Geçici dizin temizlendi.")
-            logging.info("-" * 80)
             time.sleep(5)
 
+def pipeline_dongusu(storage_client, isci_adi, derinlik):
+    """
+    Başlık N render edilirken başlık N+1'in metin, ses ve küçük resmini üreten iki aşamalı döngü.
+    Aşamalar arasındaki kuyruk 'derinlik' ile sınırlıdır; böylece ön üretim render'ın
+    en fazla bu kadar iş önüne geçer ve diskte biriken geçici dizinler sınırlı kalır.
+    """
+    is_kuyrugu = queue.Queue(maxsize=derinlik)
+    uretici = threading.Thread(target=on_uretim_dongusu, args=(is_kuyrugu, isci_adi), name="on-uretim", daemon=True)
+    uretici.start()
+    logging.info(f"🔀 Pipeline modu etkin (kuyruk derinliği: {derinlik}).")
+
+    while True:
+        is_ = is_kuyrugu.get()
+        if is_ is None:
+            break
+        try:
+            logging.info(f"🎬 Render aşaması başladı: '{is_.story_title}'")
+            render_ve_yukleme_asamasi(storage_client, is_)
+        except Exception as e:
+            is_.yuklemeler.iptal()
+            hatayi_kaydet(storage_client, is_.kira, e, is_.olcum)
+        finally:
+            gecici_dizini_temizle(is_.temp_dir)
+            logging.info("-" * 80)
+
+    shutdown_instance_group()
+
+def main_loop():
+    storage_client = storage.Client()
+    isci_adi = get_metadata("instance/name")
+
+    if WHISPER_ON_ISITMA:
+        googleilesesolustur.warm_up_whisper()
+
+    logging.info("🚀 'The Creator's Blueprint' Video Fabrikası İşçisi başlatıldı. Görev bekleniyor...")
+    logging.info("=" * 80)
+
+    if PIPELINE_DERINLIGI > 0:
+        pipeline_dongusu(storage_client, isci_adi, PIPELINE_DERINLIGI)
+    else:
+        kuyruk = baslikkuyrugu.BaslikKuyrugu(storage_client, KAYNAK_BUCKET_ADI, isci_adi=isci_adi)
+        kuyruk.eski_listeyi_aktar()
+        sirali_dongu(storage_client, kuyruk)
+
 if __name__ == "__main__":
     main_loop()
-
@@ -0,0 +1,147 @@
+# yanitonbellegi.py (v1 - İçerik Adresli LLM Yanıt Önbelleği)
+
+# Doğrulanmış Gemini yanıtları (model, üretim ayarları, prompt) üçlüsünün özetiyle anahtarlanarak
+# yerel diske, isteğe bağlı olarak da GCS'e yazılır. Aşağı akışta (ör. render) başarısız olan bir
+# iş aynı başlıkla tekrar denendiğinde, zaten ücreti ödenmiş metin bölümleri ve küçük resim JSON'u
+# yeniden üretilmez. Kayıtlar TTL ile eskir; yerel önbellek boyut sınırını aşınca en eski kayıtlar silinir.
+# Önbellek isteğe bağlıdır (YANIT_ONBELLEGI=1): açıkken aynı başlığın tekrar denemesi aynı metni geri alır.
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+import olcumleme
+
+# --- AYARLAR ---
+ONBELLEK_ACIK = os.environ.get("YANIT_ONBELLEGI", "0") == "1"
+ONBELLEK_DIZINI = os.environ.get("YANIT_ONBELLEK_DIZINI", "/var/cache/video_fabrikasi/yanitlar")
+ONBELLEK_TTL_SANIYE = float(os.environ.get("YANIT_ONBELLEK_TTL_SAAT", "168")) * 3600
+ONBELLEK_MAKS_BAYT = int(float(os.environ.get("YANIT_ONBELLEK_MAKS_MB", "200")) * 1024 * 1024)
+# Boş bırakılırsa yalnızca yerel disk kullanılır; verilirse kayıtlar bu bucket'ta da tutulur (makineler arası paylaşım).
+ONBELLEK_BUCKET = os.environ.get("YANIT_ONBELLEK_BUCKET", "")
+ONBELLEK_ONEKI = "yanit_onbellegi/"
+TEMIZLIK_ARALIGI = 50  # Bu kadar yazmada bir boyut sınırı kontrol edilir
+
+_kilit = threading.Lock()
+_yazma_sayaci = 0
+_bucket = None
+
+
+class OnbellekYaniti:
+    """Önbellekten dönen yanıt; çağıranlar için Gemini yanıtı gibi '.text' sağlar."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def anahtar(model_name: str, generation_config: dict, prompt: str) -> str:
+    icerik = json.dumps({"model": model_name, "config": generation_config, "prompt": prompt},
+                        sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(icerik.encode("utf-8")).hexdigest()
+
+def _yerel_yol(key: str) -> str:
+    return os.path.join(ONBELLEK_DIZINI, key[:2], key + ".json")
+
+def _gcs_bucket():
+    global _bucket
+    if not ONBELLEK_BUCKET:
+        return None
+    with _kilit:
+        if _bucket is None:
+            from google.cloud import storage
+            _bucket = storage.Client().bucket(ONBELLEK_BUCKET)
+        return _bucket
+
+def _gecerli(kayit: dict) -> bool:
+    return time.time() - kayit.get("olusturma", 0) < ONBELLEK_TTL_SANIYE
+
+def _yerel_yaz(key: str, veri: str):
+    yol = _yerel_yol(key)
+    os.makedirs(os.path.dirname(yol), exist_ok=True)
+    gecici = f"{yol}.{threading.get_ident()}.part"
+    with open(gecici, "w", encoding="utf-8") as f:
+        f.write(veri)
+    os.replace(gecici, yol)
+
+def _temizle():
+    """Süresi dolan kayıtları ve boyut sınırını aşan en eski kayıtları siler."""
+    kayitlar = []
+    for kok, _, dosyalar in os.walk(ONBELLEK_DIZINI):
+        for ad in dosyalar:
+            if ad.endswith(".json"):
+                yol = os.path.join(kok, ad)
+                durum = os.stat(yol)
+                kayitlar.append((durum.st_mtime, durum.st_size, yol))
+    toplam = sum(boyut for _, boyut, _ in kayitlar)
+    sinir = time.time() - ONBELLEK_TTL_SANIYE
+    for mtime, boyut, yol in sorted(kayitlar):
+        if mtime >= sinir and toplam <= ONBELLEK_MAKS_BAYT:
+            break
+        try:
+            os.remove(yol)
+            toplam -= boyut
+        except OSError:
+            pass
+
+def al(model_name: str, generation_config: dict, prompt: str) -> Optional[OnbellekYaniti]:
+    """Önbellekte geçerli bir yanıt varsa döndürür (önce yerel disk, sonra GCS)."""
+    if not ONBELLEK_ACIK:
+        return None
+    key = anahtar(model_name, generation_config, prompt)
+    try:
+        with open(_yerel_yol(key), encoding="utf-8") as f:
+            kayit = json.load(f)
+        if _gecerli(kayit):
+            os.utime(_yerel_yol(key))
+            logging.info(f"♻️ Gemini yanıtı yerel önbellekten kullanıldı ({model_name}, {key[:12]}).")
+            olcumleme.api_cagrisi("gemini_onbellek", 0.0, True)
+            return OnbellekYaniti(kayit["text"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    bucket = _gcs_bucket()
+    if bucket is None:
+        return None
+    try:
+        blob = bucket.blob(f"{ONBELLEK_ONEKI}{key}.json")
+        if not blob.exists():
+            return None
+        veri = blob.download_as_text()
+        kayit = json.loads(veri)
+        if not _gecerli(kayit):
+            return None
+        _yerel_yaz(key, veri)
+        logging.info(f"♻️ Gemini yanıtı GCS önbelleğinden kullanıldı ({model_name}, {key[:12]}).")
+        olcumleme.api_cagrisi("gemini_onbellek", 0.0, True)
+        return OnbellekYaniti(kayit["text"])
+    except Exception as e:
+        logging.warning(f"⚠️ GCS yanıt önbelleği okunamadı: {e}")
+        return None
+
+def kaydet(model_name: str, generation_config: dict, prompt: str, text: str):
+    """Doğrulanmış bir yanıtı önbelleğe yazar. Önbellek hataları üretimi durdurmaz."""
+    global _yazma_sayaci
+    if not ONBELLEK_ACIK or not text:
+        return
+    key = anahtar(model_name, generation_config, prompt)
+    veri = json.dumps({"model": model_name, "olusturma": time.time(), "text": text}, ensure_ascii=False)
+    try:
+        _yerel_yaz(key, veri)
+        with _kilit:
+            _yazma_sayaci += 1
+            temizlik_zamani = _yazma_sayaci % TEMIZLIK_ARALIGI == 1
+        if temizlik_zamani:
+            _temizle()
+    except OSError as e:
+        logging.warning(f"⚠️ Yanıt yerel önbelleğe yazılamadı: {e}")
+
+    bucket = _gcs_bucket()
+    if bucket is not None:
+        try:
+            bucket.blob(f"{ONBELLEK_ONEKI}{key}.json").upload_from_string(veri, content_type="application/json; charset=utf-8")
+        except Exception as e:
+            logging.warning(f"⚠️ Yanıt GCS önbelleğine yazılamadı: {e}")
@@ -0,0 +1,93 @@
+# yuklemeyoneticisi.py (v1 - Paralel ve Devam Ettirilebilir Çıktı Yüklemeleri)
+
+# Bir işin çıktıları, ilgili aşama biter bitmez arka planda yüklenmeye başlar (metin, ses ve
+# altyazı render sürerken yüklenir); iş sonunda yalnızca henüz bitmemiş yüklemeler beklenir.
+# Büyük dosyalar parça parça, devam ettirilebilir (resumable) oturumla yüklenir; her yüklemede
+# CRC32C bütünlük kontrolü yapılır. İş başarısız olursa yarım kalan çıktılar bucket'tan silinir.
+
+import os
+import time
+import logging
+import threading
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# --- AYARLAR ---
+ESZAMANLI_YUKLEME = int(os.environ.get("ESZAMANLI_YUKLEME", "4"))
+BUYUK_DOSYA_ESIGI = 32 * 1024 * 1024  # Bu boyuttan büyük dosyalar parça parça yüklenir
+PARCA_BOYUTU = 16 * 1024 * 1024       # 256 KB'nin katı olmalı (GCS resumable upload kuralı)
+YUKLEME_ZAMAN_ASIMI = 300             # Parça başına HTTP zaman aşımı (saniye)
+
+
+class YuklemeYoneticisi:
+    """Bir işin çıktılarını 'klasor' altına paralel yükler."""
+
+    def __init__(self, bucket, klasor, olcum=None, eszamanli=ESZAMANLI_YUKLEME):
+        self.bucket = bucket
+        self.klasor = klasor
+        self.olcum = olcum
+        self._havuz = ThreadPoolExecutor(max_workers=eszamanli, thread_name_prefix="yukleme")
+        self._gorevler = {}
+        self._tamamlananlar = []
+        self._kilit = threading.Lock()
+
+    def _yukle(self, dosya_adi, yerel_yol, content_type):
+        blob = self.bucket.blob(f"{self.klasor}/{dosya_adi}")
+        boyut = os.path.getsize(yerel_yol)
+        if boyut > BUYUK_DOSYA_ESIGI:
+            blob.chunk_size = PARCA_BOYUTU
+        baslangic = time.perf_counter()
+        basarili = False
+        try:
+            blob.upload_from_filename(
+                yerel_yol,
+                content_type=content_type or mimetypes.guess_type(dosya_adi)[0],
+                checksum="crc32c",
+                timeout=YUKLEME_ZAMAN_ASIMI,
+            )
+            basarili = True
+        finally:
+            if self.olcum:
+                self.olcum.api_cagrisi("gcs_yukleme", time.perf_counter() - baslangic, basarili)
+        if self.olcum:
+            self.olcum.bayt("yuklenen", boyut)
+        with self._kilit:
+            self._tamamlananlar.append(blob)
+        logging.info(f"✅ Yüklendi: {dosya_adi} ({boyut / 1024 / 1024:.1f} MB, {time.perf_counter() - baslangic:.1f}s)")
+        return blob
+
+    def ekle(self, dosya_adi, yerel_yol, content_type=None):
+        """Dosyanın yüklenmesini hemen başlatır. Yol boşsa veya dosya yoksa hiçbir şey yapmaz."""
+        if not yerel_yol or not os.path.exists(yerel_yol):
+            return None
+        logging.info(f"📤 Yükleme kuyruğa alındı: {dosya_adi}")
+        gorev = self._havuz.submit(self._yukle, dosya_adi, yerel_yol, content_type)
+        with self._kilit:
+            self._gorevler[dosya_adi] = gorev
+        return gorev
+
+    def bekle(self):
+        """Tüm yüklemelerin bitmesini bekler; başarısız bir yükleme varsa ilk hatayı yükseltir."""
+        with self._kilit:
+            gorevler = dict(self._gorevler)
+        wait(gorevler.values())
+        for dosya_adi, gorev in gorevler.items():
+            if gorev.exception():
+                raise RuntimeError(f"'{dosya_adi}' yüklenemedi: {gorev.exception()}") from gorev.exception()
+        self._havuz.shutdown(wait=False)
+
+    def iptal(self):
+        """Bekleyen yüklemeleri iptal eder, süren yüklemelerin bitmesini bekler ve yüklenmiş çıktıları siler."""
+        with self._kilit:
+            gorevler = list(self._gorevler.values())
+        for gorev in gorevler:
+            gorev.cancel()
+        self._havuz.shutdown(wait=True)
+        for blob in self._tamamlananlar:
+            try:
+                blob.delete()
+            except Exception as e:
+                logging.warning(f"⚠️ Yarım kalan çıktı silinemedi ({blob.name}): {e}")
+        if self._tamamlananlar:
+            logging.info(f"🧹 Başarısız işin {len(self._tamamlananlar)} çıktısı bucket'tan silindi.")
+        self._tamamlananlar = []